@@ -1,21 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, Response, Cookie
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Cookie
 from sqlalchemy.ext.asyncio import AsyncSession
 from features.user.repository import UserRepository
 from features.auth.service import AuthService
 from features.auth.schemas import SignupRequest, LoginRequest, TokenResponse
+from features.auth.exceptions import InvalidRefreshTokenError, TooManyLoginAttemptsError
 from features.user.exceptions import UserExistsError, UserCreateError
 from features.user.schemas import UserResponse
 from db.session import get_db
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from utils.security import PasswordHasherBusyError
+from utils.oauth import OAuthProviderUnavailableError
+from utils.tokens import access_tokens
+from utils.config import Settings, get_settings
 
 router = APIRouter()
 
-GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
-GOOGLE_REDIRECT_URI = os.getenv("GOOGLE_REDIRECT_URI")
-
 @router.post("/signup", response_model=UserResponse)
 async def sign_up(data: SignupRequest, db: AsyncSession = Depends(get_db)):
     user_repo = UserRepository(db)
@@ -26,17 +24,23 @@ async def sign_up(data: SignupRequest, db: AsyncSession = Depends(get_db)):
     except UserCreateError as e:
         raise HTTPException(status_code=400, detail="Failed to create user")
     except UserExistsError as e:
-        raise HTTPException(status_code=400, detail="User already exists")
+        raise HTTPException(status_code=400, detail=e.message)
+    except PasswordHasherBusyError as e:
+        raise HTTPException(status_code=503, detail="Server is busy, please retry", headers={"Retry-After": "1"})
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/login", response_model=TokenResponse)
-async def login(data: LoginRequest, response: Response, db: AsyncSession = Depends(get_db)):
+async def login(data: LoginRequest, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     user_repo = UserRepository(db)
     auth_service = AuthService(user_repo)
     try:
-        access_token, refresh_token = await auth_service.login_with_password(data)
+        access_token, refresh_token = await auth_service.login_with_password(
+            data,
+            ip_address=request.client.host if request.client else "unknown",
+            user_agent=request.headers.get("user-agent"),
+        )
         response.set_cookie(
             key="refresh_token",
             value=refresh_token.token,
@@ -47,13 +51,17 @@ async def login(data: LoginRequest, response: Response, db: AsyncSession = Depen
         )
 
         return access_token
+    except TooManyLoginAttemptsError as e:
+        raise HTTPException(status_code=429, detail=e.message, headers={"Retry-After": str(e.retry_after)})
+    except PasswordHasherBusyError as e:
+        raise HTTPException(status_code=503, detail="Server is busy, please retry", headers={"Retry-After": "1"})
     except ValueError as e:
         raise HTTPException(status_code=401, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=401, detail=str(e))
 
 @router.post("/refresh-token", response_model=TokenResponse)
-async def refresh_token(db: AsyncSession = Depends(get_db), refresh_token: str = Cookie(None)):
+async def refresh_token(response: Response, db: AsyncSession = Depends(get_db), refresh_token: str = Cookie(None)):
     if not refresh_token:
         raise HTTPException(status_code=401, detail="Refresh token missing")
 
@@ -61,13 +69,32 @@ async def refresh_token(db: AsyncSession = Depends(get_db), refresh_token: str =
     auth_service = AuthService(user_repo)
 
     try:
-        access_token = await auth_service.refresh_token(refresh_token)
+        access_token, new_refresh_token = await auth_service.refresh_token(refresh_token)
+        response.set_cookie(
+            key="refresh_token",
+            value=new_refresh_token.token,
+            httponly=True,
+            secure=True,
+            samesite="strict",
+            max_age=60 * 60 * 24 * 7,  # 7 days expiration
+        )
         return access_token
+    except InvalidRefreshTokenError as e:
+        raise HTTPException(status_code=401, detail=e.message)
     except ValueError as e:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
     except Exception as e:
         raise HTTPException(status_code=401, detail=str(e))
     
+@router.post("/logout", status_code=204)
+async def logout(response: Response, db: AsyncSession = Depends(get_db), refresh_token: str = Cookie(None)):
+    if refresh_token:
+        try:
+            await AuthService(UserRepository(db)).logout(refresh_token)
+        except ValueError:
+            pass
+    response.delete_cookie("refresh_token")
+
 @router.get("/oauth/login/{provider}", response_model=TokenResponse)
 async def oauth_login(provider: str, code: str, db: AsyncSession = Depends(get_db)):
     user_repo = UserRepository(db)
@@ -75,15 +102,23 @@ async def oauth_login(provider: str, code: str, db: AsyncSession = Depends(get_d
     try:
         access_token = await auth_service.login_with_oauth(provider, code)
         return access_token
+    except OAuthProviderUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
     
+@router.get("/jwks")
+async def jwks(response: Response):
+    # public halves of the asymmetric access-token keys, for services that verify tokens locally
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return access_tokens.key_ring.public_jwks()
+
 @router.get("/oauth/url")
-async def oauth_url(provider: str):
+async def oauth_url(provider: str, settings: Settings = Depends(get_settings)):
     if provider == "google":
-        return {"url": f"https://accounts.google.com/o/oauth2/v2/auth?response_type=code&client_id={GOOGLE_CLIENT_ID}&redirect_uri={GOOGLE_REDIRECT_URI}&scope=profile email&access_type=offline&prompt=consent"}
+        return {"url": f"https://accounts.google.com/o/oauth2/v2/auth?response_type=code&client_id={settings.google_client_id}&redirect_uri={settings.google_redirect_uri}&scope=profile email&access_type=offline&prompt=consent"}
     else:
         return {"url": "http://localhost"}
     
\ No newline at end of file
@@ -0,0 +1,121 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from features.events.repository import EventRepository
+from features.events.service import EventService
+from features.events.schemas import EventCreate, EventResponse, EventUpdate, LocationCreate, LocationResponse, ParticipationResponse
+from features.events.exceptions import EventNotFoundError, LocationNotFoundError, EventPermissionError, EventJoinError, NotParticipatingError
+from features.counters.schemas import CounterResponse
+from features.auth.dependencies import get_current_user
+from db.session import get_db
+from db.replicas import get_read_db
+from utils.responses import ModelResponse, cache_headers, etag_matches, not_modified
+
+router = APIRouter()
+
+@router.get("/", response_model=list[EventResponse])
+async def search_events(
+    start_from: Optional[datetime] = None,
+    start_to: Optional[datetime] = None,
+    city: Optional[str] = None,
+    status: str = Query("active", pattern="^(active|cancelled|completed|expired)$"),
+    tags: list[str] = Query([]),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_read_db),
+):
+    event_service = EventService(EventRepository(db))
+    try:
+        events, next_cursor = await event_service.search_events(status, start_from, start_to, city, tags, cursor, limit)
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor is not None else None
+        return ModelResponse(events, headers=headers)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/", response_model=EventResponse)
+async def create_event(data: EventCreate, current_user=Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    event_service = EventService(EventRepository(db))
+    try:
+        return await event_service.create_event(current_user.id, data)
+    except LocationNotFoundError as e:
+        raise HTTPException(status_code=400, detail=e.message)
+
+@router.post("/locations", response_model=LocationResponse)
+async def create_location(data: LocationCreate, current_user=Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    event_service = EventService(EventRepository(db))
+    return await event_service.create_location(current_user.id, data)
+
+@router.get("/locations/{location_id}", response_model=LocationResponse)
+async def get_location(location_id: int, db: AsyncSession = Depends(get_read_db)):
+    event_service = EventService(EventRepository(db))
+    try:
+        return await event_service.get_location(location_id)
+    except LocationNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.message)
+
+@router.get("/{event_id}", response_model=EventResponse, responses={304: {"description": "Not modified"}})
+async def get_event(event_id: int, if_none_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_read_db)):
+    event_service = EventService(EventRepository(db))
+    try:
+        if if_none_match:
+            etag = await event_service.get_event_etag(event_id)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+        event, etag = await event_service.get_event_with_etag(event_id)
+        return ModelResponse(event, headers=cache_headers(etag))
+    except EventNotFoundError as e:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+@router.put("/{event_id}", response_model=EventResponse)
+async def update_event(
+    event_id: int, data: EventUpdate, response: Response, current_user=Depends(get_current_user), db: AsyncSession = Depends(get_db)
+):
+    event_service = EventService(EventRepository(db))
+    try:
+        event, notification_job_id = await event_service.update_event(current_user.id, event_id, data)
+        if notification_job_id is not None:
+            # participants are notified in the background; progress is at /api/v1/notifications/jobs/{id}
+            response.headers["X-Notification-Job"] = str(notification_job_id)
+        return event
+    except EventNotFoundError as e:
+        raise HTTPException(status_code=404, detail="Event not found")
+    except EventPermissionError as e:
+        raise HTTPException(status_code=403, detail=e.message)
+    except LocationNotFoundError as e:
+        raise HTTPException(status_code=400, detail=e.message)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/{event_id}/join", response_model=ParticipationResponse)
+async def join_event(event_id: int, current_user=Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    event_service = EventService(EventRepository(db))
+    try:
+        return await event_service.join_event(event_id, current_user.id)
+    except EventNotFoundError as e:
+        raise HTTPException(status_code=404, detail="Event not found")
+    except EventJoinError as e:
+        raise HTTPException(status_code=409, detail=e.message)
+
+@router.post("/{event_id}/leave", response_model=ParticipationResponse)
+async def leave_event(event_id: int, current_user=Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    event_service = EventService(EventRepository(db))
+    try:
+        return await event_service.leave_event(event_id, current_user.id)
+    except NotParticipatingError as e:
+        raise HTTPException(status_code=404, detail=e.message)
+
+async def vote_event(event_id: int, field: str, db: AsyncSession) -> CounterResponse:
+    event_service = EventService(EventRepository(db))
+    try:
+        return await event_service.vote(event_id, field)
+    except EventNotFoundError as e:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+@router.post("/{event_id}/like", response_model=CounterResponse)
+async def like_event(event_id: int, current_user=Depends(get_current_user), db: AsyncSession = Depends(get_read_db)):
+    return await vote_event(event_id, "likes", db)
+
+@router.post("/{event_id}/dislike", response_model=CounterResponse)
+async def dislike_event(event_id: int, current_user=Depends(get_current_user), db: AsyncSession = Depends(get_read_db)):
+    return await vote_event(event_id, "dislikes", db)
@@ -0,0 +1,89 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, WebSocket, WebSocketDisconnect
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from features.auth.dependencies import get_current_user, get_websocket_user
+from features.messages.messenger import messenger
+from features.messages.repository import MessageRepository
+from features.messages.service import MessageService
+from features.messages.schemas import MessageResponse, ConversationSummaryResponse, ConversationReadResponse
+from features.messages.exceptions import ConversationNotFoundError
+from db.session import get_db
+from db.replicas import get_read_db
+
+router = APIRouter()
+
+@router.websocket("/ws")
+async def messages_socket(websocket: WebSocket):
+    """
+    Client frames: {"to": <user id>, "message": "...", "client_id": "..."}.
+    Server frames: {"type": "message", ...} for incoming messages, {"type": "ack", ...} or
+    {"type": "error", ...} in reply to each client frame.
+    """
+    try:
+        user = await get_websocket_user(websocket)
+    except HTTPException:
+        # 1008: policy violation
+        await websocket.close(code=1008)
+        return
+
+    connection = messenger.connections.add(websocket, user.id)
+    if connection is None:
+        await websocket.close(code=1013)
+        return
+    try:
+        await websocket.accept()
+        while True:
+            raw = await websocket.receive_text()
+            connection.send(await messenger.handle(user.id, raw))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        messenger.connections.remove(connection)
+
+@router.get("/conversations", response_model=list[ConversationSummaryResponse])
+async def get_inbox(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    current_user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    message_service = MessageService(MessageRepository(db))
+    try:
+        conversations, next_cursor = await message_service.get_inbox(current_user.id, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return conversations
+
+@router.get("/conversations/{conversation_id}", response_model=list[MessageResponse])
+async def get_messages(
+    conversation_id: int,
+    response: Response,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    current_user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    message_service = MessageService(MessageRepository(db))
+    try:
+        messages, older_cursor, newer_cursor = await message_service.get_messages(current_user.id, conversation_id, before, after, limit)
+    except ConversationNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.message)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if older_cursor is not None:
+        response.headers["X-Older-Cursor"] = older_cursor
+    if newer_cursor is not None:
+        response.headers["X-Newer-Cursor"] = newer_cursor
+    return messages
+
+@router.post("/conversations/{conversation_id}/read", response_model=ConversationReadResponse)
+async def mark_conversation_read(conversation_id: int, current_user=Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    message_service = MessageService(MessageRepository(db))
+    try:
+        return await message_service.mark_read(current_user.id, conversation_id)
+    except ConversationNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.message)
@@ -0,0 +1,63 @@
+from fastapi import APIRouter
+from utils.security import password_hash_pool
+from utils.tokens import access_tokens, refresh_tokens
+from features.auth.revocations import revocations
+from features.auth.login_attempts import login_attempt_buffer, login_throttle
+from features.counters.service import counters
+from features.notifications.fanout import notification_fanout
+from features.messages.messenger import messenger
+from features.trust.service import trust_scores
+from features.user.cache import user_cache
+from db.session import engine
+from db.replicas import read_router
+
+router = APIRouter()
+
+@router.get("/password-hasher")
+async def password_hasher_metrics():
+    return password_hash_pool.stats()
+
+@router.get("/token-cache")
+async def token_cache_metrics():
+    return {
+        "access": {"active_kid": access_tokens.key_ring.active.kid, **access_tokens.cache.stats()},
+        "refresh": {"active_kid": refresh_tokens.key_ring.active.kid, **refresh_tokens.cache.stats()},
+    }
+
+@router.get("/revocations")
+async def revocation_filter_metrics():
+    return revocations.stats()
+
+@router.get("/login-attempts")
+async def login_attempt_metrics():
+    return {"buffer": login_attempt_buffer.stats(), "throttle": login_throttle.stats()}
+
+@router.get("/counters")
+async def counter_metrics():
+    return counters.stats()
+
+@router.get("/notifications")
+async def notification_fanout_metrics():
+    return notification_fanout.stats()
+
+@router.get("/messages")
+async def messaging_metrics():
+    return messenger.stats()
+
+@router.get("/trust-scores")
+async def trust_score_metrics():
+    return trust_scores.stats()
+
+@router.get("/user-cache")
+async def user_cache_metrics():
+    return user_cache.stats()
+
+@router.get("/db-pool")
+async def db_pool_metrics():
+    return {
+        **engine.pool.wait_stats(),
+        "replicas": [
+            {"host": f"{replica.url.host}:{replica.url.port}", "healthy": read_router.is_healthy(replica), **replica.pool.wait_stats()}
+            for replica in read_router.replicas
+        ],
+    }
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from features.notifications.repository import NotificationRepository
+from features.notifications.service import NotificationService
+from features.notifications.schemas import NotificationResponse, NotificationJobResponse
+from features.notifications.exceptions import NotificationJobNotFoundError
+from features.auth.dependencies import get_current_user
+from db.session import get_db
+from db.replicas import get_read_db
+
+router = APIRouter()
+
+@router.get("/", response_model=list[NotificationResponse])
+async def get_notifications(
+    response: Response,
+    cursor: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=200),
+    current_user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    notification_service = NotificationService(NotificationRepository(db))
+    notifications, next_cursor = await notification_service.get_notifications(current_user.id, cursor, limit)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return notifications
+
+@router.get("/jobs/{job_id}", response_model=NotificationJobResponse)
+async def get_notification_job(job_id: int, current_user=Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    # read from the primary: progress is what the caller is polling for
+    notification_service = NotificationService(NotificationRepository(db))
+    try:
+        return await notification_service.get_job(job_id, current_user.id)
+    except NotificationJobNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.message)
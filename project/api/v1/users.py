@@ -1,9 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+import csv
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 from features.user.repository import UserRepository
 from features.user.service import UserService
-from features.user.schemas import UserCreate, UserResponse, UserUpdate
+from features.user.schemas import UserCreate, UserResponse, UserUpdate, BulkImportResult
+from features.user.bulk import UserBulkImporter, parse_rows, export_users_csv
 from db.session import get_db
+from db.replicas import get_read_db, read_router
+from utils.security import PasswordHasherBusyError
+from utils.responses import ModelResponse, cache_headers, etag_matches, not_modified
+from features.counters.schemas import CounterResponse
+from features.trust.repository import TrustRepository
+from features.trust.service import TrustService
+from features.trust.schemas import TrustScoreResponse
+from features.auth.dependencies import get_admin_user, get_current_user
 from features.user.exceptions import UserNotFoundError, UserExistsError, UserDeleteError, UserCreateError, UserUpdateError
 
 router = APIRouter()
@@ -18,28 +30,74 @@ async def create_user(user_data: UserCreate, db: AsyncSession = Depends(get_db))
     except UserCreateError as e:
         raise HTTPException(status_code=400, detail="User create error")
     except UserExistsError as e:
-        raise HTTPException(status_code=400, detail="User already exists")
+        raise HTTPException(status_code=400, detail=e.message)
+    except PasswordHasherBusyError as e:
+        raise HTTPException(status_code=503, detail="Server is busy, please retry", headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))            
 
+async def stream_users(cursor: Optional[int]):
+    # the request-scoped session is closed before a streaming body is sent, so use our own
+    async with await read_router.open_session() as db:
+        user_service = UserService(UserRepository(db))
+        async for chunk in user_service.stream_users(cursor):
+            yield chunk
+
 @router.get("/", response_model=list[UserResponse])
-async def get_users(db: AsyncSession = Depends(get_db)):
+async def get_users(
+    cursor: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    stream: bool = False,
+    db: AsyncSession = Depends(get_read_db),
+):
+    if stream:
+        return StreamingResponse(stream_users(cursor), media_type="application/x-ndjson")
+
     user_repo = UserRepository(db)
     user_service = UserService(user_repo)
     try:
-        users = await user_service.get_all_users()
-        return users
+        users, next_cursor = await user_service.get_users_page(cursor, limit)
+        headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else None
+        return ModelResponse(users, headers=headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/{identifier}", response_model=UserResponse)
-async def get_user(identifier: str, db: AsyncSession = Depends(get_db)):
+@router.post("/import", response_model=BulkImportResult)
+async def import_users(request: Request, current_user=Depends(get_admin_user), db: AsyncSession = Depends(get_db)):
+    # body is CSV with a header row (text/csv) or one JSON object per line (application/x-ndjson)
+    content = await request.body()
+    importer = UserBulkImporter(UserRepository(db))
+    try:
+        return await importer.import_rows(parse_rows(content, request.headers.get("content-type", "")))
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Unreadable import file: {e}")
+
+async def stream_users_csv():
+    async with await read_router.open_session() as db:
+        async for chunk in export_users_csv(UserRepository(db)):
+            yield chunk
+
+@router.get("/export")
+async def export_users(format: str = Query("csv", pattern="^(csv|ndjson)$"), current_user=Depends(get_admin_user)):
+    if format == "ndjson":
+        return StreamingResponse(stream_users(None), media_type="application/x-ndjson")
+    return StreamingResponse(
+        stream_users_csv(), media_type="text/csv", headers={"Content-Disposition": "attachment; filename=users.csv"}
+    )
+
+@router.get("/{identifier}", response_model=UserResponse, responses={304: {"description": "Not modified"}})
+async def get_user(identifier: str, if_none_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_read_db)):
     user_repo = UserRepository(db)
     user_service = UserService(user_repo)
     try:
         identifier = int(identifier) if identifier.isdigit() else identifier
-        user = await user_service.get_user(identifier)
-        return user
+        # a client that has the profile gets its answer from an index lookup, without the row or a body
+        if if_none_match:
+            etag = await user_service.get_user_etag(identifier)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+        user, etag = await user_service.get_user_with_etag(identifier)
+        return ModelResponse(user, headers=cache_headers(etag))
     except UserNotFoundError as e:
         raise HTTPException(status_code=404, detail="User not found")
     except Exception as e:
@@ -73,4 +131,30 @@ async def delete_user(identifier: str, db: AsyncSession = Depends(get_db)):
     except UserDeleteError as e:
         raise HTTPException(status_code=400, detail="User delete error")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def vote_user(identifier: str, field: str, db: AsyncSession) -> CounterResponse:
+    user_service = UserService(UserRepository(db))
+    try:
+        identifier = int(identifier) if identifier.isdigit() else identifier
+        return await user_service.vote(identifier, field)
+    except UserNotFoundError as e:
+        raise HTTPException(status_code=404, detail="User not found")
+
+@router.post("/{identifier}/like", response_model=CounterResponse)
+async def like_user(identifier: str, current_user=Depends(get_current_user), db: AsyncSession = Depends(get_read_db)):
+    return await vote_user(identifier, "likes", db)
+
+@router.post("/{identifier}/dislike", response_model=CounterResponse)
+async def dislike_user(identifier: str, current_user=Depends(get_current_user), db: AsyncSession = Depends(get_read_db)):
+    return await vote_user(identifier, "dislikes", db)
+
+@router.get("/{identifier}/trust", response_model=TrustScoreResponse)
+async def get_user_trust_score(identifier: str, db: AsyncSession = Depends(get_read_db)):
+    user_service = UserService(UserRepository(db))
+    try:
+        identifier = int(identifier) if identifier.isdigit() else identifier
+        user = await user_service.get_cached_user(identifier)
+    except UserNotFoundError as e:
+        raise HTTPException(status_code=404, detail="User not found")
+    return await TrustService(TrustRepository(db)).get_score(user.profile.id)
@@ -0,0 +1,70 @@
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIRST_PARTY = ("main", "api", "features", "db", "utils")
+# only needed by some requests or commands; importing them at startup is a regression
+LAZY_MODULES = ("httpx", "uvicorn", "numpy")
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
+
+def import_profile(module: str) -> list[tuple[str, int, int, int]]:
+    """(name, depth, self_us, cumulative_us) for every module imported by `import <module>`, in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        sys.exit(f"import {module} failed:\n{result.stderr[-2000:]}")
+    profile = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            profile.append((match.group(4), len(match.group(3)) // 2, int(match.group(1)), int(match.group(2))))
+    return profile
+
+def imported_under(profile: list, root: str) -> list:
+    # -X importtime prints children before their parent, so walk back from the root's line
+    end = next(i for i, entry in enumerate(profile) if entry[0] == root and entry[1] == 0)
+    start = end
+    while start > 0 and profile[start - 1][1] > 0:
+        start -= 1
+    return profile[start:end + 1]
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time of the app (python -X importtime), checked against a budget")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters; the median is reported")
+    parser.add_argument("--budget-ms", type=float, default=2000, help="fail when the median import takes longer")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    import_profile(args.module)  # writes the .pyc files so every measured run reads bytecode
+    runs = [imported_under(import_profile(args.module), args.module) for _ in range(args.runs)]
+    totals = [run[-1][3] / 1000 for run in runs]
+    median_run = sorted(runs, key=lambda run: run[-1][3])[len(runs) // 2]
+    total = statistics.median(totals)
+
+    print(f"import {args.module}: median {total:.0f}ms over {args.runs} runs (min {min(totals):.0f}ms, max {max(totals):.0f}ms)")
+    print("\nslowest modules by own time (median run):")
+    for name, _, self_us, cumulative_us in sorted(median_run, key=lambda entry: -entry[2])[:args.top]:
+        print(f"  {self_us / 1000:8.1f}ms self {cumulative_us / 1000:8.1f}ms total  {name}")
+    first_party = sum(self_us for name, _, self_us, _ in median_run if name.split(".")[0] in FIRST_PARTY)
+    print(f"\nfirst-party modules ({', '.join(FIRST_PARTY)}): {first_party / 1000:.0f}ms of own time")
+
+    failures = []
+    eager = sorted({name for name, *_ in median_run if name.split(".")[0] in LAZY_MODULES and "." not in name})
+    if eager:
+        failures.append(f"{', '.join(eager)} imported at startup; import where they are used instead")
+    if total > args.budget_ms:
+        failures.append(f"median import time {total:.0f}ms is above the {args.budget_ms:.0f}ms budget")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
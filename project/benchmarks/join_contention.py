@@ -0,0 +1,111 @@
+import argparse
+import asyncio
+import sys
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+import httpx
+from sqlalchemy import func
+from sqlalchemy.future import select
+from db.session import SessionLocal, engine
+from db.models.users import User
+from db.models.events import Event, EventParticipant, Location
+from features.auth.service import access_token_claims
+from utils.security import create_access_token
+from benchmarks.loadgen import ScenarioResult
+from benchmarks.run import open_client
+from benchmarks.seed import seed_users
+
+async def create_event(organizer_id: int, capacity: int) -> int:
+    async with SessionLocal() as db:
+        location = Location(name="Bench court", address="1 Bench Rd", city="Benchville", created_by=organizer_id, updated_by=organizer_id)
+        db.add(location)
+        await db.flush()
+        start = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(days=1)
+        event = Event(
+            title="Join contention", organizer_id=organizer_id, location_id=location.id, city=location.city,
+            start_time=start, end_time=start + timedelta(hours=2), max_participants=capacity,
+            created_by=organizer_id, updated_by=organizer_id,
+        )
+        db.add(event)
+        await db.commit()
+        return event.id
+
+async def bench_users(count: int) -> list[User]:
+    async with SessionLocal() as db:
+        result = await db.execute(select(User).where(User.email.like("bench%@example.com")).order_by(User.id).limit(count))
+        return result.scalars().all()
+
+async def check_event(event_id: int) -> dict:
+    async with SessionLocal() as db:
+        event = await db.get(Event, event_id)
+        result = await db.execute(
+            select(EventParticipant.status, func.count())
+            .where(EventParticipant.event_id == event_id)
+            .group_by(EventParticipant.status)
+        )
+        return {"current_participants": event.current_participants, "max_participants": event.max_participants, **dict(result.all())}
+
+async def main():
+    parser = argparse.ArgumentParser(description="Concurrent joins on one event: checks for overbooking and reports latency")
+    parser.add_argument("--base-url", help="target a running server; default runs the app in-process")
+    parser.add_argument("--joins", type=int, default=1000, help="users joining at the same moment")
+    parser.add_argument("--capacity", type=int, default=100)
+    parser.add_argument("--max-p99-ms", type=float, default=5000, help="fail when p99 latency is above this")
+    args = parser.parse_args()
+
+    await seed_users(args.joins)
+    users = await bench_users(args.joins)
+    # tokens are minted directly; logging 1,000 users in would benchmark bcrypt instead
+    tokens = [create_access_token(access_token_claims(user)) for user in users]
+    event_id = await create_event(organizer_id=users[0].id, capacity=args.capacity)
+
+    result = ScenarioResult(name="join", concurrency=len(tokens))
+    statuses = Counter()
+    async with open_client(args.base_url, len(tokens)) as client:
+        start_gate = asyncio.Event()
+
+        async def join(token: str):
+            await start_gate.wait()
+            sent = perf_counter()
+            try:
+                response = await client.post(f"/api/v1/events/{event_id}/join", headers={"Authorization": f"Bearer {token}"})
+            except httpx.HTTPError:
+                result.errors += 1
+                return
+            if response.status_code == 200:
+                result.latencies.append(perf_counter() - sent)
+                statuses[response.json()["status"]] += 1
+            else:
+                result.errors += 1
+
+        tasks = [asyncio.create_task(join(token)) for token in tokens]
+        await asyncio.sleep(0.1)
+        started = perf_counter()
+        start_gate.set()
+        await asyncio.gather(*tasks)
+        result.duration = perf_counter() - started
+
+    state = await check_event(event_id)
+    await engine.dispose()
+
+    summary = result.summary()
+    print(f"joins={len(tokens)} capacity={args.capacity} " + "  ".join(f"{k}={v}" for k, v in summary.items()))
+    print(f"responses: {dict(statuses)}")
+    print(f"database:  {state}")
+
+    failures = []
+    if state["current_participants"] > state["max_participants"]:
+        failures.append("event is overbooked")
+    if state.get("approved", 0) != state["current_participants"]:
+        failures.append("approved participants do not match current_participants")
+    if statuses["approved"] != min(args.capacity, len(tokens) - result.errors):
+        failures.append("number of approved joins does not match the capacity")
+    if summary["p99_ms"] > args.max_p99_ms:
+        failures.append(f"p99 latency {summary['p99_ms']}ms is above {args.max_p99_ms}ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    asyncio.run(main())
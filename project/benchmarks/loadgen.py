@@ -0,0 +1,83 @@
+import asyncio
+import math
+from time import perf_counter
+from typing import Awaitable, Callable
+import httpx
+
+class ScenarioResult:
+    def __init__(self, name: str, concurrency: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.duration = 0.0
+        self.latencies: list[float] = []
+        self.errors = 0
+        self.throttled = 0
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies) + self.errors + self.throttled
+
+    @property
+    def rps(self) -> float:
+        return len(self.latencies) / self.duration if self.duration else 0.0
+
+    def percentile(self, p: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        index = max(0, math.ceil(p / 100 * len(ordered)) - 1)
+        return ordered[index]
+
+    def summary(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "throttled": self.throttled,
+            "rps": round(self.rps, 1),
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p95_ms": round(self.percentile(95) * 1000, 2),
+            "p99_ms": round(self.percentile(99) * 1000, 2),
+        }
+
+async def run_scenario(
+    name: str,
+    client: httpx.AsyncClient,
+    send: Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]],
+    concurrency: int,
+    duration: float,
+    warmup: float = 1.0,
+) -> ScenarioResult:
+    """
+    Closed-loop load: `concurrency` workers each send a request as soon as their previous one
+    finishes, for `duration` seconds after a `warmup` period whose samples are discarded.
+    `send(client, n)` gets a per-run sequence number so scenarios can vary their payload.
+    """
+    result = ScenarioResult(name=name, concurrency=concurrency)
+    counter = iter(range(10**9))
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+
+    async def worker():
+        while (now := loop.time()) < stop_at:
+            sent = perf_counter()
+            status = None
+            try:
+                response = await send(client, next(counter))
+                status = response.status_code
+            except httpx.HTTPError:
+                pass
+            elapsed = perf_counter() - sent
+            if now < measure_from:
+                continue
+            if status is not None and status < 400:
+                result.latencies.append(elapsed)
+            elif status == 429:
+                result.throttled += 1
+            else:
+                result.errors += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.duration = duration
+    return result
@@ -0,0 +1,147 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import uuid
+from contextlib import asynccontextmanager
+import httpx
+from benchmarks.loadgen import run_scenario
+from benchmarks.seed import seed_users, bench_email, BENCH_PASSWORD
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+def scenarios(seeded_users: int, refresh_tokens: list[str]):
+    run_id = uuid.uuid4().hex[:8]
+    # refresh tokens rotate: each works once, and replaying a spent one revokes its whole family.
+    # Every virtual user (worker task) holds one token and carries on with the one from each response.
+    spare_tokens = list(refresh_tokens)
+    held_tokens = {}
+
+    def own_token() -> str:
+        task = asyncio.current_task()
+        if task not in held_tokens:
+            # the workers of a finished concurrency level hand their tokens on
+            for finished in [worker for worker in held_tokens if worker.done()]:
+                spare_tokens.append(held_tokens.pop(finished))
+            if not spare_tokens:
+                raise RuntimeError("Fewer refresh tokens than virtual users")
+            held_tokens[task] = spare_tokens.pop()
+        return held_tokens[task]
+
+    async def login(client, n):
+        email = bench_email(random.randrange(seeded_users))
+        return await client.post("/api/v1/auth/login", json={"email": email, "password": BENCH_PASSWORD})
+
+    async def signup(client, n):
+        return await client.post("/api/v1/auth/signup", json={"email": f"signup-{run_id}-{n}@example.com", "password": BENCH_PASSWORD})
+
+    async def refresh_token(client, n):
+        # the cookie is Secure, so it is sent by hand rather than through the client's cookie jar
+        response = await client.post("/api/v1/auth/refresh-token", headers={"Cookie": f"refresh_token={own_token()}"})
+        new_token = response.cookies.get("refresh_token")
+        if new_token:
+            held_tokens[asyncio.current_task()] = new_token
+        return response
+
+    async def list_users(client, n):
+        return await client.get("/api/v1/users/", params={"limit": 100})
+
+    return {"login": login, "signup": signup, "refresh-token": refresh_token, "users": list_users}
+
+THROTTLE_HINT = "logins are rate limited per client IP; run the server (or this script, in-process) with LOGIN_RATE_LIMIT_PER_IP=0"
+
+async def collect_refresh_tokens(client: httpx.AsyncClient, count: int) -> list[str]:
+    tokens = []
+    for n in range(count):
+        response = await client.post("/api/v1/auth/login", json={"email": bench_email(n), "password": BENCH_PASSWORD})
+        if response.status_code == 429:
+            raise RuntimeError(f"Login {n + 1} of {count} was throttled: {THROTTLE_HINT}")
+        token = response.cookies.get("refresh_token")
+        if token:
+            tokens.append(token)
+    if not tokens:
+        raise RuntimeError("Could not log in any seeded user; is the database seeded?")
+    return tokens
+
+@asynccontextmanager
+async def open_client(base_url: str | None, concurrency: int):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    if base_url:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+            yield client
+        return
+
+    # in-process: same event loop as the app, useful for quick comparisons, not absolute numbers
+    from main import app
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits, timeout=30) as client:
+            yield client
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous:
+            continue
+        if current["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append(f"{key}: rps {previous['rps']} -> {current['rps']}")
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{key}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+    return regressions
+
+async def main():
+    parser = argparse.ArgumentParser(description="Load test the auth and user APIs")
+    parser.add_argument("--base-url", help="target a running server; default runs the app in-process")
+    parser.add_argument("--endpoints", default="login,signup,refresh-token,users")
+    parser.add_argument("--concurrency", default="1,10,50", help="comma separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per endpoint and level")
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--users", type=int, default=10000, help="seeded users")
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative drop in rps / rise in p95")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        await seed_users(args.users)
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    endpoints = args.endpoints.split(",")
+    results = {}
+    async with open_client(args.base_url, max(levels)) as client:
+        # one token per virtual user at the highest concurrency level
+        refresh_tokens = await collect_refresh_tokens(client, min(max(levels), args.users)) if "refresh-token" in endpoints else []
+        available = scenarios(args.users, refresh_tokens)
+        for name in endpoints:
+            for concurrency in levels:
+                result = await run_scenario(name, client, available[name], concurrency, args.duration, args.warmup)
+                key = f"{name}@{concurrency}"
+                results[key] = result.summary()
+                print(f"{key:<24} " + "  ".join(f"{k}={v}" for k, v in results[key].items()), flush=True)
+
+    throttled = sum(result["throttled"] for result in results.values())
+    if throttled:
+        print(f"WARNING: {throttled} requests were answered 429 and left out of rps and latencies; {THROTTLE_HINT}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("Regressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("No regressions against baseline")
+
+if __name__ == "__main__":
+    asyncio.run(main())
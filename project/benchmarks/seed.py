@@ -0,0 +1,50 @@
+import argparse
+import asyncio
+from sqlalchemy import text
+from db.session import Base, engine, SessionLocal
+from db.models import users  # noqa: F401  (registers the tables)
+from features.user.repository import UserRepository
+from features.user.bulk import USER_COPY_COLUMNS
+from utils.security import hash_password
+
+BENCH_PASSWORD = "bench-password"
+
+def bench_email(n: int) -> str:
+    return f"bench{n}@example.com"
+
+async def seed_users(count: int, reset: bool = False):
+    """
+    Creates the tables and loads `count` users sharing one password hash, so seeding
+    100k users takes seconds instead of 100k bcrypt rounds.
+    """
+    async with engine.begin() as conn:
+        if reset:
+            await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with SessionLocal() as db:
+        existing = (await db.execute(text("SELECT count(*) FROM users WHERE email LIKE 'bench%@example.com'"))).scalar()
+        if existing >= count:
+            return
+
+        user_repo = UserRepository(db)
+        hashed_password = hash_password(BENCH_PASSWORD)
+        numbers = range(existing, count)
+        user_ids = await user_repo.reserve_user_ids(len(numbers))
+        rows = [
+            (user_id, f"bench{n}", bench_email(n), None, None, "user", "active", False, False, 0, 0, 0)
+            for user_id, n in zip(user_ids, numbers)
+        ]
+        await user_repo.copy_users_and_auth(rows, [(user_id, hashed_password) for user_id in user_ids], USER_COPY_COLUMNS)
+        await db.commit()
+
+async def main():
+    parser = argparse.ArgumentParser(description="Seed the benchmark database")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+    args = parser.parse_args()
+    await seed_users(args.users, args.reset)
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from pydantic import EmailStr
+from db.models.users import User
+from features.user.schemas import UserResponse
+from features.user.service import USER_FIELDS, validate_user_rows
+from utils.responses import ModelResponse
+
+class LegacyUserResponse(UserResponse):
+    # the response model before validated-once serialization: every email read back went through email-validator
+    email: EmailStr
+
+def make_rows(count: int) -> list[tuple]:
+    return [
+        (i, f"user{i}", f"user{i}@example.com", "First", None if i % 2 else "Last", "user", None)
+        for i in range(1, count + 1)
+    ]
+
+async def legacy_path(users: list[User]) -> tuple[bytes, dict]:
+    """What GET /api/v1/users did: model_validate per ORM object, then FastAPI's response_model pass and json.dumps."""
+    field = create_model_field("Response_get_users", list[LegacyUserResponse], mode="serialization")
+    started = time.perf_counter()
+    validated = [LegacyUserResponse.model_validate(user) for user in users]
+    validate_done = time.perf_counter()
+    content = await serialize_response(field=field, response_content=validated)
+    body = JSONResponse(content).body
+    done = time.perf_counter()
+    return body, {"validate": validate_done - started, "serialize": done - validate_done}
+
+async def current_path(rows: list[tuple]) -> tuple[bytes, dict]:
+    """Column tuples validated once as a list, then written by pydantic-core."""
+    started = time.perf_counter()
+    validated = validate_user_rows(rows)
+    validate_done = time.perf_counter()
+    body = ModelResponse(validated).body
+    done = time.perf_counter()
+    return body, {"validate": validate_done - started, "serialize": done - validate_done}
+
+async def measure(path, data, runs: int) -> tuple[bytes, dict]:
+    await path(data)  # builds the validators and serializers
+    results = [await path(data) for _ in range(runs)]
+    body = results[0][0]
+    return body, {stage: statistics.median(timings[stage] for _, timings in results) for stage in results[0][1]}
+
+async def main():
+    parser = argparse.ArgumentParser(description="Per-row cost of validating and serializing a user list response")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=5, help="the median of the runs is reported")
+    parser.add_argument("--max-us-per-row", type=float, default=20, help="fail when the current path is slower than this")
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    users = [User(**dict(zip(USER_FIELDS, row))) for row in rows]
+    legacy_body, legacy = await measure(legacy_path, users, args.runs)
+    current_body, current = await measure(current_path, rows, args.runs)
+
+    print(f"{args.rows} rows, median of {args.runs} runs, microseconds per row:")
+    print(f"  {'':32s} {'validate':>9s} {'serialize':>10s} {'total':>8s}")
+    for label, timings in (("ORM + response_model + json", legacy), ("tuples + TypeAdapter + pydantic", current)):
+        total = sum(timings.values())
+        print(f"  {label:32s} {timings['validate'] / args.rows * 1e6:9.2f} "
+              f"{timings['serialize'] / args.rows * 1e6:10.2f} {total / args.rows * 1e6:8.2f}")
+    current_us = sum(current.values()) / args.rows * 1e6
+    print(f"\n{sum(legacy.values()) / sum(current.values()):.1f}x faster; body {len(current_body)} bytes")
+
+    failures = []
+    # same documents; only the encoders' whitespace differs
+    if json.loads(legacy_body) != json.loads(current_body):
+        failures.append("the two paths produce different JSON")
+    if current_us > args.max_us_per_row:
+        failures.append(f"{current_us:.2f}us per row is above the {args.max_us_per_row:.2f}us budget")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+import argparse
+import asyncio
+import sys
+from sqlalchemy import text
+from db.session import SessionLocal, engine
+from db.models import events, login_attempts, trust  # noqa: F401  (registers the tables)
+from features.trust.recompute import recompute_all
+from benchmarks.seed import seed_users
+
+async def seed_activity(users: int):
+    """
+    Gives the bench users a history to score: an event per 10 users (some finished, some
+    cancelled), ~5 approved participations and a successful login per user, with activity
+    spread over the last year so decay has something to do.
+    """
+    async with SessionLocal() as db:
+        if (await db.execute(text("SELECT count(*) FROM events WHERE title = 'trust bench'"))).scalar():
+            return
+        bench_ids = "SELECT id FROM users WHERE email LIKE 'bench%@example.com'"
+        await db.execute(text(f"""
+            INSERT INTO locations (name, address, city, status, created_by, updated_by)
+            SELECT 'Bench court', '1 Bench Rd', 'Benchville', 'active', min(id), min(id) FROM ({bench_ids}) u
+        """))
+        await db.execute(text(f"""
+            INSERT INTO events (title, organizer_id, location_id, city, start_time, end_time, max_participants,
+                                current_participants, status, created_at, created_by, updated_by)
+            SELECT 'trust bench', u.id, (SELECT max(id) FROM locations), 'Benchville',
+                   now() - (u.id % 365) * interval '1 day', now() - (u.id % 365) * interval '1 day' + interval '2 hours',
+                   10, u.id % 11 - (u.id % 11) / 11, CASE WHEN u.id % 7 = 0 THEN 'cancelled' ELSE 'active' END,
+                   now() - (u.id % 365) * interval '1 day', u.id, u.id
+            FROM ({bench_ids}) u WHERE u.id % 10 = 0
+        """))
+        await db.execute(text(f"""
+            INSERT INTO event_participants (event_id, participant_id, status, joined_at)
+            SELECT DISTINCT e.id, u.id, 'approved', now() - (u.id % 400) * interval '1 day'
+            FROM ({bench_ids}) u
+            CROSS JOIN generate_series(1, 5) g
+            JOIN events e ON e.id = (SELECT min(id) FROM events WHERE title = 'trust bench') + (u.id * 7 + g * 13) % {max(users // 10, 1)}
+        """))
+        await db.execute(text(f"""
+            INSERT INTO login_attempts (user_id, identifier, ip_address, status, login_time)
+            SELECT u.id, 'bench', '127.0.0.1', 'success', now() - (u.id % 500) * interval '1 day' FROM ({bench_ids}) u
+        """))
+        await db.execute(text("""
+            UPDATE users SET likes = id % 13, dislikes = id % 3 * (id % 5), created_at = now() - (id % 700) * interval '1 day'
+            WHERE email LIKE 'bench%@example.com'
+        """))
+        await db.commit()
+
+async def main():
+    parser = argparse.ArgumentParser(description="Times the nightly trust score recompute over the whole user base")
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--max-seconds", type=float, default=30, help="fail when the recompute takes longer")
+    args = parser.parse_args()
+
+    await seed_users(args.users)
+    await seed_activity(args.users)
+    result = await recompute_all()
+    await engine.dispose()
+
+    total = result["extract_s"] + result["compute_s"] + result["write_s"]
+    print("  ".join(f"{k}={v}" for k, v in result.items()) + f"  total_s={total:.3f}")
+    if total > args.max_seconds:
+        print(f"FAIL: recompute took {total:.1f}s, more than {args.max_seconds}s")
+    sys.exit(1 if total > args.max_seconds else 0)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,12 +1,28 @@
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from utils.config import settings
 
 DB_CONFIG = {
-    "host": os.getenv("DB_HOST", "localhost"),
-    "port": os.getenv("DB_PORT", "5432"),
-    "user": os.getenv("DB_USER", "postgres"),
-    "password": os.getenv("DB_PASSWORD", "password"),
-    "database": os.getenv("DB_NAME", "postgres"),
-}
\ No newline at end of file
+    "host": settings.db_host,
+    "port": settings.db_port,
+    "user": settings.db_user,
+    "password": settings.db_password,
+    "database": settings.db_name,
+}
+
+DB_POOL_CONFIG = {
+    "pool_size": settings.db_pool_size,
+    "max_overflow": settings.db_max_overflow,
+    "pool_timeout": settings.db_pool_timeout,
+    "pool_recycle": settings.db_pool_recycle,
+    "pool_pre_ping": settings.db_pool_pre_ping,
+    "statement_cache_size": settings.db_statement_cache_size,
+    # PgBouncer in transaction mode: disables prepared statement caching
+    "pgbouncer": settings.db_pgbouncer,
+}
+
+DB_READ_CONFIG = {
+    # comma separated "host[:port]" (same credentials and database as the primary) or full URLs
+    "replicas": settings.db_read_replicas,
+    "health_check_interval": settings.db_replica_health_check_seconds,
+    # after a client writes, its reads go to the primary for this many seconds (0 disables)
+    "read_your_writes_window": settings.db_read_your_writes_seconds,
+}
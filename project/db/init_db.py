@@ -1,5 +1,6 @@
 import asyncio
 from db.session import engine, Base
+from db.models import users, tokens, login_attempts, events, counters, notifications, messages, trust  # noqa: F401  (registers the tables)
 
 async def create_tables():
     async with engine.begin() as conn:
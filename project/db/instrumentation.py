@@ -0,0 +1,103 @@
+import json
+import logging
+import random
+from contextvars import ContextVar
+from time import perf_counter
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from utils.config import settings
+
+logger = logging.getLogger("db.queries")
+
+class RequestQueryStats:
+    __slots__ = ("count", "total_time", "slowest_time", "slowest_statement", "statement_counts")
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+        self.statement_counts = {}
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.total_time += duration
+        if duration > self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_statement = statement
+        self.statement_counts[statement] = self.statement_counts.get(statement, 0) + 1
+
+    def repeated_statements(self, threshold: int = settings.sql_n_plus_one_threshold) -> list[tuple[str, int]]:
+        return [(statement, count) for statement, count in self.statement_counts.items() if count >= threshold]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.total_time * 1000:.2f};desc="{self.count} queries"'
+
+current_query_stats: ContextVar[RequestQueryStats | None] = ContextVar("current_query_stats", default=None)
+
+def instrument_engine(engine: AsyncEngine):
+    """
+    Times every statement run on the engine and adds it to the current request's stats.
+    Outside a sampled request the hooks only do a context variable lookup.
+    """
+    # the start time lives on the statement's execution context, which goes away with it even when
+    # the statement fails; anything kept on the pooled connection would pile up
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and current_query_stats.get() is not None:
+            context._query_started = perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = current_query_stats.get()
+        started = getattr(context, "_query_started", None)
+        if stats is not None and started is not None:
+            stats.record(statement, perf_counter() - started)
+
+class QueryStatsMiddleware:
+    """
+    For sampled requests: collects query stats, adds a Server-Timing header and logs
+    one JSON line per request, flagging statements repeated often enough to look like N+1.
+    """
+    def __init__(self, app, sample_rate: float = settings.sql_instrumentation_sample_rate):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = current_query_stats.set(stats)
+        status = None
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", stats.server_timing().encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_query_stats.reset(token)
+            self._log(scope, status, stats)
+
+    def _log(self, scope, status, stats: RequestQueryStats):
+        repeated = stats.repeated_statements()
+        record = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status,
+            "query_count": stats.count,
+            "db_time_ms": round(stats.total_time * 1000, 2),
+            "slowest_query_ms": round(stats.slowest_time * 1000, 2),
+            "slowest_query": stats.slowest_statement[:500] if stats.slowest_statement else None,
+        }
+        if repeated:
+            record["n_plus_one"] = [{"statement": statement[:500], "count": count} for statement, count in repeated]
+            logger.warning(json.dumps(record))
+        elif stats.count:
+            logger.info(json.dumps(record))
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, BigInteger, SmallInteger, String
+from db.session import Base
+
+class CounterShard(Base):
+    """
+    Pending counter increments spread over `shard` rows per counter, so concurrent increments
+    to one popular user or event rarely wait on the same row lock.
+    Rolled up into the owning table's column periodically.
+    """
+    __tablename__ = "counter_shards"
+    entity = Column(String(20), primary_key=True)  # users, events
+    entity_id = Column(Integer, primary_key=True)
+    field = Column(String(20), primary_key=True)  # likes, dislikes
+    shard = Column(SmallInteger, primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
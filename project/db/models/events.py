@@ -0,0 +1,72 @@
+from sqlalchemy import Column, Integer, String, TIMESTAMP, ForeignKey, Text, Index, CheckConstraint
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from db.session import Base
+
+class Location(Base):
+    __tablename__ = "locations"
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(255), nullable=False)
+    address = Column(String(255), nullable=False)
+    city = Column(String(255), nullable=False, index=True)
+    information = Column(String(255))
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    updated_by = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    status = Column(String(10), default="active", nullable=False)  # active, inactive
+
+    events = relationship("Event", back_populates="location")
+
+
+class Event(Base):
+    __tablename__ = "events"
+    id = Column(Integer, primary_key=True, index=True)
+    title = Column(String(255), nullable=False)
+    description = Column(Text)
+    organizer_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    location_id = Column(Integer, ForeignKey("locations.id", ondelete="CASCADE"), nullable=False, index=True)
+    city = Column(String(255), nullable=False)  # copied from the location so listings filter on one table
+    start_time = Column(TIMESTAMP, nullable=False)
+    end_time = Column(TIMESTAMP, nullable=False)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    updated_by = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    current_participants = Column(Integer, default=0, server_default="0", nullable=False)
+    max_participants = Column(Integer, default=0, server_default="0", nullable=False)
+    status = Column(String(10), default="active", nullable=False)  # active, cancelled, completed, expired
+    tags = Column(ARRAY(String(50)), default=list, server_default="{}", nullable=False)
+    likes = Column(Integer, default=0, server_default="0", nullable=False)
+    dislikes = Column(Integer, default=0, server_default="0", nullable=False)
+
+    location = relationship("Location", back_populates="events")
+
+    __table_args__ = (
+        CheckConstraint("max_participants >= 0", name="chk_events_max_participants"),
+        CheckConstraint("current_participants >= 0", name="chk_events_current_participants"),
+        CheckConstraint("current_participants <= max_participants", name="chk_events_capacity"),
+        # listings filter on status (+ city) and page through (start_time, id) in order
+        Index("ix_events_status_start_time", "status", "start_time", "id"),
+        Index("ix_events_city_status_start_time", "city", "status", "start_time", "id"),
+        # tags @> ARRAY[...]
+        Index("ix_events_tags", "tags", postgresql_using="gin"),
+    )
+
+
+class EventParticipant(Base):
+    __tablename__ = "event_participants"
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), primary_key=True)
+    participant_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, index=True)
+    joined_at = Column(TIMESTAMP, server_default=func.now())
+    status = Column(String(10), default="pending", nullable=False)  # pending, approved, rejected, waiting, cancelled
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+    updated_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
+
+    __table_args__ = (
+        # next in line for a freed seat
+        Index("ix_event_participants_waitlist", "event_id", "joined_at", postgresql_where=status == "waiting"),
+    )
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, TIMESTAMP, ForeignKey
+from sqlalchemy.sql import func
+from db.session import Base
+
+class LoginAttempt(Base):
+    __tablename__ = "login_attempts"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True)  # null when no account matched
+    identifier = Column(String(255), nullable=False)  # email or username as submitted
+    ip_address = Column(String(50), nullable=False)
+    user_agent = Column(String(255))
+    status = Column(String(10), nullable=False)  # success, failed, throttled
+    login_time = Column(TIMESTAMP, server_default=func.now(), nullable=False)
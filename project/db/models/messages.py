@@ -0,0 +1,54 @@
+from sqlalchemy import Column, Integer, BigInteger, Text, Boolean, TIMESTAMP, ForeignKey, Index, CheckConstraint, UniqueConstraint
+from sqlalchemy.sql import func
+from db.session import Base
+
+class Conversation(Base):
+    """One row per pair of users who have messaged, keyed by (user_a, user_b) with user_a < user_b."""
+    __tablename__ = "conversations"
+    id = Column(Integer, primary_key=True, index=True)
+    user_a = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    user_b = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("user_a", "user_b", name="uq_conversations_users"),
+        CheckConstraint("user_a < user_b", name="chk_conversations_canonical"),
+    )
+
+
+class UserMessage(Base):
+    __tablename__ = "user_messages"
+    id = Column(BigInteger, primary_key=True)
+    conversation_id = Column(Integer, ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False)
+    sender_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    receiver_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    message = Column(Text, nullable=False)
+    is_read = Column(Boolean, default=False, server_default="false", nullable=False)
+    created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # history pages through (created_at, id) within a conversation, in either direction
+        Index("ix_user_messages_conversation_created_at", "conversation_id", "created_at", "id"),
+        Index("ix_user_messages_unread", "conversation_id", "receiver_id", postgresql_where=is_read.is_(False)),
+    )
+
+
+class ConversationSummary(Base):
+    """
+    A user's inbox entry for one conversation, kept up to date by the statement that writes messages,
+    so the inbox is a single index range scan instead of an aggregate over user_messages.
+    """
+    __tablename__ = "conversation_summaries"
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    conversation_id = Column(Integer, ForeignKey("conversations.id", ondelete="CASCADE"), primary_key=True)
+    other_user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    last_message_id = Column(BigInteger, nullable=False)
+    last_sender_id = Column(Integer, nullable=False)
+    last_message = Column(Text, nullable=False)  # preview, first 200 characters
+    last_message_at = Column(TIMESTAMP, nullable=False)
+    unread_count = Column(Integer, default=0, server_default="0", nullable=False)
+
+    __table_args__ = (
+        CheckConstraint("unread_count >= 0", name="chk_conversation_summaries_unread"),
+        Index("ix_conversation_summaries_inbox", "user_id", "last_message_at", "conversation_id"),
+    )
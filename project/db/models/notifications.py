@@ -0,0 +1,47 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Boolean, TIMESTAMP, ForeignKey, Index
+from sqlalchemy.sql import func
+from db.session import Base
+
+class NotificationJob(Base):
+    """
+    An event-level change waiting to be fanned out to the event's participants. Written in the
+    same transaction as the change; `last_participant_id` records how far the fan-out got, so a job
+    taken over after a crash carries on without notifying anyone twice.
+    """
+    __tablename__ = "notification_jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=False, index=True)
+    type = Column(String(50), nullable=False)  # event_status_changed, event_updated
+    message = Column(Text, nullable=False)
+    status = Column(String(10), default="pending", nullable=False)  # pending, running, completed, failed
+    total_recipients = Column(Integer)
+    notified = Column(Integer, default=0, server_default="0", nullable=False)
+    last_participant_id = Column(Integer, default=0, server_default="0", nullable=False)
+    attempts = Column(Integer, default=0, server_default="0", nullable=False)
+    error = Column(String(255))
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+    finished_at = Column(TIMESTAMP)
+
+    __table_args__ = (
+        # the fan-out worker only ever looks for unfinished jobs
+        Index("ix_notification_jobs_unfinished", "id", postgresql_where=status.in_(("pending", "running"))),
+    )
+
+
+class UserNotification(Base):
+    __tablename__ = "user_notifications"
+    id = Column(BigInteger, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    type = Column(String(50), nullable=False)  # message, event_status_changed, event_updated, system
+    message = Column(Text)
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"))
+    job_id = Column(Integer, ForeignKey("notification_jobs.id", ondelete="SET NULL"))
+    is_read = Column(Boolean, default=False, server_default="false", nullable=False)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+    __table_args__ = (
+        # a user's notifications, newest first
+        Index("ix_user_notifications_user_id_id", "user_id", "id"),
+    )
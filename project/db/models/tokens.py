@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, TIMESTAMP, ForeignKey
+from sqlalchemy.sql import func
+from db.session import Base
+
+class UserToken(Base):
+    """
+    One row per issued refresh token. Rotation sets `revoked_at` and `replaced_by` on the old row;
+    a family (every token descended from one login) is revoked by setting `revoked_at` with no `replaced_by`.
+    """
+    __tablename__ = "user_tokens"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    jti = Column(String(64), unique=True, nullable=False)
+    family_id = Column(String(64), nullable=False, index=True)
+    expires_at = Column(TIMESTAMP, nullable=False)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    revoked_at = Column(TIMESTAMP, nullable=True, index=True)
+    replaced_by = Column(String(64), nullable=True)
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, Float, String, TIMESTAMP, ForeignKey
+from sqlalchemy.sql import func
+from db.session import Base
+
+class UserTrustScore(Base):
+    """
+    Materialized trust score with the per-user aggregates it is computed from. The counters and
+    score move incrementally as activity comes in; the nightly recompute rebuilds them from the
+    source tables, adds tenure and the hosting success rate, and applies inactivity decay.
+    """
+    __tablename__ = "user_trust_scores"
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    score = Column(Float, default=0, server_default="0", nullable=False)
+    level = Column(String(20), default="basic", server_default="basic", nullable=False)  # basic, trusted, high, organizer
+    participations = Column(Integer, default=0, server_default="0", nullable=False)
+    hosted_events = Column(Integer, default=0, server_default="0", nullable=False)
+    successful_events = Column(Integer, default=0, server_default="0", nullable=False)
+    cancelled_events = Column(Integer, default=0, server_default="0", nullable=False)
+    likes_received = Column(Integer, default=0, server_default="0", nullable=False)
+    dislikes_received = Column(Integer, default=0, server_default="0", nullable=False)
+    reports = Column(Integer, default=0, server_default="0", nullable=False)
+    last_active_at = Column(TIMESTAMP)
+    recomputed_at = Column(TIMESTAMP)
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
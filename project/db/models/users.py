@@ -26,6 +26,7 @@ class User(Base):
     dislikes = Column(Integer, default=0)
 
     status = Column(String(50), default="active")
+    token_epoch = Column(Integer, default=0, server_default="0", nullable=False)  # bumped to revoke issued tokens
 
     auth = relationship("UserAuth", back_populates="user", uselist=False)
     oauth_providers = relationship("UserAuthProvider", back_populates="user")
@@ -0,0 +1,19 @@
+from db.config import DB_CONFIG
+from utils.pubsub import PgPubSub, LocalPubSub
+from utils.config import settings
+
+def create_pubsub():
+    if settings.pubsub_backend == "local":
+        return LocalPubSub()
+    if settings.pubsub_backend != "postgres":
+        raise ValueError(f"Unknown PUBSUB_BACKEND: {settings.pubsub_backend}")
+    connect_kwargs = {
+        "host": DB_CONFIG["host"],
+        "port": int(DB_CONFIG["port"]),
+        "user": DB_CONFIG["user"],
+        "password": DB_CONFIG["password"],
+        "database": DB_CONFIG["database"],
+    }
+    return PgPubSub(connect_kwargs, settings.pubsub_reconnect_seconds)
+
+pubsub = create_pubsub()
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import time
+from fastapi import Request
+from sqlalchemy import exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncEngine
+from sqlalchemy.orm import sessionmaker
+from db.config import DB_READ_CONFIG
+from db.session import engine, create_engine, DATABASE_URL, SessionLocal
+
+READ_YOUR_WRITES_COOKIE = "netstep_rw"
+
+logger = logging.getLogger(__name__)
+
+def replica_url(replica: str):
+    if "://" in replica:
+        return make_url(replica)
+    host, _, port = replica.partition(":")
+    return DATABASE_URL.set(host=host, port=int(port) if port else DATABASE_URL.port)
+
+class ReadReplicaRouter:
+    """
+    Hands out read sessions round-robin over the healthy replicas, falling back to the primary.
+    A replica that fails to connect is taken out of rotation until a health check reaches it again.
+    """
+    def __init__(self, primary: AsyncEngine, replicas: list[AsyncEngine], health_check_interval: float):
+        self.primary = primary
+        self.replicas = replicas
+        self.health_check_interval = health_check_interval
+        self._session_factories = {primary: SessionLocal}
+        for replica in replicas:
+            self._session_factories[replica] = sessionmaker(replica, expire_on_commit=False, class_=AsyncSession)
+        self._down = set()
+        self._next = 0
+        self._task = None
+
+    def choose(self) -> AsyncEngine:
+        healthy = [replica for replica in self.replicas if replica not in self._down]
+        if not healthy:
+            return self.primary
+        self._next = (self._next + 1) % len(healthy)
+        return healthy[self._next]
+
+    def is_healthy(self, replica: AsyncEngine) -> bool:
+        return replica not in self._down
+
+    def session(self, bind: AsyncEngine) -> AsyncSession:
+        return self._session_factories[bind]()
+
+    def mark_down(self, replica: AsyncEngine):
+        if replica is not self.primary and replica not in self._down:
+            logger.warning(f"Read replica {replica.url.host}:{replica.url.port} is down, routing around it")
+            self._down.add(replica)
+
+    async def open_session(self, use_primary: bool = False) -> AsyncSession:
+        bind = self.primary if use_primary else self.choose()
+        session = self.session(bind)
+        if bind is self.primary:
+            return session
+
+        # check out a connection now so a dead replica fails over before any query runs
+        try:
+            await session.connection()
+            return session
+        except (OSError, exc.DBAPIError):
+            await session.close()
+            self.mark_down(bind)
+            return self.session(self.primary)
+
+    async def check_health(self):
+        for replica in self.replicas:
+            try:
+                async with replica.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+                self._down.discard(replica)
+            except (OSError, exc.DBAPIError):
+                self.mark_down(replica)
+
+    async def _check_periodically(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            await self.check_health()
+
+    def start(self):
+        if self.replicas:
+            self._task = asyncio.create_task(self._check_periodically())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for replica in self.replicas:
+            await replica.dispose()
+
+read_router = ReadReplicaRouter(
+    engine,
+    [create_engine(replica_url(replica)) for replica in DB_READ_CONFIG["replicas"]],
+    DB_READ_CONFIG["health_check_interval"],
+)
+
+def wants_primary(request: Request) -> bool:
+    written_until = request.cookies.get(READ_YOUR_WRITES_COOKIE)
+    return bool(written_until) and written_until.isdigit() and int(written_until) > time.time()
+
+# Dependency
+async def get_read_db(request: Request):
+    session = await read_router.open_session(use_primary=wants_primary(request))
+    async with session:
+        yield session
+
+# write only auth bookkeeping (login attempts, revoked tokens) that no replica-served read looks at
+NO_READ_YOUR_WRITES_PATHS = ("/api/v1/auth/login", "/api/v1/auth/refresh-token", "/api/v1/auth/logout")
+
+class ReadYourWritesMiddleware:
+    """
+    After a successful write, sets a short-lived cookie that pins the client's reads
+    to the primary, so it never reads its own change from a lagging replica.
+    Requests to `exempt_paths` do not set it, so logging in does not take a client off the replicas.
+    """
+    def __init__(self, app, window: int = DB_READ_CONFIG["read_your_writes_window"], exempt_paths=NO_READ_YOUR_WRITES_PATHS):
+        self.app = app
+        self.window = window
+        self.exempt_paths = frozenset(path.rstrip("/") for path in exempt_paths)
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or self.window <= 0
+            or scope["method"] in ("GET", "HEAD", "OPTIONS")
+            or scope["path"].rstrip("/") in self.exempt_paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = f"{READ_YOUR_WRITES_COOKIE}={int(time.time()) + self.window}; Max-Age={self.window}; Path=/; HttpOnly; SameSite=Lax"
+                message["headers"] = list(message.get("headers", [])) + [(b"set-cookie", cookie.encode())]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
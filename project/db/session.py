@@ -1,13 +1,94 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+import logging
+from time import perf_counter
+from uuid import uuid4
+from sqlalchemy import exc
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncEngine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm import declarative_base
-from db.config import DB_CONFIG
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from db.config import DB_CONFIG, DB_POOL_CONFIG
+from db.instrumentation import instrument_engine
 
-DATABASE_URL = f"postgresql+asyncpg://{DB_CONFIG['user']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
+DATABASE_URL = URL.create(
+    "postgresql+asyncpg",
+    username=DB_CONFIG["user"],
+    password=DB_CONFIG["password"],
+    host=DB_CONFIG["host"],
+    port=int(DB_CONFIG["port"]),
+    database=DB_CONFIG["database"],
+)
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long each checkout waited (including pre-ping and
+    any new connection it had to open), so pool_size/max_overflow can be tuned.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def connect(self):
+        start = perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            wait = perf_counter() - start
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def wait_stats(self) -> dict:
+        return {
+            "pool_size": self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": self.overflow(),
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+        }
+
+# SQLAlchemy only quiets loggers under "sqlalchemy."; keep this pool's logger at the same level
+logging.getLogger(f"{TimedAsyncQueuePool.__module__}.{TimedAsyncQueuePool.__name__}").setLevel(logging.WARNING)
+
+def create_engine(url: URL = DATABASE_URL, pool_config: dict = DB_POOL_CONFIG) -> AsyncEngine:
+    if pool_config["pgbouncer"]:
+        # PgBouncer (transaction mode) may run each transaction on a different server
+        # connection, so prepared statements can be neither cached nor reused by name
+        url = url.update_query_dict({"prepared_statement_cache_size": "0"})
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    else:
+        url = url.update_query_dict({"prepared_statement_cache_size": str(pool_config["statement_cache_size"])})
+        connect_args = {"statement_cache_size": pool_config["statement_cache_size"]}
+
+    engine = create_async_engine(
+        url,
+        echo=False,
+        poolclass=TimedAsyncQueuePool,
+        pool_size=pool_config["pool_size"],
+        max_overflow=pool_config["max_overflow"],
+        pool_timeout=pool_config["pool_timeout"],
+        pool_recycle=pool_config["pool_recycle"],
+        pool_pre_ping=pool_config["pool_pre_ping"],
+        connect_args=connect_args,
+    )
+    instrument_engine(engine)
+    return engine
 
 # SQLAlchemy Base and Engine
 Base = declarative_base()
-engine = create_async_engine(DATABASE_URL, echo=False, pool_size=5, max_overflow=10)
+engine = create_engine()
 
 # create a session class
 SessionLocal = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
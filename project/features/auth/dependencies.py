@@ -1,19 +1,65 @@
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, WebSocket
 from fastapi.security import OAuth2PasswordBearer
-from core.security import decode_access_token
+from pydantic import ValidationError
+from utils.security import decode_access_token
+from utils.config import settings
 from features.user.repository import UserRepository
-from db.session import get_db
+from features.auth.schemas import CurrentUser
+from features.auth.token_epochs import token_epochs
+from features.auth.revocations import revocations
+from db.session import get_db, SessionLocal
 from sqlalchemy.ext.asyncio import AsyncSession
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+async def get_current_user_from_db(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
     try:
         payload = decode_access_token(token)
         user_repo = UserRepository(db)
-        user = await user_repo.get_user_by_email(payload.get("email"))
-        if not user:
+        user = await user_repo.get_user_by_email(payload.get("email") or payload.get("sub"))
+        if not user or user.status != "active" or payload.get("epoch", 0) < (user.token_epoch or 0):
+            raise HTTPException(status_code=401, detail="Invalid token")
+        if payload.get("fam") and await revocations.is_family_revoked(payload["fam"]):
             raise HTTPException(status_code=401, detail="Invalid token")
         return user
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid token")
+
+async def get_current_user_from_claims(token: str = Depends(oauth2_scheme)) -> CurrentUser:
+    # trusts the signed claims; revocation comes from the in-memory token epoch table
+    try:
+        payload = decode_access_token(token)
+        user = CurrentUser.model_validate(payload)
+    except (ValueError, ValidationError):
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    if user.status != "active" or not token_epochs.is_current(user.id, payload.get("epoch", 0)):
+        raise HTTPException(status_code=401, detail="Invalid token")
+    # logged-out sessions; a bloom filter miss answers without a query
+    if payload.get("fam") and await revocations.is_family_revoked(payload["fam"]):
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return user
+
+get_current_user = get_current_user_from_claims if settings.auth_claims_only else get_current_user_from_db
+
+async def get_admin_user(current_user=Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin only")
+    return current_user
+
+async def get_websocket_user(websocket: WebSocket):
+    """
+    Authenticates a WebSocket handshake. Browsers can not set headers on one, so the token may also
+    come as ?token=. The session is only held for the check, not for the life of the connection;
+    the token is not checked again while the connection stays open.
+    """
+    token = websocket.query_params.get("token")
+    authorization = websocket.headers.get("authorization", "")
+    if not token and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if settings.auth_claims_only:
+        return await get_current_user_from_claims(token)
+    async with SessionLocal() as db:
+        return await get_current_user_from_db(token, db)
@@ -2,4 +2,16 @@
 class InvalidCredentialsError(Exception):
     def __init__(self, message: str = "Invalid credentials"):
         self.message = message
-        super().__init__(self.message)
\ No newline at end of file
+        super().__init__(self.message)
+
+class InvalidRefreshTokenError(Exception):
+    def __init__(self, message: str = "Invalid refresh token"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class TooManyLoginAttemptsError(Exception):
+    def __init__(self, retry_after: int, message: str = "Too many login attempts"):
+        self.retry_after = retry_after
+        self.message = message
+        super().__init__(self.message)
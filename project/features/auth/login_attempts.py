@@ -0,0 +1,50 @@
+import math
+from db.session import SessionLocal
+from features.auth.exceptions import TooManyLoginAttemptsError
+from features.auth.repository import LoginAttemptRepository
+from features.auth.revocations import utc_now
+from utils.rate_limit import SlidingWindowLimiter
+from utils.write_behind import WriteBehindBuffer
+from utils.config import settings
+
+async def write_login_attempts(rows: list[tuple]):
+    async with SessionLocal() as db:
+        await LoginAttemptRepository(db).insert_login_attempts(rows)
+
+login_attempt_buffer = WriteBehindBuffer(
+    "login_attempts", write_login_attempts, settings.login_attempt_batch_size, settings.login_attempt_flush_seconds, settings.login_attempt_max_pending
+)
+
+class LoginThrottle:
+    """
+    Per-worker login limits, checked before any password is verified:
+    every attempt counts against the client IP, failed attempts count against the account.
+    Each worker keeps its own counters, so the effective limit is per worker.
+    """
+    def __init__(self, ip_limiter: SlidingWindowLimiter, account_limiter: SlidingWindowLimiter):
+        self.ip_limiter = ip_limiter
+        self.account_limiter = account_limiter
+
+    def check(self, ip_address: str, identifier: str):
+        account_wait = self.account_limiter.retry_after(identifier.lower())
+        if account_wait > 0:
+            raise TooManyLoginAttemptsError(math.ceil(account_wait))
+        if not self.ip_limiter.hit(ip_address):
+            raise TooManyLoginAttemptsError(math.ceil(self.ip_limiter.retry_after(ip_address)))
+
+    def record_failure(self, identifier: str):
+        self.account_limiter.hit(identifier.lower())
+
+    def record_success(self, identifier: str):
+        self.account_limiter.reset(identifier.lower())
+
+    def stats(self) -> dict:
+        return {"ip": self.ip_limiter.stats(), "account": self.account_limiter.stats()}
+
+login_throttle = LoginThrottle(
+    SlidingWindowLimiter(settings.login_rate_limit_per_ip, settings.login_rate_limit_ip_window_seconds),
+    SlidingWindowLimiter(settings.login_rate_limit_per_account, settings.login_rate_limit_account_window_seconds),
+)
+
+def record_login_attempt(user_id: int | None, identifier: str, ip_address: str, user_agent: str | None, status: str):
+    login_attempt_buffer.add((user_id, identifier[:255], ip_address[:50], (user_agent or "")[:255] or None, status, utc_now()))
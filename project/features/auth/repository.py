@@ -0,0 +1,106 @@
+from datetime import datetime
+from sqlalchemy import Integer, String, TIMESTAMP, column, literal, update, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from db.models.tokens import UserToken
+from db.models.login_attempts import LoginAttempt
+from db.models.users import User
+
+class TokenRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create_refresh_token(self, user_id: int, jti: str, family_id: str, expires_at: datetime):
+        await self.db.execute(
+            insert(UserToken).values(user_id=user_id, jti=jti, family_id=family_id, expires_at=expires_at)
+        )
+        await self.db.commit()
+
+    async def rotate_refresh_token(self, jti: str, new_jti: str, expires_at: datetime, now: datetime) -> User | None:
+        """
+        Marks `jti` as replaced by `new_jti`, inserts the new token in the same family and returns
+        the owner, all in one statement. Returns None when `jti` is unknown, expired or already
+        revoked/rotated, which for a correctly signed token means it is being reused.
+        """
+        rotated = (
+            update(UserToken)
+            .where(UserToken.jti == jti, UserToken.revoked_at.is_(None), UserToken.expires_at > now)
+            .values(revoked_at=now, replaced_by=new_jti)
+            .returning(UserToken.user_id, UserToken.family_id)
+            .cte("rotated")
+        )
+        new_token = (
+            insert(UserToken)
+            .from_select(
+                ["user_id", "family_id", "jti", "expires_at"],
+                select(rotated.c.user_id, rotated.c.family_id, literal(new_jti), literal(expires_at)),
+            )
+            .returning(UserToken.id)
+            .cte("new_token")
+        )
+        query = select(User).join(rotated, rotated.c.user_id == User.id).add_cte(new_token)
+        result = await self.db.execute(query)
+        user = result.scalar_one_or_none()
+        await self.db.commit()
+        return user
+
+    async def revoke_family(self, family_id: str, now: datetime):
+        await self.db.execute(
+            update(UserToken)
+            .where(UserToken.family_id == family_id, UserToken.revoked_at.is_(None))
+            .values(revoked_at=now)
+        )
+        await self.db.commit()
+
+    async def is_token_revoked(self, jti: str) -> bool:
+        result = await self.db.execute(select(UserToken.revoked_at).where(UserToken.jti == jti))
+        row = result.first()
+        return row is None or row.revoked_at is not None
+
+    async def is_family_revoked(self, family_id: str) -> bool:
+        result = await self.db.execute(
+            select(UserToken.id)
+            .where(UserToken.family_id == family_id, UserToken.revoked_at.is_not(None), UserToken.replaced_by.is_(None))
+            .limit(1)
+        )
+        return result.first() is not None
+
+    async def get_revoked(self, now: datetime, since: datetime | None = None) -> list:
+        """
+        (jti, family_id, replaced_by) of unexpired revoked tokens, optionally only those revoked after `since`.
+        """
+        query = select(UserToken.jti, UserToken.family_id, UserToken.replaced_by).where(
+            UserToken.revoked_at.is_not(None), UserToken.expires_at > now
+        )
+        if since is not None:
+            query = query.where(UserToken.revoked_at >= since)
+        result = await self.db.execute(query)
+        return result.all()
+
+class LoginAttemptRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def insert_login_attempts(self, attempts: list[tuple]):
+        """
+        Writes a batch of (user_id, identifier, ip_address, user_agent, status, login_time) rows
+        in one multi-row INSERT ... SELECT and commits. A user_id whose account was deleted
+        before the batch was written is stored as NULL instead of failing the whole batch.
+        """
+        rows = values(
+            column("user_id", Integer),
+            column("identifier", String),
+            column("ip_address", String),
+            column("user_agent", String),
+            column("status", String),
+            column("login_time", TIMESTAMP),
+            name="attempts",
+        ).data(attempts)
+        query = insert(LoginAttempt).from_select(
+            ["user_id", "identifier", "ip_address", "user_agent", "status", "login_time"],
+            select(User.id, rows.c.identifier, rows.c.ip_address, rows.c.user_agent, rows.c.status, rows.c.login_time)
+            .select_from(rows.outerjoin(User, User.id == rows.c.user_id)),
+        )
+        await self.db.execute(query)
+        await self.db.commit()
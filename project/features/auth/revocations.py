@@ -0,0 +1,137 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from db.session import SessionLocal
+from features.auth.repository import TokenRepository
+from utils.bloom import BloomFilter
+from utils.config import settings
+
+# revocations are read back from a little before the last sync, to cover clock skew between workers
+SYNC_OVERLAP = timedelta(seconds=5)
+
+logger = logging.getLogger(__name__)
+
+def utc_now() -> datetime:
+    # user_tokens uses naive TIMESTAMP columns holding UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+class RevocationFilter:
+    """
+    Bloom filter over revoked refresh tokens ("j:<jti>") and revoked token families ("f:<family_id>").
+    A miss proves the token or family is not revoked, so the common case never queries Postgres;
+    a hit is confirmed against user_tokens before anything is rejected.
+    Revocations made by this worker are added immediately; other workers' are picked up every
+    `sync_interval` seconds, and the filter is rebuilt every `rebuild_interval` seconds
+    to drop expired tokens and resize.
+    """
+    def __init__(self, sync_interval: float, rebuild_interval: float, capacity: int, error_rate: float):
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._pending = None
+        self._synced_at = None
+        self._rebuilt_at = 0.0
+        self._task = None
+        self.checks = 0
+        self.positives = 0
+        self.confirmed = 0
+
+    def _add(self, item: str):
+        self._bloom.add(item)
+        if self._pending is not None:
+            self._pending.append(item)
+
+    def add_token(self, jti: str):
+        self._add(f"j:{jti}")
+
+    def add_family(self, family_id: str):
+        self._add(f"f:{family_id}")
+
+    def _add_rows(self, bloom: BloomFilter, rows):
+        for jti, family_id, replaced_by in rows:
+            bloom.add(f"j:{jti}")
+            if replaced_by is None:
+                bloom.add(f"f:{family_id}")
+
+    async def _confirm(self, item: str, check) -> bool:
+        self.checks += 1
+        if item not in self._bloom:
+            return False
+        self.positives += 1
+        async with SessionLocal() as db:
+            revoked = await check(TokenRepository(db))
+        if revoked:
+            self.confirmed += 1
+        return revoked
+
+    async def is_token_revoked(self, jti: str) -> bool:
+        return await self._confirm(f"j:{jti}", lambda repo: repo.is_token_revoked(jti))
+
+    async def is_family_revoked(self, family_id: str) -> bool:
+        return await self._confirm(f"f:{family_id}", lambda repo: repo.is_family_revoked(family_id))
+
+    async def rebuild(self):
+        now = utc_now()
+        self._pending = []
+        try:
+            async with SessionLocal() as db:
+                rows = await TokenRepository(db).get_revoked(now)
+            bloom = BloomFilter(max(self.capacity, len(rows) * 4), self.error_rate)
+            self._add_rows(bloom, rows)
+            # revocations made here while the query ran
+            bloom.update(self._pending)
+        finally:
+            self._pending = None
+        self._bloom = bloom
+        self._synced_at = now
+        self._rebuilt_at = asyncio.get_running_loop().time()
+
+    async def sync(self):
+        if self._synced_at is None:
+            # nothing was ever loaded (the initial build failed), so there is no point to sync from
+            await self.rebuild()
+            return
+        now = utc_now()
+        async with SessionLocal() as db:
+            rows = await TokenRepository(db).get_revoked(now, since=self._synced_at - SYNC_OVERLAP)
+        self._add_rows(self._bloom, rows)
+        self._synced_at = now
+
+    async def _sync_periodically(self):
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                if asyncio.get_running_loop().time() - self._rebuilt_at >= self.rebuild_interval:
+                    await self.rebuild()
+                else:
+                    await self.sync()
+            except Exception as e:
+                logger.warning(f"Revocation filter sync failed: {e}")
+
+    async def start(self):
+        try:
+            await self.rebuild()
+        except Exception as e:
+            # an empty filter is still safe for refresh rotation, which is enforced by the UPDATE itself
+            logger.warning(f"Initial revocation filter build failed: {e}")
+        self._task = asyncio.create_task(self._sync_periodically())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "items": len(self._bloom),
+            "capacity": self._bloom.capacity,
+            "bits": self._bloom.num_bits,
+            "hashes": self._bloom.num_hashes,
+            "checks": self.checks,
+            "positives": self.positives,
+            "confirmed": self.confirmed,
+        }
+
+revocations = RevocationFilter(settings.revocation_sync_seconds, settings.revocation_rebuild_seconds, settings.revocation_bloom_capacity, settings.revocation_bloom_error_rate)
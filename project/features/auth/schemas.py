@@ -18,4 +18,10 @@ class SignupRequest(BaseModel):
 
 class TokenResponse(BaseModel):
     token: str
-    token_type: str | None
\ No newline at end of file
+    token_type: str | None
+
+class CurrentUser(BaseModel):
+    id: int
+    email: str
+    role: str
+    status: str
\ No newline at end of file
@@ -1,71 +1,139 @@
-from db.models.users import User, UserAuth, UserAuthProvider
+import uuid
+from db.models.users import User, UserAuthProvider
 from features.user.repository import UserRepository
+from features.auth.repository import TokenRepository
+from features.auth.revocations import revocations, utc_now
+from features.auth.login_attempts import login_throttle, record_login_attempt
 from features.auth.schemas import SignupRequest, LoginRequest, TokenResponse
-from utils.security import hash_password, verify_password, create_access_token, create_refresh_token, decode_refresh_token
-from utils.oauth import OAuthProvider
+from utils.security import hash_password_async, verify_password_async, create_access_token, create_refresh_token, decode_refresh_token
+from utils.oauth import OAuthProvider, oauth_provider
+from utils.tokens import refresh_tokens
 from features.user.schemas import UserResponse
-from features.user.exceptions import UserCreateError, UserNotFoundError, UserExistsError
-from features.auth.exceptions import InvalidCredentialsError
+from features.user.exceptions import UserNotFoundError
+from features.user.service import duplicate_user_error
+from features.auth.exceptions import InvalidCredentialsError, InvalidRefreshTokenError, TooManyLoginAttemptsError
+
+def access_token_claims(user: User, family_id: str | None = None) -> dict:
+    claims = {
+        "sub": user.email,
+        "id": user.id,
+        "email": user.email,
+        "role": user.role,
+        "status": user.status,
+        "epoch": user.token_epoch or 0,
+    }
+    if family_id:
+        # ties the access token to its login session, so logout / reuse detection revokes it too
+        claims["fam"] = family_id
+    return claims
 
 class AuthService:
-    def __init__(self, user_repo: UserRepository):
+    def __init__(self, user_repo: UserRepository, oauth: OAuthProvider = oauth_provider):
         self.user_repo = user_repo
+        self.token_repo = TokenRepository(user_repo.db)
+        self.oauth = oauth
 
-    async def sign_up(self, data: SignupRequest) -> UserResponse:
-        # check if user already exists
-        existing_user = await self.user_repo.get_user_by_email(data.email)
-        if existing_user:
-            raise UserExistsError("User already exists")
+    async def issue_refresh_token(self, user: User, family_id: str | None = None) -> tuple[str, str]:
+        # returns (token, family_id); a new family starts at every login
+        jti, family_id = uuid.uuid4().hex, family_id or uuid.uuid4().hex
+        await self.token_repo.create_refresh_token(user.id, jti, family_id, utc_now() + refresh_tokens.default_ttl)
+        token = create_refresh_token(data={"sub": user.email, "jti": jti, "fam": family_id}, expires_delta=refresh_tokens.default_ttl)
+        return token, family_id
 
+    async def sign_up(self, data: SignupRequest) -> UserResponse:
         username = data.email.split("@")[0]
+        hashed_password = await hash_password_async(data.password)
 
-        # create new user and auth
-        new_user = await self.user_repo.create_user_and_auth(
-            User(username=username, email=data.email), UserAuth(password=hash_password(data.password))
-        )
+        # insert-or-conflict: no existence pre-check, and no race between check and insert
+        new_user = await self.user_repo.insert_user_with_auth(username, data.email, hashed_password)
 
         if not new_user:
-            raise UserCreateError("Failed to create user")
+            raise await duplicate_user_error(self.user_repo, data.email, username)
         
         return UserResponse.model_validate(new_user)
     
-    async def login_with_password(self, data: LoginRequest) -> TokenResponse:
+    async def login_with_password(self, data: LoginRequest, ip_address: str = "unknown", user_agent: str | None = None) -> TokenResponse:
+        identifier = data.email or data.username
+        try:
+            # rejected before any bcrypt work is spent on the attempt
+            login_throttle.check(ip_address, identifier)
+        except TooManyLoginAttemptsError:
+            record_login_attempt(None, identifier, ip_address, user_agent, "throttled")
+            raise
+
         if data.email:
-            user = await self.user_repo.get_user_by_email(data.email)
+            user = await self.user_repo.get_user_with_auth(email=data.email)
         else:
-            user = await self.user_repo.get_user_by_username(data.username)
+            user = await self.user_repo.get_user_with_auth(username=data.username)
 
         if not user:
+            login_throttle.record_failure(identifier)
+            record_login_attempt(None, identifier, ip_address, user_agent, "failed")
             raise UserNotFoundError("User not found")
 
-        user_auth = await self.user_repo.get_user_auth_by_user_id(user.id)
-
-        if not verify_password(data.password, user_auth.password):
+        if not await verify_password_async(data.password, user.auth.password):
+            login_throttle.record_failure(identifier)
+            record_login_attempt(user.id, identifier, ip_address, user_agent, "failed")
             raise InvalidCredentialsError("Invalid credentials")
 
-        access_token = create_access_token(data={"sub": user.email})
-        refresh_token = create_refresh_token(data={"sub": user.email})
+        login_throttle.record_success(identifier)
+        record_login_attempt(user.id, identifier, ip_address, user_agent, "success")
+
+        refresh_token, family_id = await self.issue_refresh_token(user)
+        access_token = create_access_token(data=access_token_claims(user, family_id))
 
         return [TokenResponse(token=access_token, token_type="bearer"), TokenResponse(token=refresh_token, token_type=None)]
     
-    async def refresh_token(self, refresh_token: str) -> TokenResponse:
+    async def refresh_token(self, refresh_token: str) -> list[TokenResponse]:
+        """
+        Rotates a refresh token: the presented token is retired and a new one in the same family is issued.
+        Presenting a retired token again means it leaked, so the whole family is revoked.
+        """
         payload = decode_refresh_token(refresh_token)
-        email = payload.get("sub")
+        jti, family_id = payload.get("jti"), payload.get("fam")
+        if not jti or not family_id:
+            # issued before rotation existed; the user has to log in again
+            raise InvalidRefreshTokenError()
+
+        # the bloom filter answers "not revoked" without a query; hits are confirmed in the DB
+        if await revocations.is_family_revoked(family_id):
+            raise InvalidRefreshTokenError("Refresh token has been revoked")
+        if await revocations.is_token_revoked(jti):
+            await self.revoke_family(family_id)
+            raise InvalidRefreshTokenError("Refresh token reuse detected")
+
+        new_jti = uuid.uuid4().hex
+        now = utc_now()
+        user = await self.token_repo.rotate_refresh_token(jti, new_jti, now + refresh_tokens.default_ttl, now)
+        if not user:
+            # lost a race with another rotation of the same token, or retired by another worker
+            await self.revoke_family(family_id)
+            raise InvalidRefreshTokenError("Refresh token reuse detected")
+        revocations.add_token(jti)
 
-        user = await self.user_repo.get_user_by_email(email)
+        if user.status != "active":
+            await self.revoke_family(family_id)
+            raise InvalidRefreshTokenError()
 
-        if not user:
-            raise UserNotFoundError("User not found")
+        new_refresh_token = create_refresh_token(data={"sub": user.email, "jti": new_jti, "fam": family_id}, expires_delta=refresh_tokens.default_ttl)
+        access_token = create_access_token(data=access_token_claims(user, family_id))
+        return [TokenResponse(token=access_token, token_type="bearer"), TokenResponse(token=new_refresh_token, token_type=None)]
+
+    async def revoke_family(self, family_id: str):
+        await self.token_repo.revoke_family(family_id, utc_now())
+        revocations.add_family(family_id)
 
-        access_token = create_access_token(data={"sub": user.email})
-        return TokenResponse(token=access_token, token_type="bearer")
+    async def logout(self, refresh_token: str):
+        payload = decode_refresh_token(refresh_token)
+        if payload.get("fam"):
+            await self.revoke_family(payload["fam"])
     
     async def login_with_oauth(self, provider: str, code: str) -> TokenResponse:
         # verify token
         if provider == "google":
-            user_info = OAuthProvider.verify_google_token(code)
+            user_info = await self.oauth.verify_google_token(code)
         elif provider == "line":
-            user_info = OAuthProvider.verify_line_token(code)
+            user_info = await self.oauth.verify_line_token(code)
         else:
             raise ValueError("Unsupported provider")
 
@@ -76,7 +144,7 @@ class AuthService:
 
         if oauth_user:
             return TokenResponse(
-                access_token=create_access_token({"id": oauth_user.id, "email": oauth_user.email}),
+                token=create_access_token(access_token_claims(oauth_user)),
                 token_type="bearer",
             )
 
@@ -89,7 +157,7 @@ class AuthService:
         )
 
         return TokenResponse(
-            access_token=create_access_token({"id": new_user.id, "email": new_user.email}),
+            token=create_access_token(access_token_claims(new_user)),
             token_type="bearer",
         )
     
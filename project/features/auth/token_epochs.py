@@ -0,0 +1,57 @@
+import asyncio
+import logging
+from sqlalchemy.future import select
+from db.session import SessionLocal
+from db.models.users import User
+from utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+class TokenEpochTable:
+    """
+    In-memory copy of users.token_epoch for every user whose epoch was ever bumped.
+    A token is revoked once its `epoch` claim is older than the user's current epoch.
+    Bumps made by this worker apply immediately; bumps made by other workers are
+    seen within `refresh_interval` seconds.
+    """
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self._epochs: dict[int, int] = {}
+        self._task = None
+
+    def is_current(self, user_id: int, epoch: int) -> bool:
+        return epoch >= self._epochs.get(user_id, 0)
+
+    def bump(self, user_id: int, epoch: int):
+        if epoch > self._epochs.get(user_id, 0):
+            self._epochs[user_id] = epoch
+
+    async def refresh(self):
+        async with SessionLocal() as db:
+            result = await db.execute(select(User.id, User.token_epoch).where(User.token_epoch > 0))
+            epochs = dict(result.all())
+
+        # epochs only ever grow, so keep local bumps the query may have missed
+        for user_id, epoch in self._epochs.items():
+            if epoch > epochs.get(user_id, 0):
+                epochs[user_id] = epoch
+        self._epochs = epochs
+
+    async def _refresh_periodically(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Token epoch refresh failed: {e}")
+
+    async def start(self):
+        await self.refresh()
+        self._task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+token_epochs = TokenEpochTable(settings.token_epoch_refresh_seconds)
@@ -0,0 +1,86 @@
+from sqlalchemy import Integer, String, bindparam, column, text, values, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.sql import func
+from db.models.counters import CounterShard
+from db.models.events import Event
+from db.models.users import User
+
+COUNTED_MODELS = {"users": User, "events": Event}
+COUNTED_FIELDS = ("likes", "dislikes")
+
+ADD_TO_SHARD = text("""
+    INSERT INTO counter_shards (entity, entity_id, field, shard, value)
+    VALUES (:entity, :entity_id, :field, :shard, :delta)
+    ON CONFLICT (entity, entity_id, field, shard) DO UPDATE SET value = counter_shards.value + EXCLUDED.value
+""").bindparams(
+    bindparam("entity", type_=String), bindparam("entity_id", type_=Integer), bindparam("field", type_=String),
+    bindparam("shard", type_=Integer), bindparam("delta", type_=Integer),
+)
+
+class CounterRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def apply_deltas(self, entity: str, rows: list[tuple[int, int, int]]):
+        """
+        Adds (id, likes, dislikes) deltas to many rows with one UPDATE ... FROM (VALUES ...).
+        Rows are sent in id order so concurrent flushes from several workers lock in the same order.
+        """
+        model = COUNTED_MODELS[entity]
+        deltas = values(
+            column("id", Integer), column("likes", Integer), column("dislikes", Integer), name="deltas"
+        ).data(sorted(rows))
+        await self.db.execute(
+            update(model)
+            .where(model.id == deltas.c.id)
+            .values(
+                likes=func.coalesce(model.likes, 0) + deltas.c.likes,
+                dislikes=func.coalesce(model.dislikes, 0) + deltas.c.dislikes,
+                # a vote is not an edit of the row
+                updated_at=model.updated_at,
+            )
+        )
+
+    async def add_to_shard(self, entity: str, entity_id: int, field: str, shard: int, delta: int = 1):
+        await self.db.execute(ADD_TO_SHARD, {"entity": entity, "entity_id": entity_id, "field": field, "shard": shard, "delta": delta})
+
+    async def roll_up_shards(self, entity: str) -> int:
+        """
+        Moves every shard row of `entity` into the owning table's columns in one statement
+        (DELETE ... RETURNING feeding an UPDATE). Returns the number of rows updated.
+        """
+        table = COUNTED_MODELS[entity].__tablename__
+        result = await self.db.execute(
+            text(f"""
+                WITH drained AS (
+                    DELETE FROM counter_shards WHERE entity = :entity
+                    RETURNING entity_id, field, value
+                ), totals AS (
+                    SELECT entity_id,
+                           coalesce(sum(value) FILTER (WHERE field = 'likes'), 0) AS likes,
+                           coalesce(sum(value) FILTER (WHERE field = 'dislikes'), 0) AS dislikes
+                    FROM drained GROUP BY entity_id
+                )
+                UPDATE {table}
+                SET likes = coalesce({table}.likes, 0) + totals.likes,
+                    dislikes = coalesce({table}.dislikes, 0) + totals.dislikes
+                FROM totals WHERE {table}.id = totals.entity_id
+            """),
+            {"entity": entity},
+        )
+        return result.rowcount
+
+    async def get_shard_totals(self, entity: str, entity_ids: list[int]) -> dict[int, dict[str, int]]:
+        result = await self.db.execute(
+            select(CounterShard.entity_id, CounterShard.field, func.sum(CounterShard.value))
+            .where(CounterShard.entity == entity, CounterShard.entity_id.in_(entity_ids))
+            .group_by(CounterShard.entity_id, CounterShard.field)
+        )
+        totals = {}
+        for entity_id, field, value in result.all():
+            totals.setdefault(entity_id, {})[field] = int(value)
+        return totals
+
+    async def commit(self):
+        await self.db.commit()
@@ -0,0 +1,5 @@
+from pydantic import BaseModel
+
+class CounterResponse(BaseModel):
+    likes: int
+    dislikes: int
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import random
+from db.session import SessionLocal
+from features.counters.repository import CounterRepository, COUNTED_MODELS, COUNTED_FIELDS
+from utils.counters import CounterBuffer
+from utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+async def write_counter_deltas(deltas: dict):
+    rows = {}
+    for (entity, entity_id), fields in deltas.items():
+        rows.setdefault(entity, []).append((entity_id, fields.get("likes", 0), fields.get("dislikes", 0)))
+    async with SessionLocal() as db:
+        counter_repo = CounterRepository(db)
+        for entity, entity_rows in rows.items():
+            await counter_repo.apply_deltas(entity, entity_rows)
+        await counter_repo.commit()
+
+class Counters:
+    """
+    Like/dislike counters of users and events, written in one of three modes (see COUNTER_MODE)
+    so that votes on a popular row do not all queue up on that row's lock.
+    Reads go through `totals`, which adds what has been counted but not yet written to the row.
+    """
+    def __init__(self, mode: str, flush_interval: float, max_pending_rows: int, shards: int):
+        if mode not in ("buffered", "sharded", "direct"):
+            raise ValueError(f"Unknown COUNTER_MODE: {mode}")
+        self.mode = mode
+        self.flush_interval = flush_interval
+        self.shards = shards
+        self.buffer = CounterBuffer(write_counter_deltas, flush_interval, max_pending_rows)
+        self._task = None
+        self.rollups = 0
+        self.rolled_up_rows = 0
+
+    async def incr(self, entity: str, entity_id: int, field: str, delta: int = 1):
+        if entity not in COUNTED_MODELS or field not in COUNTED_FIELDS:
+            raise ValueError(f"Unknown counter: {entity}.{field}")
+        if self.mode == "buffered":
+            self.buffer.incr(entity, entity_id, field, delta)
+            return
+        async with SessionLocal() as db:
+            counter_repo = CounterRepository(db)
+            if self.mode == "sharded":
+                await counter_repo.add_to_shard(entity, entity_id, field, random.randrange(self.shards), delta)
+            else:
+                await counter_repo.apply_deltas(entity, [(entity_id, delta if field == "likes" else 0, delta if field == "dislikes" else 0)])
+            await counter_repo.commit()
+
+    async def totals(self, entity: str, rows: list) -> dict[int, dict[str, int]]:
+        """
+        Near-real-time likes/dislikes for ORM rows (anything with id, likes and dislikes):
+        the stored values plus this worker's unflushed increments, or the not yet rolled up shards.
+        """
+        totals = {row.id: {field: getattr(row, field) or 0 for field in COUNTED_FIELDS} for row in rows}
+        if self.mode == "buffered":
+            for entity_id, fields in totals.items():
+                for field, delta in self.buffer.pending(entity, entity_id).items():
+                    fields[field] += delta
+        elif self.mode == "sharded" and totals:
+            async with SessionLocal() as db:
+                shard_totals = await CounterRepository(db).get_shard_totals(entity, list(totals))
+            for entity_id, fields in shard_totals.items():
+                for field, value in fields.items():
+                    totals[entity_id][field] += value
+        return totals
+
+    async def roll_up(self):
+        async with SessionLocal() as db:
+            counter_repo = CounterRepository(db)
+            for entity in COUNTED_MODELS:
+                self.rolled_up_rows += await counter_repo.roll_up_shards(entity)
+            await counter_repo.commit()
+        self.rollups += 1
+
+    async def _roll_up_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.roll_up()
+            except Exception as e:
+                logger.error(f"Counter shard roll-up failed: {e}")
+
+    def start(self):
+        if self.mode == "buffered":
+            self.buffer.start()
+        elif self.mode == "sharded":
+            self._task = asyncio.create_task(self._roll_up_periodically())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.buffer.stop()
+
+    def stats(self) -> dict:
+        stats = {"mode": self.mode, "flush_interval": self.flush_interval}
+        if self.mode == "buffered":
+            stats.update(self.buffer.stats())
+        elif self.mode == "sharded":
+            stats.update({"shards": self.shards, "rollups": self.rollups, "rolled_up_rows": self.rolled_up_rows})
+        return stats
+
+counters = Counters(settings.counter_mode, settings.counter_flush_seconds, settings.counter_max_pending_rows, settings.counter_shards)
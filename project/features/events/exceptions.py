@@ -0,0 +1,24 @@
+class EventNotFoundError(Exception):
+    def __init__(self, message: str = "Event not found"):
+        self.message = message
+        super().__init__(self.message)
+
+class LocationNotFoundError(Exception):
+    def __init__(self, message: str = "Location not found"):
+        self.message = message
+        super().__init__(self.message)
+
+class EventPermissionError(Exception):
+    def __init__(self, message: str = "Not allowed to modify this event"):
+        self.message = message
+        super().__init__(self.message)
+
+class EventJoinError(Exception):
+    def __init__(self, message: str = "Can not join this event"):
+        self.message = message
+        super().__init__(self.message)
+
+class NotParticipatingError(Exception):
+    def __init__(self, message: str = "Not participating in this event"):
+        self.message = message
+        super().__init__(self.message)
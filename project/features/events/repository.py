@@ -0,0 +1,210 @@
+from datetime import datetime
+from sqlalchemy import Integer, bindparam, func, text, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from db.models.events import Event, EventParticipant, Location
+from db.models.notifications import NotificationJob
+
+# a participant in one of these states holds a seat or a place in the queue
+ACTIVE_PARTICIPANT_STATUSES = ("pending", "approved", "waiting")
+
+# Runs on every join, so it is kept as text: SQLAlchemy does not cache the compiled form of
+# postgresql.insert() (ON CONFLICT) statements and rebuilding this one cost ~3ms per call.
+JOIN_EVENT = text("""
+    WITH seat AS (
+        UPDATE events
+        SET current_participants = current_participants + 1
+        WHERE id = :event_id AND status = 'active' AND current_participants < max_participants
+        RETURNING id
+    )
+    INSERT INTO event_participants (event_id, participant_id, status, created_by, updated_by)
+    SELECT :event_id, :user_id, CASE WHEN EXISTS (SELECT 1 FROM seat) THEN 'approved' ELSE 'waiting' END, :user_id, :user_id
+    WHERE EXISTS (SELECT 1 FROM events WHERE id = :event_id AND status = 'active')
+    ON CONFLICT (event_id, participant_id) DO UPDATE
+    SET status = EXCLUDED.status, joined_at = now(), updated_at = now(), updated_by = EXCLUDED.updated_by
+    WHERE event_participants.status NOT IN ('pending', 'approved', 'waiting')
+    RETURNING status
+""").bindparams(bindparam("event_id", type_=Integer), bindparam("user_id", type_=Integer))
+
+class EventRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_location(self, location_id: int) -> Location:
+        return await self.db.get(Location, location_id)
+
+    async def create_location(self, location: Location) -> Location:
+        self.db.add(location)
+        await self.db.commit()
+        await self.db.refresh(location)
+        return location
+
+    async def get_event(self, event_id: int) -> Event:
+        return await self.db.get(Event, event_id)
+
+    async def get_event_version(self, event_id: int):
+        # the columns an event's ETag is made of, by primary key
+        query = select(Event.id, Event.updated_at, Event.current_participants, Event.likes, Event.dislikes).where(Event.id == event_id)
+        result = await self.db.execute(query)
+        return result.one_or_none()
+
+    async def create_event(self, event: Event) -> Event:
+        self.db.add(event)
+        await self.db.commit()
+        await self.db.refresh(event)
+        return event
+
+    async def update_event(self, event: Event, notification_job: NotificationJob | None = None) -> Event | None:
+        """
+        Commits the changes made to `event`, and `notification_job` with them, so a change is never
+        left without its notifications. Returns None (after rolling back) when a join committed since
+        `event` was read leaves fewer seats than the new max_participants.
+        """
+        if notification_job is not None:
+            self.db.add(notification_job)
+        try:
+            await self.db.commit()
+        except IntegrityError as e:
+            await self.db.rollback()
+            if "chk_events_capacity" not in str(e.orig):
+                raise
+            return None
+        await self.db.refresh(event)
+        return event
+
+    async def refresh_event(self, event: Event) -> Event:
+        await self.db.refresh(event)
+        return event
+
+    async def join_event(self, event_id: int, user_id: int) -> str | None:
+        """
+        Takes a seat if one is free, otherwise a place on the waitlist, in one statement:
+        the seat is claimed by a conditional UPDATE (current < max), so concurrent joins can never
+        overbook, and the events row is locked only for that statement and the commit.
+        Returns "approved" or "waiting", or None (after rolling back) when the event is not active
+        or the user already holds a seat or a waitlist place.
+        """
+        # leaving and coming back (ON CONFLICT ... DO UPDATE) re-queues at the end
+        result = await self.db.execute(JOIN_EVENT, {"event_id": event_id, "user_id": user_id})
+        joined_status = result.scalar_one_or_none()
+        if joined_status is None:
+            # a seat may have been claimed for a join that did not happen
+            await self.db.rollback()
+            return None
+        await self.db.commit()
+        return joined_status
+
+    async def leave_event(self, event_id: int, user_id: int) -> tuple[str | None, list[int]]:
+        """
+        Cancels the user's participation and, if that freed a seat, gives it to the longest-waiting
+        user, in one transaction. Returns the previous status (None if the user was not participating)
+        and the ids of promoted users.
+        """
+        # lock first so a concurrent promotion of this row is seen before deciding whether a seat is freed
+        result = await self.db.execute(
+            select(EventParticipant.status)
+            .where(
+                EventParticipant.event_id == event_id,
+                EventParticipant.participant_id == user_id,
+                EventParticipant.status.in_(ACTIVE_PARTICIPANT_STATUSES),
+            )
+            .with_for_update()
+        )
+        previous_status = result.scalar_one_or_none()
+        if previous_status is None:
+            await self.db.rollback()
+            return None, []
+
+        await self.db.execute(
+            update(EventParticipant)
+            .where(EventParticipant.event_id == event_id, EventParticipant.participant_id == user_id)
+            .values(status="cancelled", updated_by=user_id)
+        )
+
+        promoted = []
+        if previous_status == "approved":
+            await self.db.execute(
+                update(Event)
+                .where(Event.id == event_id)
+                .values(current_participants=Event.current_participants - 1)
+            )
+            promoted = await self._promote_waitlist(event_id)
+        await self.db.commit()
+        return previous_status, promoted
+
+    async def promote_waitlist(self, event_id: int) -> list[int]:
+        promoted = await self._promote_waitlist(event_id)
+        await self.db.commit()
+        return promoted
+
+    async def _promote_waitlist(self, event_id: int) -> list[int]:
+        """
+        Moves as many waiting users as there are free seats to approved, oldest first.
+        Runs with the events row locked; waitlist rows locked by a concurrent leave are skipped
+        (SKIP LOCKED) rather than waited on.
+        """
+        result = await self.db.execute(
+            select(Event.max_participants - Event.current_participants)
+            .where(Event.id == event_id, Event.status == "active")
+            .with_for_update()
+        )
+        free_seats = result.scalar_one_or_none()
+        if not free_seats or free_seats <= 0:
+            return []
+
+        next_in_line = (
+            select(EventParticipant.participant_id)
+            .where(EventParticipant.event_id == event_id, EventParticipant.status == "waiting")
+            .order_by(EventParticipant.joined_at, EventParticipant.participant_id)
+            .limit(free_seats)
+            .with_for_update(skip_locked=True)
+            .cte("next_in_line")
+        )
+        promoted = (
+            update(EventParticipant)
+            .where(EventParticipant.event_id == event_id, EventParticipant.participant_id.in_(select(next_in_line.c.participant_id)))
+            .values(status="approved")
+            .returning(EventParticipant.participant_id)
+            .cte("promoted")
+        )
+        query = (
+            update(Event)
+            .where(Event.id == event_id)
+            .values(current_participants=Event.current_participants + select(func.count()).select_from(promoted).scalar_subquery())
+            .returning(select(func.array_agg(promoted.c.participant_id)).scalar_subquery())
+            # the count can not be evaluated in Python, and expiring a loaded event would make reading it
+            # lazy-load outside the greenlet; callers refresh the event when anyone was promoted
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.db.execute(query)
+        return result.scalar_one_or_none() or []
+
+    async def search_events(
+        self,
+        status: str = "active",
+        start_from: datetime | None = None,
+        start_to: datetime | None = None,
+        city: str | None = None,
+        tags: list[str] | None = None,
+        after: tuple[datetime, int] | None = None,
+        limit: int = 50,
+    ) -> list[Event]:
+        """
+        Events in (start_time, id) order. Equality filters on status/city plus the start_time range
+        map onto the composite btree indexes, tags use the GIN index (all given tags must match),
+        and `after` continues from the last (start_time, id) of the previous page.
+        """
+        query = select(Event).where(Event.status == status).order_by(Event.start_time, Event.id).limit(limit)
+        if start_from is not None:
+            query = query.where(Event.start_time >= start_from)
+        if start_to is not None:
+            query = query.where(Event.start_time < start_to)
+        if city:
+            query = query.where(Event.city == city)
+        if tags:
+            query = query.where(Event.tags.contains(tags))
+        if after is not None:
+            query = query.where(tuple_(Event.start_time, Event.id) > tuple_(*after))
+        result = await self.db.execute(query)
+        return result.scalars().all()
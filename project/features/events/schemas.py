@@ -0,0 +1,69 @@
+from datetime import datetime
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional
+
+class LocationCreate(BaseModel):
+    name: str
+    address: str
+    city: str
+    information: Optional[str] = None
+
+class LocationResponse(BaseModel):
+    id: int
+    name: str
+    address: str
+    city: str
+    information: Optional[str] = None
+    status: str
+
+    class Config:
+        from_attributes = True
+
+class EventCreate(BaseModel):
+    title: str
+    description: Optional[str] = None
+    location_id: int
+    start_time: datetime
+    end_time: datetime
+    max_participants: int = Field(0, ge=0)
+    tags: list[str] = []
+
+    @model_validator(mode="after")
+    def check_time_window(cls, values):
+        if values.end_time <= values.start_time:
+            raise ValueError("end_time must be after start_time")
+        return values
+
+class EventUpdate(BaseModel):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    location_id: Optional[int] = None
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    max_participants: Optional[int] = Field(None, ge=0)
+    status: Optional[str] = Field(None, pattern="^(active|cancelled|completed|expired)$")
+    tags: Optional[list[str]] = None
+
+class EventResponse(BaseModel):
+    id: int
+    title: str
+    description: Optional[str] = None
+    organizer_id: int
+    location_id: int
+    city: str
+    start_time: datetime
+    end_time: datetime
+    current_participants: int
+    max_participants: int
+    status: str
+    tags: list[str]
+    likes: int
+    dislikes: int
+
+    class Config:
+        from_attributes = True
+
+class ParticipationResponse(BaseModel):
+    event_id: int
+    status: str  # approved, waiting, cancelled
+    promoted: list[int] = []
@@ -0,0 +1,211 @@
+import base64
+from datetime import datetime, timezone
+from db.models.events import Event, Location
+from db.models.notifications import NotificationJob
+from features.events.repository import EventRepository
+from features.events.schemas import EventCreate, EventResponse, EventUpdate, LocationCreate, LocationResponse, ParticipationResponse
+from features.events.exceptions import EventNotFoundError, LocationNotFoundError, EventPermissionError, EventJoinError, NotParticipatingError
+from features.counters.schemas import CounterResponse
+from features.counters.service import counters
+from features.notifications.fanout import notification_fanout
+from features.trust.service import trust_scores
+from utils.responses import list_adapter, make_etag
+
+EVENT_FIELDS = list(EventResponse.model_fields.keys())
+
+CAPACITY_ERROR = "max_participants can not be lower than the number of approved participants"
+
+def to_utc_naive(value: datetime | None) -> datetime | None:
+    # event times are stored as naive UTC TIMESTAMPs
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def encode_cursor(event: Event) -> str:
+    return base64.urlsafe_b64encode(f"{event.start_time.isoformat()}|{event.id}".encode()).decode()
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        start_time, event_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(start_time), int(event_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def normalize_tags(tags: list[str] | None) -> list[str]:
+    return sorted({tag.strip().lower() for tag in tags or [] if tag.strip()})
+
+def event_etag(event, likes: int, dislikes: int) -> str:
+    # joins and votes change the response without touching updated_at, so their counts are part of the tag
+    return make_etag(EventResponse, event.id, event.updated_at, event.current_participants, likes, dislikes)
+
+def change_notification(event: Event, changed: set[str], user_id: int) -> NotificationJob | None:
+    # participants hear about status, time and place changes; edits to the text are not worth a notification
+    if "status" in changed:
+        type, message = "event_status_changed", f'"{event.title}" is now {event.status}'
+    elif changed & {"start_time", "end_time", "location_id"}:
+        type, message = "event_updated", f'"{event.title}" has a new time or place'
+    else:
+        return None
+    return NotificationJob(event_id=event.id, type=type, message=message, created_by=user_id)
+
+class EventService:
+    def __init__(self, event_repo: EventRepository):
+        self.event_repo = event_repo
+
+    async def create_location(self, user_id: int, data: LocationCreate) -> LocationResponse:
+        location = await self.event_repo.create_location(
+            Location(**data.model_dump(), created_by=user_id, updated_by=user_id)
+        )
+        return LocationResponse.model_validate(location)
+
+    async def get_location(self, location_id: int) -> LocationResponse:
+        location = await self.event_repo.get_location(location_id)
+        if not location:
+            raise LocationNotFoundError()
+        return LocationResponse.model_validate(location)
+
+    async def get_db_event(self, event_id: int) -> Event:
+        event = await self.event_repo.get_event(event_id)
+        if not event:
+            raise EventNotFoundError(f"Can not find event with id: {event_id}")
+        return event
+
+    async def with_counters(self, events: list[Event]) -> list[EventResponse]:
+        # likes/dislikes are written behind, so add what has been counted but not stored yet
+        totals = await counters.totals("events", events)
+        return list_adapter(EventResponse).validate_python(
+            [{field: getattr(event, field) for field in EVENT_FIELDS} | totals[event.id] for event in events]
+        )
+
+    async def get_event(self, event_id: int) -> EventResponse:
+        return (await self.with_counters([await self.get_db_event(event_id)]))[0]
+
+    async def get_event_etag(self, event_id: int) -> str:
+        version = await self.event_repo.get_event_version(event_id)
+        if not version:
+            raise EventNotFoundError(f"Can not find event with id: {event_id}")
+        totals = (await counters.totals("events", [version]))[event_id]
+        return event_etag(version, totals["likes"], totals["dislikes"])
+
+    async def get_event_with_etag(self, event_id: int) -> tuple[EventResponse, str]:
+        event = await self.get_db_event(event_id)
+        response = (await self.with_counters([event]))[0]
+        return response, event_etag(event, response.likes, response.dislikes)
+
+    async def vote(self, event_id: int, field: str) -> CounterResponse:
+        event = await self.get_db_event(event_id)
+        await counters.incr("events", event_id, field)
+        totals = await counters.totals("events", [event])
+        return CounterResponse(**totals[event_id])
+
+    async def create_event(self, organizer_id: int, data: EventCreate) -> EventResponse:
+        location = await self.event_repo.get_location(data.location_id)
+        if not location:
+            raise LocationNotFoundError()
+
+        event = Event(
+            **data.model_dump(exclude={"start_time", "end_time", "tags"}),
+            start_time=to_utc_naive(data.start_time),
+            end_time=to_utc_naive(data.end_time),
+            tags=normalize_tags(data.tags),
+            city=location.city,
+            organizer_id=organizer_id,
+            created_by=organizer_id,
+            updated_by=organizer_id,
+        )
+        event = await self.event_repo.create_event(event)
+        trust_scores.record(organizer_id, active=True, hosted_events=1)
+        return EventResponse.model_validate(event)
+
+    async def update_event(self, user_id: int, event_id: int, data: EventUpdate) -> tuple[EventResponse, int | None]:
+        """Returns the updated event and the id of the notification job it started, if any."""
+        event = await self.get_db_event(event_id)
+        if event.organizer_id != user_id:
+            raise EventPermissionError()
+
+        changes = data.model_dump(exclude_unset=True, exclude_none=True)
+        if "location_id" in changes and changes["location_id"] != event.location_id:
+            location = await self.event_repo.get_location(changes["location_id"])
+            if not location:
+                raise LocationNotFoundError()
+            event.city = location.city
+        for field in ("start_time", "end_time"):
+            if field in changes:
+                changes[field] = to_utc_naive(changes[field])
+        if "tags" in changes:
+            changes["tags"] = normalize_tags(changes["tags"])
+
+        changed = {field for field, value in changes.items() if getattr(event, field) != value}
+        previous_status = event.status
+        for field, value in changes.items():
+            setattr(event, field, value)
+        if event.end_time <= event.start_time:
+            raise ValueError("end_time must be after start_time")
+        if event.max_participants < event.current_participants:
+            raise ValueError(CAPACITY_ERROR)
+        event.updated_by = user_id
+
+        notification_job = change_notification(event, changed, user_id)
+        updated_event = await self.event_repo.update_event(event, notification_job)
+        if updated_event is None:
+            # the check above passed, but joins committed since
+            raise ValueError(CAPACITY_ERROR)
+        if "status" in changed and "cancelled" in (previous_status, event.status):
+            cancelled = 1 if event.status == "cancelled" else -1
+            trust_scores.record(user_id, active=True, hosted_events=-cancelled, cancelled_events=cancelled)
+        if notification_job is not None:
+            notification_fanout.wake()
+        if "max_participants" in changes:
+            # a larger capacity lets people off the waitlist
+            promoted = await self.event_repo.promote_waitlist(event_id)
+            for promoted_id in promoted:
+                trust_scores.record(promoted_id, participations=1)
+            if promoted:
+                updated_event = await self.event_repo.refresh_event(updated_event)
+        return EventResponse.model_validate(updated_event), notification_job.id if notification_job else None
+
+    async def join_event(self, event_id: int, user_id: int) -> ParticipationResponse:
+        status = await self.event_repo.join_event(event_id, user_id)
+        if status is None:
+            event = await self.get_db_event(event_id)
+            if event.status != "active":
+                raise EventJoinError(f"Event is {event.status}")
+            raise EventJoinError("Already joined this event")
+        trust_scores.record(user_id, active=True, participations=1 if status == "approved" else 0)
+        return ParticipationResponse(event_id=event_id, status=status)
+
+    async def leave_event(self, event_id: int, user_id: int) -> ParticipationResponse:
+        previous_status, promoted = await self.event_repo.leave_event(event_id, user_id)
+        if previous_status is None:
+            raise NotParticipatingError()
+        if previous_status == "approved":
+            trust_scores.record(user_id, participations=-1)
+        for promoted_id in promoted:
+            trust_scores.record(promoted_id, participations=1)
+        return ParticipationResponse(event_id=event_id, status="cancelled", promoted=promoted)
+
+    async def search_events(
+        self,
+        status: str = "active",
+        start_from: datetime | None = None,
+        start_to: datetime | None = None,
+        city: str | None = None,
+        tags: list[str] | None = None,
+        cursor: str | None = None,
+        limit: int = 50,
+    ) -> tuple[list[EventResponse], str | None]:
+        # without a window, list what has not started yet
+        if start_from is None and start_to is None:
+            start_from = datetime.now(timezone.utc)
+
+        events = await self.event_repo.search_events(
+            status=status,
+            start_from=to_utc_naive(start_from),
+            start_to=to_utc_naive(start_to),
+            city=city,
+            tags=normalize_tags(tags),
+            after=decode_cursor(cursor) if cursor else None,
+            limit=limit + 1,
+        )
+        next_cursor = encode_cursor(events[limit - 1]) if len(events) > limit else None
+        return await self.with_counters(events[:limit]), next_cursor
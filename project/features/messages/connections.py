@@ -0,0 +1,143 @@
+import asyncio
+import logging
+from collections import deque
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+# close code for a client that does not read its messages fast enough (RFC 6455 "try again later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+class Connection:
+    """
+    One open WebSocket. Outgoing frames wait in a queue of at most `max_queue` frames, drained by a
+    task that only exists while something is queued; an idle connection holds no queue and no task.
+    A client that lets the queue fill up is disconnected rather than slowing down whoever sends to it.
+    """
+    __slots__ = ("websocket", "user_id", "max_queue", "send_timeout", "closed", "_queue", "_task")
+
+    def __init__(self, websocket: WebSocket, user_id: int, max_queue: int, send_timeout: float):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.closed = False
+        self._queue = None
+        self._task = None
+
+    def send(self, frame: str) -> bool:
+        if self.closed:
+            return False
+        if self._queue is None:
+            self._queue = deque()
+        if len(self._queue) >= self.max_queue:
+            self.close(SLOW_CONSUMER_CLOSE_CODE)
+            return False
+        self._queue.append(frame)
+        if self._task is None:
+            self._task = asyncio.create_task(self._drain())
+        return True
+
+    async def _drain(self):
+        try:
+            while self._queue:
+                await asyncio.wait_for(self.websocket.send_text(self._queue[0]), timeout=self.send_timeout)
+                self._queue.popleft()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # send timed out or the client went away; the receive loop cleans up
+            self.closed = True
+        finally:
+            self._task = None
+            self._queue = None
+
+    def close(self, code: int):
+        if self.closed:
+            return
+        self.closed = True
+        if self._task is not None:
+            self._task.cancel()
+        self._task = asyncio.create_task(self._close(code))
+
+    def discard(self):
+        # the client is gone; drop whatever was still queued for it
+        self.closed = True
+        if self._task is not None:
+            self._task.cancel()
+        self._task = None
+        self._queue = None
+
+    async def _close(self, code: int):
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+        finally:
+            self._task = None
+            self._queue = None
+
+
+class ConnectionRegistry:
+    """
+    This worker's open WebSockets by user id. A user may be connected from several devices.
+    """
+    def __init__(self, max_connections: int, max_queue: int, send_timeout: float):
+        self.max_connections = max_connections
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self._users: dict[int, list[Connection]] = {}
+        self._count = 0
+        self.delivered = 0
+        self.slow_consumers = 0
+        self.rejected = 0
+
+    def add(self, websocket: WebSocket, user_id: int) -> Connection | None:
+        if self._count >= self.max_connections:
+            self.rejected += 1
+            return None
+        connection = Connection(websocket, user_id, self.max_queue, self.send_timeout)
+        self._users.setdefault(user_id, []).append(connection)
+        self._count += 1
+        return connection
+
+    def remove(self, connection: Connection):
+        connections = self._users.get(connection.user_id)
+        if connections and connection in connections:
+            connections.remove(connection)
+            self._count -= 1
+            if not connections:
+                del self._users[connection.user_id]
+        connection.discard()
+
+    def is_connected(self, user_id: int) -> bool:
+        return user_id in self._users
+
+    def deliver(self, user_id: int, frame: str) -> int:
+        delivered = 0
+        for connection in self._users.get(user_id, ()):
+            was_closed = connection.closed
+            if connection.send(frame):
+                delivered += 1
+            elif not was_closed:
+                self.slow_consumers += 1
+        self.delivered += delivered
+        return delivered
+
+    def close_all(self, code: int):
+        for connections in self._users.values():
+            for connection in connections:
+                connection.close(code)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def stats(self) -> dict:
+        return {
+            "connections": self._count,
+            "users": len(self._users),
+            "max_connections": self.max_connections,
+            "delivered": self.delivered,
+            "slow_consumers": self.slow_consumers,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,9 @@
+class MessageError(Exception):
+    def __init__(self, message: str = "Message could not be sent"):
+        self.message = message
+        super().__init__(self.message)
+
+class ConversationNotFoundError(Exception):
+    def __init__(self, message: str = "Conversation not found"):
+        self.message = message
+        super().__init__(self.message)
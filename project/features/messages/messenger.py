@@ -0,0 +1,128 @@
+import json
+import logging
+from collections import OrderedDict
+from uuid import uuid4
+from pydantic import ValidationError
+from db.session import SessionLocal
+from db.pubsub import pubsub
+from features.auth.revocations import utc_now
+from features.messages.connections import ConnectionRegistry
+from features.messages.exceptions import MessageError
+from features.messages.repository import MessageRepository
+from features.messages.schemas import MessageSend
+from utils.pubsub import MAX_PAYLOAD_BYTES
+from utils.write_behind import WriteBehindBuffer
+from utils.config import settings
+
+MESSAGE_CHANNEL = "user_messages"
+
+logger = logging.getLogger(__name__)
+
+async def write_messages(rows: list[tuple]):
+    async with SessionLocal() as db:
+        await MessageRepository(db).insert_messages(rows)
+
+class Messenger:
+    """
+    Private messages between users connected over WebSockets.
+    A message is delivered straight away to the recipient's connections on this worker and
+    published on `MESSAGE_CHANNEL` for the other workers (payload "<worker>|<recipient>|<frame>",
+    so a worker the recipient is not connected to drops it without parsing JSON).
+    Messages are written to user_messages in batches every MESSAGE_FLUSH_SECONDS; a message is
+    acknowledged once it is queued, so a crashed worker loses at most that much history
+    (it was already delivered to anyone online). A batch that fails to write is retried
+    MESSAGE_WRITE_RETRIES times, one flush apart, and then lost from history the same way.
+    """
+    def __init__(self, connections: ConnectionRegistry, buffer: WriteBehindBuffer, pubsub, known_users_cache_size: int):
+        self.connections = connections
+        self.buffer = buffer
+        self.pubsub = pubsub
+        self.worker_id = uuid4().hex[:12]
+        self.known_users_cache_size = known_users_cache_size
+        self._known_users = OrderedDict()
+        self.sent = 0
+        self.rejected = 0
+        pubsub.subscribe(MESSAGE_CHANNEL, self._on_published)
+
+    async def _recipient_exists(self, user_id: int) -> bool:
+        if user_id in self._known_users:
+            self._known_users.move_to_end(user_id)
+            return True
+        async with SessionLocal() as db:
+            if not await MessageRepository(db).user_exists(user_id):
+                return False
+        self._known_users[user_id] = True
+        if len(self._known_users) > self.known_users_cache_size:
+            self._known_users.popitem(last=False)
+        return True
+
+    async def send(self, sender_id: int, data: MessageSend) -> dict:
+        if data.to == sender_id:
+            raise MessageError("Can not send a message to yourself")
+        if self.buffer.is_full():
+            raise MessageError("Server is busy, please retry")
+        if not await self._recipient_exists(data.to):
+            raise MessageError("Recipient not found")
+
+        created_at = utc_now()
+        # not escaped to \uXXXX: NOTIFY payloads are UTF-8 and limited in bytes, six per escaped character
+        frame = json.dumps({
+            "type": "message", "from": sender_id, "to": data.to, "message": data.message, "created_at": created_at.isoformat(),
+        }, ensure_ascii=False)
+        payload = f"{self.worker_id}|{data.to}|{frame}"
+        if len(payload.encode()) > MAX_PAYLOAD_BYTES:
+            raise MessageError("Message is too long")
+        # published before anything else, so a message the other workers will not get is not acked
+        if not self.pubsub.publish(MESSAGE_CHANNEL, payload):
+            raise MessageError("Server is busy, please retry")
+        self.buffer.add((sender_id, data.to, data.message, created_at))
+        self.connections.deliver(data.to, frame)
+        self.sent += 1
+        return {"type": "ack", "client_id": data.client_id, "created_at": created_at.isoformat()}
+
+    async def handle(self, sender_id: int, raw: str) -> str:
+        """Handles one frame from a client and returns the reply frame (an ack or an error)."""
+        client_id = None
+        try:
+            data = MessageSend.model_validate_json(raw)
+            client_id = data.client_id
+            return json.dumps(await self.send(sender_id, data))
+        except ValidationError as e:
+            detail = "; ".join(error["msg"] for error in e.errors())
+        except MessageError as e:
+            detail = e.message
+        self.rejected += 1
+        return json.dumps({"type": "error", "client_id": client_id, "detail": detail})
+
+    def _on_published(self, payload: str):
+        worker_id, recipient, frame = payload.split("|", 2)
+        if worker_id == self.worker_id:
+            return
+        user_id = int(recipient)
+        if self.connections.is_connected(user_id):
+            self.connections.deliver(user_id, frame)
+
+    def start(self):
+        self.buffer.start()
+
+    async def stop(self):
+        # 1001: going away
+        self.connections.close_all(1001)
+        await self.buffer.stop()
+
+    def stats(self) -> dict:
+        return {
+            "sent": self.sent,
+            "rejected": self.rejected,
+            "connections": self.connections.stats(),
+            "buffer": self.buffer.stats(),
+            "pubsub": self.pubsub.stats(),
+        }
+
+messenger = Messenger(
+    ConnectionRegistry(settings.message_max_connections, settings.message_send_queue_size, settings.message_send_timeout_seconds),
+    WriteBehindBuffer("user_messages", write_messages, settings.message_batch_size, settings.message_flush_seconds,
+                      settings.message_max_pending, settings.message_write_retries),
+    pubsub,
+    settings.message_known_users_cache_size,
+)
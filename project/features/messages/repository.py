@@ -0,0 +1,137 @@
+from datetime import datetime
+from sqlalchemy import Integer, Text, TIMESTAMP, bindparam, text, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from db.models.messages import Conversation, ConversationSummary, UserMessage
+from db.models.users import User
+
+# Writes one batch of messages in one statement: finds or creates the conversation of every pair,
+# inserts the messages, and folds them into both users' conversation summaries (latest message,
+# unread count for the receiver). Arrays instead of a VALUES list keep the statement shape the
+# same whatever the batch size, so it is prepared once per connection. Rows are taken in a fixed
+# order so concurrent batches from several workers lock conversations and summaries in the same
+# order. Messages to or from an account deleted before the batch was written are dropped.
+INSERT_MESSAGES = text("""
+    WITH batch AS (
+        SELECT m.*, least(m.sender_id, m.receiver_id) AS user_a, greatest(m.sender_id, m.receiver_id) AS user_b
+        FROM unnest(:sender_ids, :receiver_ids, :messages, :created_ats) WITH ORDINALITY
+             AS m(sender_id, receiver_id, message, created_at, n)
+        WHERE EXISTS (SELECT 1 FROM users WHERE users.id = m.sender_id)
+          AND EXISTS (SELECT 1 FROM users WHERE users.id = m.receiver_id)
+    ), pairs AS (
+        INSERT INTO conversations (user_a, user_b)
+        SELECT DISTINCT user_a, user_b FROM batch ORDER BY user_a, user_b
+        ON CONFLICT (user_a, user_b) DO UPDATE SET user_a = EXCLUDED.user_a
+        RETURNING id, user_a, user_b
+    ), inserted AS (
+        INSERT INTO user_messages (conversation_id, sender_id, receiver_id, message, created_at)
+        SELECT pairs.id, batch.sender_id, batch.receiver_id, batch.message, batch.created_at
+        FROM batch JOIN pairs USING (user_a, user_b)
+        ORDER BY batch.n
+        RETURNING id, conversation_id, sender_id, receiver_id, message, created_at
+    ), per_user AS (
+        SELECT sender_id AS user_id, receiver_id AS other_user_id, 0 AS unread, * FROM inserted
+        UNION ALL
+        SELECT receiver_id AS user_id, sender_id AS other_user_id, 1 AS unread, * FROM inserted
+    ), latest AS (
+        SELECT DISTINCT ON (user_id, conversation_id)
+               user_id, conversation_id, other_user_id, id, sender_id, message, created_at,
+               sum(unread) OVER (PARTITION BY user_id, conversation_id) AS unread
+        FROM per_user
+        ORDER BY user_id, conversation_id, created_at DESC, id DESC
+    )
+    INSERT INTO conversation_summaries
+        (user_id, conversation_id, other_user_id, last_message_id, last_sender_id, last_message, last_message_at, unread_count)
+    SELECT user_id, conversation_id, other_user_id, id, sender_id, left(message, 200), created_at, unread
+    FROM latest
+    ORDER BY user_id, conversation_id
+    ON CONFLICT (user_id, conversation_id) DO UPDATE SET
+        unread_count = conversation_summaries.unread_count + EXCLUDED.unread_count,
+        -- batches from different workers may land out of order
+        last_message_id = CASE WHEN EXCLUDED.last_message_at >= conversation_summaries.last_message_at
+                               THEN EXCLUDED.last_message_id ELSE conversation_summaries.last_message_id END,
+        last_sender_id = CASE WHEN EXCLUDED.last_message_at >= conversation_summaries.last_message_at
+                              THEN EXCLUDED.last_sender_id ELSE conversation_summaries.last_sender_id END,
+        last_message = CASE WHEN EXCLUDED.last_message_at >= conversation_summaries.last_message_at
+                            THEN EXCLUDED.last_message ELSE conversation_summaries.last_message END,
+        last_message_at = greatest(EXCLUDED.last_message_at, conversation_summaries.last_message_at)
+""").bindparams(
+    bindparam("sender_ids", type_=ARRAY(Integer)), bindparam("receiver_ids", type_=ARRAY(Integer)),
+    bindparam("messages", type_=ARRAY(Text)), bindparam("created_ats", type_=ARRAY(TIMESTAMP)),
+)
+
+# Marks what the user has received in a conversation as read, and takes exactly that many off
+# the summary's unread count (a batch committing meanwhile keeps its own increment).
+MARK_READ = text("""
+    WITH marked AS (
+        UPDATE user_messages SET is_read = true
+        WHERE conversation_id = :conversation_id AND receiver_id = :user_id AND NOT is_read
+        RETURNING 1
+    )
+    UPDATE conversation_summaries
+    SET unread_count = greatest(unread_count - (SELECT count(*) FROM marked), 0)
+    WHERE user_id = :user_id AND conversation_id = :conversation_id
+    RETURNING unread_count
+""").bindparams(bindparam("conversation_id", type_=Integer), bindparam("user_id", type_=Integer))
+
+class MessageRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def insert_messages(self, messages: list[tuple]):
+        """Writes a batch of (sender_id, receiver_id, message, created_at) rows and commits."""
+        sender_ids, receiver_ids, texts, created_ats = (list(column) for column in zip(*messages))
+        await self.db.execute(INSERT_MESSAGES, {
+            "sender_ids": sender_ids, "receiver_ids": receiver_ids, "messages": texts, "created_ats": created_ats,
+        })
+        await self.db.commit()
+
+    async def user_exists(self, user_id: int) -> bool:
+        result = await self.db.execute(select(User.id).where(User.id == user_id, User.status == "active"))
+        return result.scalar_one_or_none() is not None
+
+    async def get_conversation(self, conversation_id: int) -> Conversation:
+        result = await self.db.execute(select(Conversation).where(Conversation.id == conversation_id))
+        return result.scalars().first()
+
+    async def get_messages(
+        self,
+        conversation_id: int,
+        before: tuple[datetime, int] | None = None,
+        after: tuple[datetime, int] | None = None,
+        limit: int = 50,
+    ) -> list[UserMessage]:
+        """
+        One page of a conversation on the (conversation_id, created_at, id) index: the newest
+        messages older than `before`, or the oldest messages newer than `after`.
+        Returned newest first when paging backwards, oldest first when paging forwards.
+        """
+        query = select(UserMessage).where(UserMessage.conversation_id == conversation_id).limit(limit)
+        if after is not None:
+            query = query.where(tuple_(UserMessage.created_at, UserMessage.id) > tuple_(*after))
+            query = query.order_by(UserMessage.created_at, UserMessage.id)
+        else:
+            if before is not None:
+                query = query.where(tuple_(UserMessage.created_at, UserMessage.id) < tuple_(*before))
+            query = query.order_by(UserMessage.created_at.desc(), UserMessage.id.desc())
+        result = await self.db.execute(query)
+        return result.scalars().all()
+
+    async def get_inbox(self, user_id: int, before: tuple[datetime, int] | None = None, limit: int = 50) -> list[ConversationSummary]:
+        query = (
+            select(ConversationSummary)
+            .where(ConversationSummary.user_id == user_id)
+            .order_by(ConversationSummary.last_message_at.desc(), ConversationSummary.conversation_id.desc())
+            .limit(limit)
+        )
+        if before is not None:
+            query = query.where(tuple_(ConversationSummary.last_message_at, ConversationSummary.conversation_id) < tuple_(*before))
+        result = await self.db.execute(query)
+        return result.scalars().all()
+
+    async def mark_read(self, conversation_id: int, user_id: int) -> int:
+        result = await self.db.execute(MARK_READ, {"conversation_id": conversation_id, "user_id": user_id})
+        unread = result.scalar_one_or_none()
+        await self.db.commit()
+        return unread or 0
@@ -0,0 +1,37 @@
+from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import Optional
+from utils.config import settings
+
+class MessageSend(BaseModel):
+    to: int
+    message: str = Field(min_length=1, max_length=settings.message_max_length)
+    client_id: Optional[str] = Field(None, max_length=64)  # echoed back in the ack
+
+class MessageResponse(BaseModel):
+    id: int
+    conversation_id: int
+    sender_id: int
+    receiver_id: int
+    message: str
+    is_read: bool
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ConversationSummaryResponse(BaseModel):
+    conversation_id: int
+    other_user_id: int
+    last_message_id: int
+    last_sender_id: int
+    last_message: str
+    last_message_at: datetime
+    unread_count: int
+
+    class Config:
+        from_attributes = True
+
+class ConversationReadResponse(BaseModel):
+    conversation_id: int
+    unread_count: int
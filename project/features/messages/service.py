@@ -0,0 +1,76 @@
+import base64
+from datetime import datetime
+from features.messages.repository import MessageRepository
+from features.messages.schemas import MessageResponse, ConversationSummaryResponse, ConversationReadResponse
+from features.messages.exceptions import ConversationNotFoundError
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{row_id}".encode()).decode()
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+class MessageService:
+    def __init__(self, message_repo: MessageRepository):
+        self.message_repo = message_repo
+
+    async def get_inbox(self, user_id: int, cursor: str | None = None, limit: int = 50) -> tuple[list[ConversationSummaryResponse], str | None]:
+        summaries = await self.message_repo.get_inbox(user_id, decode_cursor(cursor) if cursor else None, limit + 1)
+        next_cursor = None
+        if len(summaries) > limit:
+            last = summaries[limit - 1]
+            next_cursor = encode_cursor(last.last_message_at, last.conversation_id)
+        return [ConversationSummaryResponse.model_validate(summary) for summary in summaries[:limit]], next_cursor
+
+    async def check_member(self, conversation_id: int, user_id: int):
+        conversation = await self.message_repo.get_conversation(conversation_id)
+        if not conversation or user_id not in (conversation.user_a, conversation.user_b):
+            raise ConversationNotFoundError()
+
+    async def get_messages(
+        self,
+        user_id: int,
+        conversation_id: int,
+        before: str | None = None,
+        after: str | None = None,
+        limit: int = 50,
+    ) -> tuple[list[MessageResponse], str | None, str | None]:
+        """
+        One page of a conversation in chronological order, with the cursors to page further:
+        (messages, older_cursor, newer_cursor). Without a cursor the page is the latest messages.
+        Each cursor is only returned when there are messages that way. The newer cursor is not for
+        polling: created_at is stamped when a message is sent and the row inserted up to a flush later,
+        so a message can land behind a cursor taken at the newest message. New messages arrive over
+        the WebSocket.
+        """
+        if before and after:
+            raise ValueError("Use either before or after, not both")
+        await self.check_member(conversation_id, user_id)
+
+        forwards = after is not None
+        messages = await self.message_repo.get_messages(
+            conversation_id,
+            before=decode_cursor(before) if before else None,
+            after=decode_cursor(after) if after else None,
+            limit=limit + 1,
+        )
+        more = len(messages) > limit
+        messages = messages[:limit]
+        if not forwards:
+            messages = messages[::-1]
+        if not messages:
+            return [], None, None
+
+        oldest, newest = messages[0], messages[-1]
+        older_cursor = encode_cursor(oldest.created_at, oldest.id) if forwards or more else None
+        newer_cursor = encode_cursor(newest.created_at, newest.id) if before or (forwards and more) else None
+        return [MessageResponse.model_validate(message) for message in messages], older_cursor, newer_cursor
+
+    async def mark_read(self, user_id: int, conversation_id: int) -> ConversationReadResponse:
+        await self.check_member(conversation_id, user_id)
+        unread_count = await self.message_repo.mark_read(conversation_id, user_id)
+        return ConversationReadResponse(conversation_id=conversation_id, unread_count=unread_count)
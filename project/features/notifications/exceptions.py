@@ -0,0 +1,4 @@
+class NotificationJobNotFoundError(Exception):
+    def __init__(self, message: str = "Notification job not found"):
+        self.message = message
+        super().__init__(self.message)
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+from datetime import timedelta
+from db.session import SessionLocal
+from features.notifications.repository import NotificationRepository
+from utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+class NotificationFanout:
+    """
+    Background stage that turns notification jobs into user_notifications rows.
+    Each job is expanded `chunk_size` recipients at a time by one INSERT ... SELECT over
+    event_participants, committed together with the job's progress. Jobs are picked up as soon as
+    `wake` is called after a commit, and every `poll_interval` seconds for jobs written by other
+    workers or left behind by a crashed one.
+    """
+    def __init__(self, chunk_size: int, poll_interval: float, stale_after: float, max_attempts: int):
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.stale_after = timedelta(seconds=stale_after)
+        self.max_attempts = max_attempts
+        self._wakeup = None
+        self._task = None
+        self.jobs_completed = 0
+        self.jobs_failed = 0
+        self.notifications = 0
+
+    def wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _fan_out(self, repo: NotificationRepository, job):
+        if job.total_recipients is None:
+            await repo.set_total_recipients(job.id, await repo.count_recipients(job.event_id, job.created_by))
+        after = job.last_participant_id
+        while True:
+            notified, after = await repo.fan_out_chunk(job, after, self.chunk_size)
+            self.notifications += notified
+            if notified < self.chunk_size:
+                return
+
+    async def run_pending(self):
+        """Processes jobs until none is left to claim."""
+        async with SessionLocal() as db:
+            repo = NotificationRepository(db)
+            while True:
+                job = await repo.claim_job(self.stale_after)
+                if job is None:
+                    return
+                # the rollback below expires `job`, and an AsyncSession can not lazily reload its attributes
+                job_id, attempts = job.id, job.attempts
+                try:
+                    await self._fan_out(repo, job)
+                except Exception as e:
+                    await db.rollback()
+                    logger.error(f"Notification job {job_id} failed (attempt {attempts}): {e}")
+                    status = "failed" if attempts >= self.max_attempts else "pending"
+                    await repo.finish_job(job_id, status, str(e)[:255])
+                    if status == "failed":
+                        self.jobs_failed += 1
+                        continue
+                    # leave the retry to the next poll rather than spinning on a broken job
+                    return
+                await repo.finish_job(job_id, "completed")
+                self.jobs_completed += 1
+
+    async def _run_periodically(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.run_pending()
+            except Exception as e:
+                logger.error(f"Notification fan-out failed: {e}")
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run_periodically())
+        # pick up whatever was left pending before this worker started
+        self._wakeup.set()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "jobs_completed": self.jobs_completed,
+            "jobs_failed": self.jobs_failed,
+            "notifications": self.notifications,
+        }
+
+notification_fanout = NotificationFanout(
+    settings.notification_fanout_chunk_size, settings.notification_fanout_poll_seconds, settings.notification_job_stale_seconds, settings.notification_job_max_attempts
+)
@@ -0,0 +1,118 @@
+from datetime import timedelta
+from sqlalchemy import Integer, String, Text, bindparam, func, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from db.models.events import EventParticipant
+from db.models.notifications import NotificationJob, UserNotification
+
+# participants in these states hear about changes to the event
+NOTIFIED_PARTICIPANT_STATUSES = ("pending", "approved", "waiting")
+
+# One chunk of a fan-out in one statement: the next `chunk_size` recipients after the job's
+# keyset position get a notification row, and the job's progress moves forward in the same transaction.
+FAN_OUT_CHUNK = text("""
+    WITH recipients AS (
+        SELECT participant_id FROM event_participants
+        WHERE event_id = :event_id
+          AND status IN ('pending', 'approved', 'waiting')
+          AND participant_id > :after
+          AND participant_id IS DISTINCT FROM :actor_id
+        ORDER BY participant_id
+        LIMIT :chunk_size
+    ), inserted AS (
+        INSERT INTO user_notifications (user_id, type, message, event_id, job_id)
+        SELECT participant_id, :type, :message, :event_id, :job_id FROM recipients
+        RETURNING user_id
+    ), chunk AS (
+        SELECT count(*) AS notified, max(user_id) AS last_participant_id FROM inserted
+    )
+    UPDATE notification_jobs
+    SET notified = notification_jobs.notified + chunk.notified,
+        last_participant_id = coalesce(chunk.last_participant_id, notification_jobs.last_participant_id),
+        updated_at = now()
+    FROM chunk
+    WHERE notification_jobs.id = :job_id
+    RETURNING chunk.notified, notification_jobs.last_participant_id
+""").bindparams(
+    bindparam("event_id", type_=Integer), bindparam("after", type_=Integer), bindparam("actor_id", type_=Integer),
+    bindparam("chunk_size", type_=Integer), bindparam("type", type_=String), bindparam("message", type_=Text),
+    bindparam("job_id", type_=Integer),
+)
+
+class NotificationRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_job(self, job_id: int) -> NotificationJob:
+        result = await self.db.execute(select(NotificationJob).where(NotificationJob.id == job_id))
+        return result.scalars().first()
+
+    async def claim_job(self, stale_after: timedelta) -> NotificationJob | None:
+        """
+        Marks the oldest pending job as running and returns it. A running job whose worker has not
+        made progress for `stale_after` counts as pending again. Jobs claimed by another worker
+        at the same moment are skipped (SKIP LOCKED), so several workers can share the queue.
+        """
+        next_job = (
+            select(NotificationJob.id)
+            .where(
+                (NotificationJob.status == "pending")
+                | ((NotificationJob.status == "running") & (NotificationJob.updated_at < func.now() - stale_after))
+            )
+            .order_by(NotificationJob.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        result = await self.db.execute(
+            update(NotificationJob)
+            .where(NotificationJob.id == next_job)
+            .values(status="running", attempts=NotificationJob.attempts + 1, updated_at=func.now())
+            .returning(NotificationJob)
+        )
+        job = result.scalars().first()
+        await self.db.commit()
+        return job
+
+    async def count_recipients(self, event_id: int, actor_id: int | None) -> int:
+        result = await self.db.execute(
+            select(func.count())
+            .select_from(EventParticipant)
+            .where(
+                EventParticipant.event_id == event_id,
+                EventParticipant.status.in_(NOTIFIED_PARTICIPANT_STATUSES),
+                EventParticipant.participant_id.is_distinct_from(actor_id),
+            )
+        )
+        return result.scalar_one()
+
+    async def set_total_recipients(self, job_id: int, total: int):
+        await self.db.execute(update(NotificationJob).where(NotificationJob.id == job_id).values(total_recipients=total))
+        await self.db.commit()
+
+    async def fan_out_chunk(self, job: NotificationJob, after: int, chunk_size: int) -> tuple[int, int]:
+        """Returns (rows inserted, new keyset position); commits the chunk."""
+        result = await self.db.execute(FAN_OUT_CHUNK, {
+            "event_id": job.event_id, "after": after, "actor_id": job.created_by, "chunk_size": chunk_size,
+            "type": job.type, "message": job.message, "job_id": job.id,
+        })
+        notified, last_participant_id = result.one()
+        await self.db.commit()
+        return notified, last_participant_id
+
+    async def finish_job(self, job_id: int, status: str, error: str | None = None):
+        values = {"status": status, "error": error}
+        if status in ("completed", "failed"):
+            values["finished_at"] = func.now()
+        if status == "completed":
+            # participants who joined during the fan-out were notified too
+            values["total_recipients"] = NotificationJob.notified
+        await self.db.execute(update(NotificationJob).where(NotificationJob.id == job_id).values(**values))
+        await self.db.commit()
+
+    async def get_notifications(self, user_id: int, before_id: int | None = None, limit: int = 50) -> list[UserNotification]:
+        query = select(UserNotification).where(UserNotification.user_id == user_id).order_by(UserNotification.id.desc()).limit(limit)
+        if before_id is not None:
+            query = query.where(UserNotification.id < before_id)
+        result = await self.db.execute(query)
+        return result.scalars().all()
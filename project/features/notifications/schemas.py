@@ -0,0 +1,29 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import Optional
+
+class NotificationResponse(BaseModel):
+    id: int
+    type: str
+    message: Optional[str] = None
+    event_id: Optional[int] = None
+    is_read: bool
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class NotificationJobResponse(BaseModel):
+    id: int
+    event_id: int
+    type: str
+    status: str
+    total_recipients: Optional[int] = None
+    notified: int
+    attempts: int
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
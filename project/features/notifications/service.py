@@ -0,0 +1,19 @@
+from features.notifications.repository import NotificationRepository
+from features.notifications.schemas import NotificationResponse, NotificationJobResponse
+from features.notifications.exceptions import NotificationJobNotFoundError
+
+class NotificationService:
+    def __init__(self, notification_repo: NotificationRepository):
+        self.notification_repo = notification_repo
+
+    async def get_job(self, job_id: int, user_id: int) -> NotificationJobResponse:
+        job = await self.notification_repo.get_job(job_id)
+        # only whoever made the change can follow its fan-out
+        if not job or job.created_by != user_id:
+            raise NotificationJobNotFoundError()
+        return NotificationJobResponse.model_validate(job)
+
+    async def get_notifications(self, user_id: int, cursor: int | None = None, limit: int = 50) -> tuple[list[NotificationResponse], int | None]:
+        notifications = await self.notification_repo.get_notifications(user_id, cursor, limit + 1)
+        next_cursor = notifications[limit - 1].id if len(notifications) > limit else None
+        return [NotificationResponse.model_validate(n) for n in notifications[:limit]], next_cursor
@@ -0,0 +1,137 @@
+"""
+Nightly trust score recompute: python -m features.trust.recompute
+
+Rebuilds every user's counters from the source tables, adds tenure and the hosting success rate,
+applies inactivity decay and assigns levels, all as NumPy array operations over columnar extracts.
+"""
+import argparse
+import asyncio
+import logging
+from datetime import datetime
+from time import perf_counter
+import numpy as np
+from db.session import SessionLocal, engine
+from features.auth.revocations import utc_now
+from features.trust.repository import TrustRepository
+from features.trust import scoring
+from features.trust.scoring import COUNTERS, POINTS
+
+logger = logging.getLogger(__name__)
+
+DAY = 86400.0
+
+def align(user_ids: np.ndarray, keys: list, values: list, dtype=np.int64) -> np.ndarray:
+    """Spreads (key -> value) pairs over the sorted `user_ids` axis; users without a pair get 0."""
+    result = np.zeros(len(user_ids), dtype=dtype)
+    if not keys:
+        return result
+    keys = np.asarray(keys, dtype=np.int64)
+    positions = np.searchsorted(user_ids, keys)
+    # keys of users deleted since (not in user_ids) are dropped
+    found = (positions < len(user_ids)) & (user_ids[np.minimum(positions, len(user_ids) - 1)] == keys)
+    result[positions[found]] = np.asarray(values, dtype=dtype)[found]
+    return result
+
+def compute_scores(columns: dict[str, list], now: float) -> dict[str, np.ndarray]:
+    user_ids = np.asarray(columns["user_id"], dtype=np.int64)
+    counters = {
+        "participations": align(user_ids, columns["participant_id"], columns["participations"]),
+        "hosted_events": align(user_ids, columns["organizer_id"], columns["hosted"]),
+        "successful_events": align(user_ids, columns["organizer_id"], columns["successful"]),
+        "cancelled_events": align(user_ids, columns["organizer_id"], columns["cancelled"]),
+        "likes_received": np.asarray(columns["likes"], dtype=np.int64),
+        "dislikes_received": np.asarray(columns["dislikes"], dtype=np.int64),
+        # reports have no source table of their own; the incremental count is the truth
+        "reports": np.asarray(columns["snapshot_reports"], dtype=np.int64),
+    }
+    finished = align(user_ids, columns["organizer_id"], columns["finished"])
+
+    score = np.zeros(len(user_ids))
+    for counter in COUNTERS:
+        score += POINTS[counter] * counters[counter]
+
+    created_at = np.asarray(columns["created_at"], dtype=np.float64)
+    tenure_days = np.maximum(now - created_at, 0) / DAY
+    active_ever = (counters["participations"] + counters["hosted_events"]) > 0
+    score += np.where(
+        active_ever, scoring.TENURE_POINTS_PER_MONTH * np.minimum(tenure_days // 30, scoring.TENURE_MAX_MONTHS), 0
+    )
+
+    success_rate = counters["successful_events"] / np.maximum(finished, 1)
+    score += np.where(finished >= scoring.SUCCESS_RATE_MIN_EVENTS, scoring.SUCCESS_RATE_POINTS * success_rate, 0)
+
+    last_active = np.maximum.reduce([
+        np.asarray(columns["last_active_at"], dtype=np.float64),
+        align(user_ids, columns["participant_id"], columns["last_joined_at"], np.float64),
+        align(user_ids, columns["organizer_id"], columns["last_hosted_at"], np.float64),
+        align(user_ids, columns["login_user_id"], columns["last_login_at"], np.float64),
+        created_at,
+    ])
+    inactive_days = np.maximum(now - last_active, 0) / DAY
+    decay = 0.5 ** (np.maximum(inactive_days - scoring.DECAY_GRACE_DAYS, 0) / scoring.DECAY_HALF_LIFE_DAYS)
+    score = np.round(np.maximum(score, 0) * decay, 2)
+
+    votes = counters["likes_received"] + counters["dislikes_received"]
+    like_ratio = np.where(votes > 0, counters["likes_received"] / np.maximum(votes, 1), 1.0)
+    no_reports = counters["reports"] == 0
+    level = np.select(
+        [
+            (counters["hosted_events"] >= 10) & no_reports & (like_ratio >= 0.9),
+            (counters["successful_events"] >= 3) & (like_ratio >= 0.9),
+            (counters["participations"] >= 3) & no_reports & (tenure_days >= 30),
+        ],
+        ["organizer", "high", "trusted"],
+        default="basic",
+    )
+    return {"user_ids": user_ids, "scores": score, "levels": level, "last_active_at": last_active, **counters}
+
+def to_params(result: dict[str, np.ndarray], columns: dict[str, list], start: int, stop: int) -> dict[str, list]:
+    params = {
+        "user_ids": result["user_ids"][start:stop].tolist(),
+        "scores": result["scores"][start:stop].tolist(),
+        "levels": result["levels"][start:stop].tolist(),
+        "snapshot_scores": columns["snapshot_score"][start:stop],
+        # epoch seconds -> naive UTC datetimes
+        "last_active_ats": (result["last_active_at"][start:stop] * 1e6).astype("datetime64[us]").tolist(),
+    }
+    for counter in COUNTERS:
+        params[counter] = result[counter][start:stop].tolist()
+        params[f"snapshot_{counter}"] = columns[f"snapshot_{counter}"][start:stop]
+    return params
+
+async def recompute_all(chunk_size: int = 20000) -> dict:
+    timings = {}
+    started = perf_counter()
+    now = utc_now()
+    async with SessionLocal() as db:
+        columns = await TrustRepository(db).extract(now, scoring.SUCCESSFUL_EVENT_FILL_RATE)
+    timings["extract_s"] = perf_counter() - started
+
+    started = perf_counter()
+    result = compute_scores(columns, (now - datetime(1970, 1, 1)).total_seconds())
+    timings["compute_s"] = perf_counter() - started
+
+    started = perf_counter()
+    for start in range(0, len(result["user_ids"]), chunk_size):
+        # one short transaction per chunk, so incremental updates are never blocked for long
+        async with SessionLocal() as db:
+            await TrustRepository(db).write_recomputed(to_params(result, columns, start, start + chunk_size))
+    timings["write_s"] = perf_counter() - started
+
+    levels, counts = np.unique(result["levels"], return_counts=True)
+    return {
+        "users": len(result["user_ids"]),
+        "levels": dict(zip(levels.tolist(), counts.tolist())),
+        **{name: round(seconds, 3) for name, seconds in timings.items()},
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description="Recompute every user's trust score")
+    parser.add_argument("--chunk-size", type=int, default=20000, help="users written per transaction")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    logger.info(f"Trust scores recomputed: {await recompute_all(args.chunk_size)}")
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,150 @@
+from sqlalchemy import Boolean, Float, Integer, String, TIMESTAMP, bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from db.models.trust import UserTrustScore
+from features.trust.scoring import COUNTERS
+
+def int_arrays(*names):
+    return [bindparam(name, type_=ARRAY(Integer)) for name in names]
+
+# Adds a batch of counter deltas and their points, one row per user, creating missing rows.
+APPLY_DELTAS = text(f"""
+    INSERT INTO user_trust_scores AS t (user_id, score, {", ".join(COUNTERS)}, last_active_at)
+    SELECT d.user_id, greatest(d.points, 0), {", ".join(f"greatest(d.{counter}, 0)" for counter in COUNTERS)},
+           CASE WHEN d.active THEN now() END
+    FROM unnest(:user_ids, :points, {", ".join(f":{counter}" for counter in COUNTERS)}, :active)
+         AS d(user_id, points, {", ".join(COUNTERS)}, active)
+    WHERE EXISTS (SELECT 1 FROM users WHERE users.id = d.user_id)
+    ORDER BY d.user_id
+    ON CONFLICT (user_id) DO UPDATE SET
+        score = greatest(t.score + EXCLUDED.score, 0),
+        {", ".join(f"{counter} = greatest(t.{counter} + EXCLUDED.{counter}, 0)" for counter in COUNTERS)},
+        last_active_at = coalesce(EXCLUDED.last_active_at, t.last_active_at),
+        updated_at = now()
+""").bindparams(
+    bindparam("user_ids", type_=ARRAY(Integer)), bindparam("points", type_=ARRAY(Float)),
+    *int_arrays(*COUNTERS), bindparam("active", type_=ARRAY(Boolean)),
+)
+
+# Columnar extracts for the nightly recompute: each query returns one row of parallel arrays.
+EXTRACT_USERS = text("""
+    SELECT array_agg(u.id ORDER BY u.id),
+           array_agg(extract(epoch FROM u.created_at)::float8 ORDER BY u.id),
+           array_agg(coalesce(u.likes, 0) ORDER BY u.id),
+           array_agg(coalesce(u.dislikes, 0) ORDER BY u.id),
+           array_agg(coalesce(extract(epoch FROM t.last_active_at)::float8, 0) ORDER BY u.id),
+           array_agg(coalesce(t.score, 0) ORDER BY u.id),
+           {snapshot}
+    FROM users u LEFT JOIN user_trust_scores t ON t.user_id = u.id
+""".format(snapshot=",\n           ".join(f"array_agg(coalesce(t.{counter}, 0) ORDER BY u.id)" for counter in COUNTERS)))
+
+EXTRACT_PARTICIPATIONS = text("""
+    SELECT array_agg(participant_id ORDER BY participant_id), array_agg(n ORDER BY participant_id),
+           array_agg(last_joined ORDER BY participant_id)
+    FROM (
+        SELECT participant_id, count(*) AS n, max(extract(epoch FROM joined_at))::float8 AS last_joined
+        FROM event_participants WHERE status = 'approved' GROUP BY participant_id
+    ) p
+""")
+
+EXTRACT_HOSTING = text("""
+    SELECT array_agg(organizer_id ORDER BY organizer_id), array_agg(hosted ORDER BY organizer_id),
+           array_agg(finished ORDER BY organizer_id), array_agg(successful ORDER BY organizer_id),
+           array_agg(cancelled ORDER BY organizer_id), array_agg(last_created ORDER BY organizer_id)
+    FROM (
+        SELECT organizer_id,
+               count(*) FILTER (WHERE status <> 'cancelled') AS hosted,
+               count(*) FILTER (WHERE status <> 'cancelled' AND end_time < :now) AS finished,
+               count(*) FILTER (WHERE status <> 'cancelled' AND end_time < :now AND max_participants > 0
+                                AND current_participants >= :fill_rate * max_participants) AS successful,
+               count(*) FILTER (WHERE status = 'cancelled') AS cancelled,
+               max(extract(epoch FROM created_at))::float8 AS last_created
+        FROM events GROUP BY organizer_id
+    ) h
+""")
+
+EXTRACT_LOGINS = text("""
+    SELECT array_agg(user_id ORDER BY user_id), array_agg(last_login ORDER BY user_id)
+    FROM (
+        SELECT user_id, max(extract(epoch FROM login_time))::float8 AS last_login
+        FROM login_attempts WHERE status = 'success' AND user_id IS NOT NULL GROUP BY user_id
+    ) l
+""")
+
+# Creates the rows the recompute is about to update; rows created meanwhile by incremental
+# updates are left alone (their whole value then counts as change since the extract).
+INSERT_MISSING = text("""
+    INSERT INTO user_trust_scores (user_id) SELECT unnest(:user_ids) ON CONFLICT (user_id) DO NOTHING
+""").bindparams(bindparam("user_ids", type_=ARRAY(Integer)))
+
+# Writes recomputed values. Whatever the incremental updates added after the extract
+# (current value minus the extracted snapshot) is carried over on top. That is only exact when a
+# delta is flushed on the same side of the extract as its source row is committed. Deltas wait in
+# each worker's CounterBuffer for up to TRUST_FLUSH_SECONDS, so until the next recompute:
+# - a join, host, leave or cancel committed before the extract whose delta was still buffered is
+#   counted by the extract and added again when the delta flushes (double counted);
+# - a vote whose trust delta flushed before its like/dislike reached users (also written behind)
+#   is missing from the extract and subtracted with the snapshot (not counted).
+WRITE_RECOMPUTED = text(f"""
+    UPDATE user_trust_scores AS t SET
+        score = greatest(r.score + (t.score - r.snapshot_score), 0),
+        level = r.level,
+        {", ".join(f"{counter} = greatest(r.{counter} + (t.{counter} - r.snapshot_{counter}), 0)" for counter in COUNTERS)},
+        last_active_at = greatest(t.last_active_at, r.last_active_at),
+        recomputed_at = now(),
+        updated_at = now()
+    FROM unnest(:user_ids, :scores, :levels, :snapshot_scores, :last_active_ats,
+                {", ".join(f":{counter}" for counter in COUNTERS)},
+                {", ".join(f":snapshot_{counter}" for counter in COUNTERS)})
+         AS r(user_id, score, level, snapshot_score, last_active_at,
+              {", ".join(COUNTERS)}, {", ".join(f"snapshot_{counter}" for counter in COUNTERS)})
+    WHERE t.user_id = r.user_id
+""").bindparams(
+    bindparam("user_ids", type_=ARRAY(Integer)), bindparam("scores", type_=ARRAY(Float)),
+    bindparam("levels", type_=ARRAY(String)), bindparam("snapshot_scores", type_=ARRAY(Float)),
+    bindparam("last_active_ats", type_=ARRAY(TIMESTAMP)),
+    *int_arrays(*COUNTERS), *int_arrays(*(f"snapshot_{counter}" for counter in COUNTERS)),
+)
+
+class TrustRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_score(self, user_id: int) -> UserTrustScore:
+        result = await self.db.execute(select(UserTrustScore).where(UserTrustScore.user_id == user_id))
+        return result.scalars().first()
+
+    async def apply_deltas(self, rows: list[dict]):
+        """`rows`: one dict per user with user_id, points, active and a delta per counter. Commits."""
+        params = {"user_ids": [row["user_id"] for row in rows], "points": [row["points"] for row in rows], "active": [row["active"] for row in rows]}
+        for counter in COUNTERS:
+            params[counter] = [row.get(counter, 0) for row in rows]
+        await self.db.execute(APPLY_DELTAS, params)
+        await self.db.commit()
+
+    async def extract(self, now, fill_rate: float) -> dict[str, list]:
+        """
+        Everything the recompute needs, as parallel lists, read in one REPEATABLE READ transaction
+        so the aggregates and the snapshot of user_trust_scores agree with each other.
+        """
+        await self.db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        users = (await self.db.execute(EXTRACT_USERS)).one()
+        participations = (await self.db.execute(EXTRACT_PARTICIPATIONS)).one()
+        hosting = (await self.db.execute(EXTRACT_HOSTING, {"now": now, "fill_rate": fill_rate})).one()
+        logins = (await self.db.execute(EXTRACT_LOGINS)).one()
+        await self.db.rollback()
+
+        names = ["user_id", "created_at", "likes", "dislikes", "last_active_at", "snapshot_score"]
+        names += [f"snapshot_{counter}" for counter in COUNTERS]
+        columns = dict(zip(names, users))
+        columns.update(zip(["participant_id", "participations", "last_joined_at"], participations))
+        columns.update(zip(["organizer_id", "hosted", "finished", "successful", "cancelled", "last_hosted_at"], hosting))
+        columns.update(zip(["login_user_id", "last_login_at"], logins))
+        # array_agg over no rows is NULL
+        return {name: values or [] for name, values in columns.items()}
+
+    async def write_recomputed(self, columns: dict[str, list]):
+        await self.db.execute(INSERT_MISSING, {"user_ids": columns["user_ids"]})
+        await self.db.execute(WRITE_RECOMPUTED, columns)
+        await self.db.commit()
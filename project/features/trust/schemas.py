@@ -0,0 +1,20 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import Optional
+
+class TrustScoreResponse(BaseModel):
+    user_id: int
+    score: float = 0
+    level: str = "basic"
+    participations: int = 0
+    hosted_events: int = 0
+    successful_events: int = 0
+    cancelled_events: int = 0
+    likes_received: int = 0
+    dislikes_received: int = 0
+    reports: int = 0
+    last_active_at: Optional[datetime] = None
+    recomputed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
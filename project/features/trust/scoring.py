@@ -0,0 +1,34 @@
+# Trust score rules (documents/代辦2 - 信用分數.txt). Shared by the incremental updates and the
+# nightly recompute, which adds what only makes sense over the whole history: tenure,
+# the hosting success rate and inactivity decay.
+
+# points per unit of each counter
+POINTS = {
+    "participations": 10.0,
+    "hosted_events": 5.0,
+    "successful_events": 15.0,  # on top of hosted_events
+    "cancelled_events": -15.0,
+    "likes_received": 2.0,
+    "dislikes_received": -3.0,
+    "reports": -30.0,
+}
+COUNTERS = tuple(POINTS)
+
+# +5 per month on the platform, up to two years, once the user has taken part in anything
+TENURE_POINTS_PER_MONTH = 5.0
+TENURE_MAX_MONTHS = 24
+# hosts with at least 3 finished events get up to 50 points for their success rate
+SUCCESS_RATE_POINTS = 50.0
+SUCCESS_RATE_MIN_EVENTS = 3
+# an ended event is a success when at least this share of its seats were taken
+SUCCESSFUL_EVENT_FILL_RATE = 0.8
+
+# no decay for the first 30 days without activity, then the score halves every 90 days
+DECAY_GRACE_DAYS = 30
+DECAY_HALF_LIFE_DAYS = 90
+
+# levels, highest first; see level conditions in features/trust/recompute.py
+LEVELS = ("organizer", "high", "trusted", "basic")
+
+def points_for(deltas: dict[str, int]) -> float:
+    return sum(POINTS[counter] * delta for counter, delta in deltas.items() if counter in POINTS)
@@ -0,0 +1,53 @@
+from db.session import SessionLocal
+from features.trust.repository import TrustRepository
+from features.trust.schemas import TrustScoreResponse
+from features.trust.scoring import COUNTERS, points_for
+from utils.counters import CounterBuffer
+from utils.config import settings
+
+async def write_trust_deltas(deltas: dict):
+    rows = []
+    for (_, user_id), fields in deltas.items():
+        counters = {counter: fields.get(counter, 0) for counter in COUNTERS}
+        rows.append({"user_id": user_id, "points": points_for(counters), "active": fields.get("active", 0) > 0, **counters})
+    async with SessionLocal() as db:
+        await TrustRepository(db).apply_deltas(rows)
+
+class TrustScores:
+    """
+    Keeps user_trust_scores moving between nightly recomputes (features/trust/recompute.py).
+    Activity is counted in memory and written every TRUST_FLUSH_SECONDS as one upsert that adds
+    the counter deltas and their points; levels, tenure and decay are left to the recompute.
+    """
+    def __init__(self, buffer: CounterBuffer):
+        self.buffer = buffer
+
+    def record(self, user_id: int, active: bool = False, **deltas: int):
+        """`deltas` are counter changes (see scoring.POINTS); `active` marks the user as active now."""
+        for counter, delta in deltas.items():
+            if counter not in COUNTERS:
+                raise ValueError(f"Unknown trust counter: {counter}")
+            self.buffer.incr("users", user_id, counter, delta)
+        if active:
+            self.buffer.incr("users", user_id, "active")
+
+    def start(self):
+        self.buffer.start()
+
+    async def stop(self):
+        await self.buffer.stop()
+
+    def stats(self) -> dict:
+        return self.buffer.stats()
+
+class TrustService:
+    def __init__(self, trust_repo: TrustRepository):
+        self.trust_repo = trust_repo
+
+    async def get_score(self, user_id: int) -> TrustScoreResponse:
+        trust_score = await self.trust_repo.get_score(user_id)
+        if trust_score is None:
+            return TrustScoreResponse(user_id=user_id)
+        return TrustScoreResponse.model_validate(trust_score)
+
+trust_scores = TrustScores(CounterBuffer(write_trust_deltas, settings.trust_flush_seconds, settings.trust_max_pending_users))
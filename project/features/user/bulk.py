@@ -0,0 +1,170 @@
+import argparse
+import asyncio
+import csv
+import io
+import json
+from typing import AsyncIterator, Iterable, Iterator
+from pydantic import ValidationError
+from db.session import SessionLocal, engine
+from features.user.repository import UserRepository
+from features.user.service import UserService
+from features.user.schemas import UserImportRow, UserResponse, BulkImportResult, BulkImportRowError
+from utils.security import hash_passwords_async, password_hash_pool
+from utils.config import settings
+
+USER_COPY_COLUMNS = [
+    "id", "username", "email", "first_name", "last_name", "role", "status",
+    "is_email_verified", "is_phone_number_verified", "likes", "dislikes", "token_epoch",
+]
+EXPORT_FIELDS = list(UserResponse.model_fields.keys())
+
+def parse_rows(content: bytes, content_type: str) -> Iterator[tuple[int, dict | None]]:
+    """
+    Yields (row number, row) pairs from a CSV (with header) or NDJSON payload.
+    A row that can not be parsed is yielded as None so it is reported instead of aborting the import.
+    """
+    text = content.decode("utf-8-sig")
+    if "json" in content_type:
+        lines = (line for line in text.splitlines() if line.strip())
+        for row_number, line in enumerate(lines, start=1):
+            try:
+                row = json.loads(line)
+                yield row_number, row if isinstance(row, dict) else None
+            except json.JSONDecodeError:
+                yield row_number, None
+    else:
+        yield from enumerate(csv.DictReader(io.StringIO(text)), start=1)
+
+class UserBulkImporter:
+    """
+    Imports users in batches: rows are validated and checked against existing accounts,
+    passwords are hashed in parallel on the password hash pool, then users and user_auth
+    rows are written with COPY, one transaction per batch.
+    """
+    def __init__(self, user_repo: UserRepository, batch_size: int = settings.bulk_import_batch_size):
+        self.user_repo = user_repo
+        self.batch_size = batch_size
+        self.result = BulkImportResult(created=0, failed=0, errors=[])
+        self._seen_emails = set()
+        self._seen_usernames = set()
+
+    def _fail(self, row_number: int, email: str | None, error: str):
+        self.result.failed += 1
+        self.result.errors.append(BulkImportRowError(row=row_number, email=email, error=error))
+
+    async def import_rows(self, rows: Iterable[tuple[int, dict | None]]) -> BulkImportResult:
+        batch = []
+        for row_number, row in rows:
+            if row is None:
+                self._fail(row_number, None, "Malformed row")
+                continue
+
+            try:
+                user = UserImportRow.model_validate(row)
+            except ValidationError as e:
+                error = e.errors()[0]
+                self._fail(row_number, row.get("email"), f"{'.'.join(map(str, error['loc']))}: {error['msg']}")
+                continue
+
+            if user.email in self._seen_emails or user.username in self._seen_usernames:
+                self._fail(row_number, user.email, "Duplicate email or username in file")
+                continue
+            self._seen_emails.add(user.email)
+            self._seen_usernames.add(user.username)
+
+            batch.append((row_number, user))
+            if len(batch) >= self.batch_size:
+                await self._import_batch(batch)
+                batch = []
+
+        if batch:
+            await self._import_batch(batch)
+        return self.result
+
+    async def _import_batch(self, batch: list[tuple[int, UserImportRow]]):
+        taken_emails, taken_usernames = await self.user_repo.get_taken_emails_and_usernames(
+            [user.email for _, user in batch], [user.username for _, user in batch]
+        )
+        # end the read transaction so no connection is held while hashing
+        await self.user_repo.commit()
+
+        accepted = []
+        for row_number, user in batch:
+            if user.email in taken_emails:
+                self._fail(row_number, user.email, "Email already registered")
+            elif user.username in taken_usernames:
+                self._fail(row_number, user.email, "Username already taken")
+            else:
+                accepted.append((row_number, user))
+        if not accepted:
+            return
+
+        hashed_passwords = await hash_passwords_async([user.password for _, user in accepted])
+
+        try:
+            user_ids = await self.user_repo.reserve_user_ids(len(accepted))
+            users = [
+                (user_id, user.username, user.email, user.first_name, user.last_name, "user", "active", False, False, 0, 0, 0)
+                for user_id, (_, user) in zip(user_ids, accepted)
+            ]
+            user_auths = list(zip(user_ids, hashed_passwords))
+            await self.user_repo.copy_users_and_auth(users, user_auths, USER_COPY_COLUMNS)
+            await self.user_repo.commit()
+            self.result.created += len(accepted)
+        except Exception as e:
+            # e.g. a concurrent signup took one of the emails; COPY is all-or-nothing per batch
+            await self.user_repo.rollback()
+            for row_number, user in accepted:
+                self._fail(row_number, user.email, f"Batch insert failed: {e.__class__.__name__}")
+
+async def export_users_csv(user_repo: UserRepository) -> AsyncIterator[bytes]:
+    # COPY pushes chunks into a bounded queue, so a slow client slows the export down instead of buffering it
+    queue = asyncio.Queue(maxsize=16)
+
+    async def put(chunk):
+        await queue.put(bytes(chunk))
+
+    async def produce():
+        try:
+            await user_repo.copy_users_out(EXPORT_FIELDS, put)
+        finally:
+            await queue.put(None)
+
+    task = asyncio.create_task(produce())
+    try:
+        while (chunk := await queue.get()) is not None:
+            yield chunk
+        await task
+    finally:
+        task.cancel()
+
+async def main():
+    parser = argparse.ArgumentParser(description="Bulk import or export users")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="defaults to the file extension")
+    args = parser.parse_args()
+    file_format = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+
+    try:
+        async with SessionLocal() as db:
+            user_repo = UserRepository(db)
+            if args.command == "import":
+                with open(args.path, "rb") as f:
+                    rows = parse_rows(f.read(), "application/x-ndjson" if file_format == "ndjson" else "text/csv")
+                result = await UserBulkImporter(user_repo).import_rows(rows)
+                print(result.model_dump_json(indent=2))
+            elif file_format == "csv":
+                with open(args.path, "wb") as f:
+                    async for chunk in export_users_csv(user_repo):
+                        f.write(chunk)
+            else:
+                with open(args.path, "w") as f:
+                    async for chunk in UserService(user_repo).stream_users():
+                        f.write(chunk)
+    finally:
+        password_hash_pool.shutdown()
+        await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
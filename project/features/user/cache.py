@@ -0,0 +1,164 @@
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+from db.models.users import User
+from db.pubsub import pubsub
+from features.user.schemas import UserResponse
+from utils.cache import LocalStore, RedisStore, TTLCache
+from utils.config import settings
+
+USER_CACHE_CHANNEL = "user_cache"
+
+logger = logging.getLogger(__name__)
+
+class CachedUser(BaseModel):
+    profile: UserResponse
+    updated_at: Optional[datetime] = None
+
+def cache_key(field: str, value) -> str:
+    return f"user:{field}:{value}"
+
+def profile_keys(user) -> list[str]:
+    # a profile is cached under every identifier it can be looked up by
+    return [cache_key("id", user.id), cache_key("email", user.email), cache_key("username", user.username)]
+
+class UserCache:
+    """
+    Cache-aside for user profiles: an LRU in each worker (L1) in front of an optional store shared
+    by all workers (L2), in front of the database.
+    A write drops the user's keys from this worker's L1 and from the store, and publishes them on
+    `USER_CACHE_CHANNEL` so the other workers drop theirs. For `settle_seconds` after that, profiles
+    loaded under those keys are not cached: they may have been read before the write, or from a
+    replica that has not replayed it yet. A notification lost while a worker was disconnected
+    leaves it stale for at most `ttl` seconds; a profile another worker loaded that way before the
+    notification reached it, for at most `store_ttl` seconds. Store errors fall through to the database.
+    """
+    def __init__(self, max_size: int, ttl: float, store, store_ttl: float, pubsub, settle_seconds: float):
+        self.l1 = TTLCache(max_size, ttl)
+        self.store = store
+        self.store_ttl = store_ttl
+        self.pubsub = pubsub
+        self.settle_seconds = settle_seconds
+        self._invalidated_at: dict[str, float] = {}
+        self._store_failing = False
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self.store_errors = 0
+        self.invalidations = 0
+        self.invalidations_received = 0
+        pubsub.subscribe(USER_CACHE_CHANNEL, self._on_invalidated)
+
+    def _store_failed(self, action: str, e: Exception):
+        self.store_errors += 1
+        if not self._store_failing:
+            logger.warning(f"User cache store {action} failed, using the database: {e}")
+        self._store_failing = True
+
+    def _settling(self, keys: list[str]) -> bool:
+        now = time.monotonic()
+        return any(now - self._invalidated_at.get(key, -self.settle_seconds) < self.settle_seconds for key in keys)
+
+    async def get(self, field: str, value) -> Optional[CachedUser]:
+        key = cache_key(field, value)
+        cached = self.l1.get(key)
+        if cached is not None:
+            self.l1_hits += 1
+            return cached
+        if self.store is not None:
+            try:
+                raw = await self.store.get(key)
+                self._store_failing = False
+            except Exception as e:
+                self._store_failed("read", e)
+                raw = None
+            if raw is not None:
+                self.l2_hits += 1
+                cached = CachedUser.model_validate_json(raw)
+                keys = profile_keys(cached.profile)
+                if not self._settling(keys):
+                    for profile_key in keys:
+                        self.l1.put(profile_key, cached)
+                return cached
+        self.misses += 1
+        return None
+
+    async def put(self, user: User) -> CachedUser:
+        """Caches `user`, just loaded from the database, unless its keys are settling; returns its profile."""
+        cached = CachedUser(profile=UserResponse.model_validate(user), updated_at=user.updated_at)
+        keys = profile_keys(user)
+        if self._settling(keys):
+            return cached
+        for key in keys:
+            self.l1.put(key, cached)
+        if self.store is not None:
+            raw = cached.model_dump_json().encode()
+            try:
+                await self.store.set_many({key: raw for key in keys}, self.store_ttl)
+            except Exception as e:
+                self._store_failed("write", e)
+        return cached
+
+    async def invalidate(self, keys: list[str]):
+        keys = sorted(set(keys))
+        self._drop(keys)
+        if self.store is not None and self.store.shared:
+            try:
+                await self.store.delete(keys)
+            except Exception as e:
+                self._store_failed("delete", e)
+        self.pubsub.publish(USER_CACHE_CHANNEL, json.dumps(keys))
+        self.invalidations += 1
+
+    def _drop(self, keys: list[str]):
+        now = time.monotonic()
+        if len(self._invalidated_at) >= max(self.l1.max_size, 1000):
+            self._invalidated_at = {key: at for key, at in self._invalidated_at.items() if now - at < self.settle_seconds}
+        for key in keys:
+            self._invalidated_at[key] = now
+        self.l1.discard(keys)
+        if self.store is not None and not self.store.shared:
+            self.store.discard(keys)
+
+    def _on_invalidated(self, payload: str):
+        self.invalidations_received += 1
+        self._drop(json.loads(payload))
+
+    async def stop(self):
+        if self.store is not None:
+            await self.store.close()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.l1),
+            "max_size": self.l1.max_size,
+            "l1_hits": self.l1_hits,
+            "l2_hits": self.l2_hits,
+            "misses": self.misses,
+            "store": self.store.stats() if self.store is not None else None,
+            "store_errors": self.store_errors,
+            "invalidations": self.invalidations,
+            "invalidations_received": self.invalidations_received,
+        }
+
+def create_store():
+    if settings.user_cache_store == "none":
+        return None
+    if settings.user_cache_store == "local":
+        return LocalStore()
+    if settings.user_cache_store != "redis":
+        raise ValueError(f"Unknown USER_CACHE_STORE: {settings.user_cache_store}")
+    return RedisStore(settings.user_cache_redis_url)
+
+user_cache = UserCache(
+    settings.user_cache_size,
+    settings.user_cache_ttl_seconds,
+    create_store(),
+    settings.user_cache_store_ttl_seconds,
+    pubsub,
+    # as long as reads right after a write are kept off the replicas
+    settings.db_read_your_writes_seconds,
+)
@@ -1,5 +1,8 @@
+from sqlalchemy import func, or_, literal
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import contains_eager
 from db.models.users import User, UserAuth, UserAuthProvider
 
 class UserRepository:
@@ -19,6 +22,12 @@ class UserRepository:
                 await self.db.rollback()  # 發生例外時回滾
                 raise e
 
+    async def commit(self):
+        await self.db.commit()
+
+    async def rollback(self):
+        await self.db.rollback()
+
     async def get_user_by_email(self, email: str) -> User:
         return await self.get_user(email=email)
     
@@ -33,6 +42,47 @@ class UserRepository:
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
 
+    async def get_user_version(self, **filters):
+        # (id, updated_at) from the primary key or a unique index, without loading the row
+        query = select(User.id, User.updated_at).filter_by(**filters)
+        result = await self.db.execute(query)
+        return result.one_or_none()
+
+    async def get_user_with_auth(self, **filters) -> User:
+        # user and credentials in one joined query; user.auth is populated from the same row
+        query = (
+            select(User)
+            .join(User.auth)
+            .options(contains_eager(User.auth))
+            .where(*[getattr(User, field) == value for field, value in filters.items()])
+        )
+        result = await self.db.execute(query)
+        return result.scalar_one_or_none()
+
+    async def insert_user_with_auth(self, username: str, email: str, hashed_password: str) -> User | None:
+        """
+        Inserts a user and its credentials in a single statement and commits.
+        Returns None, without raising, when the email or username is already taken.
+        """
+        new_user = (
+            insert(User)
+            .values(username=username, email=email)
+            .on_conflict_do_nothing()
+            .returning(*User.__table__.c)
+            .cte("new_user")
+        )
+        new_auth = (
+            insert(UserAuth)
+            .from_select(["user_id", "password"], select(new_user.c.id, literal(hashed_password)))
+            .returning(UserAuth.id)
+            .cte("new_auth")
+        )
+        query = select(User).from_statement(select(new_user).add_cte(new_auth))
+        result = await self.db.execute(query)
+        user = result.scalar_one_or_none()
+        await self.db.commit()
+        return user
+
     async def create_user(self, user: User) -> User:
         self.db.add(user)
         await self.db.flush([user])
@@ -53,11 +103,71 @@ class UserRepository:
         await self.db.commit()
         await self.db.refresh(user)
 
-    async def get_all_users(self) -> list[User]:
-        query = select(User)
+    async def get_all_users(self, fields) -> list[tuple]:
+        query = select(*[getattr(User, field) for field in fields])
         result = await self.db.execute(query)
-        return result.scalars().all()
+        return result.tuples().all()
+
+    async def get_users_page(self, fields, after_id: int | None = None, limit: int = 100) -> list[tuple]:
+        """
+        Rows of `fields` as plain tuples, without building ORM objects.
+        Keyset pagination on the primary key: cost stays constant however deep the page is.
+        """
+        query = select(*[getattr(User, field) for field in fields]).order_by(User.id).limit(limit)
+        if after_id is not None:
+            query = query.where(User.id > after_id)
+        result = await self.db.execute(query)
+        return result.tuples().all()
+
+    async def stream_user_rows(self, fields, after_id: int | None = None, batch_size: int = 1000):
+        """
+        Yields batches of plain row tuples from a server-side cursor.
+        Rows are not turned into ORM objects, so nothing piles up in the identity map.
+        """
+        query = select(*[getattr(User, field) for field in fields]).order_by(User.id)
+        if after_id is not None:
+            query = query.where(User.id > after_id)
+        result = await self.db.stream(query.execution_options(yield_per=batch_size))
+        async for rows in result.tuples().partitions():
+            yield rows
     
+    async def get_taken_emails_and_usernames(self, emails: list[str], usernames: list[str]) -> tuple[set[str], set[str]]:
+        query = select(User.email, User.username).where(or_(User.email.in_(emails), User.username.in_(usernames)))
+        result = await self.db.execute(query)
+        rows = result.all()
+        return {row.email for row in rows}, {row.username for row in rows}
+
+    async def reserve_user_ids(self, count: int) -> list[int]:
+        # ids are drawn up front so user_auth rows can reference them in the same COPY batch
+        query = select(func.nextval(func.pg_get_serial_sequence(User.__tablename__, "id"))).select_from(
+            func.generate_series(1, count)
+        )
+        result = await self.db.execute(query)
+        return result.scalars().all()
+
+    async def _driver_connection(self):
+        connection = await self.db.connection()
+        raw_connection = await connection.get_raw_connection()
+        return raw_connection.driver_connection
+
+    async def copy_users_and_auth(self, users: list[tuple], user_auths: list[tuple], user_columns: list[str]):
+        """
+        Bulk loads users and their credentials with COPY inside the session's transaction.
+        `users` rows follow `user_columns`; `user_auths` rows are (user_id, password).
+        """
+        driver_connection = await self._driver_connection()
+        await driver_connection.copy_records_to_table(User.__tablename__, records=users, columns=user_columns)
+        await driver_connection.copy_records_to_table(UserAuth.__tablename__, records=user_auths, columns=["user_id", "password"])
+
+    async def copy_users_out(self, fields, output):
+        """
+        Streams the users table as CSV through COPY ... TO STDOUT; `output` is an async callable fed raw chunks.
+        """
+        driver_connection = await self._driver_connection()
+        query = select(*[getattr(User, field) for field in fields]).order_by(User.id)
+        sql = str(query.compile(dialect=self.db.get_bind().dialect, compile_kwargs={"literal_binds": True}))
+        await driver_connection.copy_from_query(sql, output=output, format="csv", header=True)
+
     async def get_user_auth_by_user_id(self, user_id: int) -> UserAuth:
         query = select(UserAuth).filter_by(user_id=user_id)
         result = await self.db.execute(query)
@@ -102,18 +212,3 @@ class UserRepository:
         except Exception as e:
             await self.db.rollback()
             return None
-    
-    async def create_user_and_auth(self, user: User, user_auth: UserAuth) -> User:
-        try:
-            self.db.add(user)
-            await self.db.flush([user])
-
-            user_auth.user_id = user.id
-            self.db.add(user_auth)
-            await self.db.flush([user_auth])
-
-            await self.db.commit()
-            return user
-        except Exception as e:
-            await self.db.rollback()
-            return None
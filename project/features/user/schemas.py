@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
 
 class UserCreate(BaseModel):
@@ -9,7 +9,8 @@ class UserCreate(BaseModel):
 class UserResponse(BaseModel):
     id: int
     username: str
-    email: EmailStr
+    # checked as EmailStr when it was written; re-checking every address read back was most of the cost of a user list
+    email: str = Field(json_schema_extra={"format": "email"})
     first_name: Optional[str] = None
     last_name: Optional[str] = None
     role: str
@@ -18,6 +19,20 @@ class UserResponse(BaseModel):
     class Config:
         from_attributes = True  # Enable ORM attribute validation
 
+class UserImportRow(UserCreate):
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+
+class BulkImportRowError(BaseModel):
+    row: int
+    email: Optional[str] = None
+    error: str
+
+class BulkImportResult(BaseModel):
+    created: int
+    failed: int
+    errors: list[BulkImportRowError]
+
 class UserUpdate(BaseModel):
     username: Optional[str] = None
     first_name: Optional[str] = None
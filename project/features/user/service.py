@@ -1,62 +1,99 @@
-from db.models.users import User, UserAuth
+from db.models.users import User
 from features.user.repository import UserRepository
 from features.user.schemas import UserCreate, UserResponse, UserUpdate
-from utils.security import hash_password
-from features.user.exceptions import UserNotFoundError, UserDeleteError, UserExistsError, UserCreateError, UserUpdateError
+from features.user.cache import CachedUser, profile_keys, user_cache
+from utils.security import hash_password_async
+from features.auth.token_epochs import token_epochs
+from features.counters.schemas import CounterResponse
+from features.counters.service import counters
+from features.trust.service import trust_scores
+from features.user.exceptions import UserNotFoundError, UserDeleteError, UserExistsError, UserUpdateError
+from utils.responses import list_adapter, make_etag
+
+USER_FIELDS = list(UserResponse.model_fields.keys())
+
+def validate_user_rows(rows) -> list[UserResponse]:
+    # one pydantic-core call for the whole list; dicts validate several times faster than ORM objects or Rows
+    return list_adapter(UserResponse).validate_python([dict(zip(USER_FIELDS, row)) for row in rows])
+
+def identifier_filter(identifier) -> dict:
+    if isinstance(identifier, int):
+        return {"id": identifier}
+    if "@" in identifier:
+        return {"email": identifier}
+    return {"username": identifier}
+
+def user_etag(user_id: int, updated_at) -> str:
+    # every write to the fields of UserResponse goes through the ORM, which bumps updated_at
+    return make_etag(UserResponse, user_id, updated_at)
+
+async def duplicate_user_error(user_repo: UserRepository, email: str, username: str) -> UserExistsError:
+    # only runs after an insert conflicted, to tell the caller which field clashed
+    taken_emails, taken_usernames = await user_repo.get_taken_emails_and_usernames([email], [username])
+    if email in taken_emails:
+        return UserExistsError("Email already registered")
+    if username in taken_usernames:
+        return UserExistsError("Username already taken")
+    return UserExistsError("User already exists")
 
 class UserService:
     def __init__(self, user_repo: UserRepository):
         self.user_repo = user_repo
     
     async def get_db_user(self, identifier) -> User:
-        if isinstance(identifier, int):
-            user = await self.user_repo.get_user_by_id(identifier)
-        elif "@" in identifier:
-            user = await self.user_repo.get_user_by_email(identifier)
-        else:
-            user = await self.user_repo.get_user_by_username(identifier)
+        user = await self.user_repo.get_user(**identifier_filter(identifier))
         
         if not user:
             raise UserNotFoundError("Can not find user with identifier: {identifier}")
 
         return user
 
-    async def create_user(self, user_data: UserCreate) -> UserResponse:
-        async def operations():
-            # check if user already exists
-            existing_user = await self.user_repo.get_user_by_email(user_data.email)
-            if existing_user:
-                raise UserExistsError("User already exists")
-
-            username = user_data.username if user_data.username else user_data.email.split("@")[0]
-            # create new user
-            new_user = await self.user_repo.create_user(
-                User(username=username, email=user_data.email)
-            )
+    async def get_cached_user(self, identifier) -> CachedUser:
+        """The profile from the user cache, loaded from the database on a miss. Writes use get_db_user."""
+        (field, value), = identifier_filter(identifier).items()
+        cached = await user_cache.get(field, value)
+        if cached is None:
+            cached = await user_cache.put(await self.get_db_user(identifier))
+        return cached
 
-            # create new user auth
-            await self.user_repo.create_user_auth(
-                UserAuth(user_id=new_user.id, password=hash_password(user_data.password))
-            )
+    async def create_user(self, user_data: UserCreate) -> UserResponse:
+        # hash before the transaction starts so no connection is held while bcrypt runs
+        hashed_password = await hash_password_async(user_data.password)
 
-            return new_user
+        username = user_data.username if user_data.username else user_data.email.split("@")[0]
 
-        # execute operations inside a transaction
-        new_user = await self.user_repo.execute_in_transaction(operations)
+        # user and auth are inserted by one statement that reports a conflict instead of failing
+        new_user = await self.user_repo.insert_user_with_auth(username, user_data.email, hashed_password)
 
         if not new_user:
-            raise UserCreateError("User create error")
+            raise await duplicate_user_error(self.user_repo, user_data.email, username)
         
         return UserResponse.model_validate(new_user)
 
     async def get_user(self, identifier) -> UserResponse:
+        return (await self.get_cached_user(identifier)).profile
+
+    async def get_user_etag(self, identifier) -> str:
+        (field, value), = identifier_filter(identifier).items()
+        cached = await user_cache.get(field, value)
+        if cached is not None:
+            return user_etag(cached.profile.id, cached.updated_at)
+        version = await self.user_repo.get_user_version(**identifier_filter(identifier))
+        if not version:
+            raise UserNotFoundError(f"Can not find user with identifier: {identifier}")
+        return user_etag(version.id, version.updated_at)
+
+    async def get_user_with_etag(self, identifier) -> tuple[UserResponse, str]:
+        cached = await self.get_cached_user(identifier)
+        return cached.profile, user_etag(cached.profile.id, cached.updated_at)
+    
+    async def vote(self, identifier, field: str) -> CounterResponse:
         user = await self.get_db_user(identifier)
+        await counters.incr("users", user.id, field)
+        trust_scores.record(user.id, **{f"{field}_received": 1})
+        totals = await counters.totals("users", [user])
+        return CounterResponse(**totals[user.id])
 
-        if not user:
-            raise UserNotFoundError("Can not find user with identifier: {identifier}")
-        
-        return UserResponse.model_validate(user)
-    
     async def update_user(self, identifier, user_data: UserUpdate) -> UserResponse:
         user = await self.get_db_user(identifier)
 
@@ -64,15 +101,24 @@ class UserService:
             raise UserNotFoundError("Can not find user with identifier: {identifier}")
         
         # update user fields
+        old_role = user.role
+        old_keys = profile_keys(user)
         for field, value in user_data.model_dump(exclude_unset=True).items():
             if value is not None:  # only update fields that are not None
                 setattr(user, field, value)
 
+        # a role change invalidates the claims in tokens already issued
+        if user.role != old_role:
+            user.token_epoch = (user.token_epoch or 0) + 1
+
         # update user in database
         updated_user = await self.user_repo.update_user(user)
 
         if not updated_user:
             raise UserUpdateError("User update error")
+
+        token_epochs.bump(updated_user.id, updated_user.token_epoch)
+        await user_cache.invalidate(old_keys + profile_keys(updated_user))
         
         # validate and return updated user
         return UserResponse.model_validate(updated_user)
@@ -83,11 +129,26 @@ class UserService:
         if not user:
             raise UserNotFoundError("Can not find user with identifier: {identifier}")
            
+        user.token_epoch = (user.token_epoch or 0) + 1
         await self.user_repo.delete_user(user)
 
         if user.status != "inactive":
             raise UserDeleteError("User delete error")
 
+        token_epochs.bump(user.id, user.token_epoch)
+        await user_cache.invalidate(profile_keys(user))
+
     async def get_all_users(self) -> list[UserResponse]:
-        users = await self.user_repo.get_all_users()
-        return [UserResponse.model_validate(user) for user in users]
+        return validate_user_rows(await self.user_repo.get_all_users(USER_FIELDS))
+
+    async def get_users_page(self, cursor: int | None = None, limit: int = 100) -> tuple[list[UserResponse], int | None]:
+        # fetch one extra row to know whether another page exists
+        rows = await self.user_repo.get_users_page(USER_FIELDS, after_id=cursor, limit=limit + 1)
+        users = validate_user_rows(rows[:limit])
+        next_cursor = users[-1].id if len(rows) > limit else None
+        return users, next_cursor
+
+    async def stream_users(self, cursor: int | None = None):
+        # one NDJSON chunk per fetched batch
+        async for rows in self.user_repo.stream_user_rows(USER_FIELDS, after_id=cursor):
+            yield "".join(user.model_dump_json() + "\n" for user in validate_user_rows(rows))
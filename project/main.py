@@ -1,35 +1,106 @@
-import os
+import asyncio
 import logging
-import uvicorn
+from time import perf_counter
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
+from sqlalchemy.exc import DBAPIError
 from api.v1.users import router as user_router
 from api.v1.auth import router as auth_router
-from dotenv import load_dotenv
+from api.v1.metrics import router as metrics_router
+from api.v1.events import router as events_router
+from api.v1.notifications import router as notifications_router
+from api.v1.messages import router as messages_router
+from utils.security import password_hash_pool, hash_password_async, create_access_token, decode_access_token
+from utils.warmup import prefill_pool, exercise_routes
+from utils.oauth import oauth_provider
+from utils.tokens import key_ring_watcher
+from features.auth.token_epochs import token_epochs
+from features.auth.revocations import revocations
+from features.auth.login_attempts import login_attempt_buffer
+from features.counters.service import counters
+from features.notifications.fanout import notification_fanout
+from features.messages.messenger import messenger
+from features.trust.service import trust_scores
+from features.user.cache import user_cache
+from db.config import DB_POOL_CONFIG
+from db.session import engine
+from db.replicas import read_router, ReadYourWritesMiddleware
+from db.pubsub import pubsub
+from db.instrumentation import QueryStatsMiddleware
+from utils.config import settings
 
-# Load environment variables
-load_dotenv()
-
-# Get environment variables
-CORS_ALLOW_ORIGINS = os.getenv("CORS_ALLOW_ORIGINS", "http://localhost:8080").split(",")
+# read-only routes requested in-process before a worker starts accepting
+WARMUP_PATHS = ["/api/v1/events/?limit=1", "/api/v1/users/?limit=1", "/api/v1/auth/jwks"]
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+async def warm_up(app: FastAPI):
+    """Pays the first-request costs up front: DB connections, bcrypt workers, token keys, route serializers."""
+    started = perf_counter()
+    await prefill_pool(engine, DB_POOL_CONFIG["pool_size"])
+    for replica in read_router.replicas:
+        try:
+            await prefill_pool(replica, DB_POOL_CONFIG["pool_size"])
+        except (OSError, DBAPIError):
+            read_router.mark_down(replica)
+    # one hash per process of the pool, so each has imported bcrypt before the first login
+    await asyncio.gather(*(hash_password_async("warm-up") for _ in range(password_hash_pool.workers)))
+    decode_access_token(create_access_token({"sub": "warm-up"}))
+    await exercise_routes(app, WARMUP_PATHS)
+    logger.info(f"Warm-up done in {perf_counter() - started:.2f}s")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.auth_claims_only:
+        await token_epochs.start()
+    read_router.start()
+    key_ring_watcher.start()
+    await revocations.start()
+    login_attempt_buffer.start()
+    counters.start()
+    notification_fanout.start()
+    pubsub.start()
+    messenger.start()
+    trust_scores.start()
+    if settings.warmup_on_startup:
+        await warm_up(app)
+    yield
+    await trust_scores.stop()
+    await user_cache.stop()
+    await messenger.stop()
+    await pubsub.stop()
+    await notification_fanout.stop()
+    await counters.stop()
+    await login_attempt_buffer.stop()
+    await revocations.stop()
+    await key_ring_watcher.stop()
+    await read_router.stop()
+    await token_epochs.stop()
+    await oauth_provider.aclose()
+    password_hash_pool.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 # set up CORS
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=CORS_ALLOW_ORIGINS,
+    allow_origins=settings.cors_allow_origins,
     allow_credentials=True,
     allow_methods=["*"],  
     allow_headers=["*"],  
 )
 
+# pin a client's reads to the primary right after it writes
+app.add_middleware(ReadYourWritesMiddleware)
+
+# per-request query count / DB time (Server-Timing header + log line), sampled
+app.add_middleware(QueryStatsMiddleware)
+
 # Serve frontend
 #app.mount("/", StaticFiles(directory="/path/to/your/frontend/dist", html=True), name="static")
 
@@ -43,6 +114,12 @@ async def global_exception_handler(request, exc):
 
 app.include_router(user_router, prefix="/api/v1/users", tags=["Users"])
 app.include_router(auth_router, prefix="/api/v1/auth", tags=["Auth"])
+app.include_router(events_router, prefix="/api/v1/events", tags=["Events"])
+app.include_router(notifications_router, prefix="/api/v1/notifications", tags=["Notifications"])
+app.include_router(messages_router, prefix="/api/v1/messages", tags=["Messages"])
+app.include_router(metrics_router, prefix="/api/v1/metrics", tags=["Metrics"])
 
 if __name__ == "__main__":
+    # single process for development; production runs serve.py
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
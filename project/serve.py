@@ -0,0 +1,30 @@
+import argparse
+import os
+from utils.config import settings
+from utils.launcher import serve
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Production server: pre-forked workers on one socket. "
+        "SIGHUP restarts the workers one at a time, each warmed up before the old one stops; SIGTERM stops gracefully."
+    )
+    parser.add_argument("--host", default=settings.web_host)
+    parser.add_argument("--port", type=int, default=settings.web_port)
+    parser.add_argument("--workers", type=int, default=settings.web_concurrency)
+    args = parser.parse_args()
+    workers = max(1, args.workers)
+    # the workers read their settings again; each sizes its share of the machine (password hash pool) by this
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+
+    serve(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        ready_timeout=settings.web_ready_timeout_seconds,
+        backlog=settings.web_backlog,
+        timeout_graceful_shutdown=settings.web_graceful_timeout_seconds,
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+from utils.bloom import BloomFilter
+
+def test_added_items_are_always_found():
+    bloom = BloomFilter.from_items((f"jti-{i}" for i in range(5000)), capacity=5000)
+    assert all(f"jti-{i}" in bloom for i in range(5000))
+    assert len(bloom) == 5000
+
+def test_false_positive_rate_stays_near_error_rate():
+    bloom = BloomFilter.from_items((f"jti-{i}" for i in range(10000)), capacity=10000, error_rate=0.01)
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 10000 * 0.01 * 2
+
+def test_empty_filter_contains_nothing():
+    bloom = BloomFilter(0)
+    assert bloom.capacity == 1
+    assert "anything" not in bloom
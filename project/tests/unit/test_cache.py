@@ -0,0 +1,112 @@
+import asyncio
+import time
+from datetime import datetime
+import pytest
+from db.models.users import User
+from features.user.cache import UserCache, cache_key
+from utils.cache import LocalStore, TTLCache
+from utils.pubsub import LocalPubSub
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    return clock
+
+def make_user(user_id: int = 1, username: str = "bob") -> User:
+    return User(id=user_id, username=username, email=f"{username}@example.com", role="user", updated_at=datetime(2025, 1, 1))
+
+def make_cache(pubsub=None, store=None) -> UserCache:
+    return UserCache(100, ttl=60, store=store, store_ttl=300, pubsub=pubsub or LocalPubSub(), settle_seconds=2)
+
+def test_ttl_cache_expires_entries(clock):
+    cache = TTLCache(max_size=10, ttl=5)
+    cache.put("a", 1)
+    clock.now += 4.9
+    assert cache.get("a") == 1
+    clock.now += 0.1
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+def test_ttl_cache_evicts_least_recently_used(clock):
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+def test_ttl_cache_of_size_zero_keeps_nothing(clock):
+    cache = TTLCache(max_size=0, ttl=60)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+
+def test_user_is_cached_under_every_identifier(clock):
+    cache = make_cache()
+
+    async def run():
+        assert await cache.get("id", 1) is None
+        await cache.put(make_user())
+        return [await cache.get(field, value) for field, value in (("id", 1), ("email", "bob@example.com"), ("username", "bob"))]
+
+    profiles = asyncio.run(run())
+    assert [cached.profile.id for cached in profiles] == [1, 1, 1]
+    assert (cache.l1_hits, cache.misses) == (3, 1)
+
+def test_store_hit_refills_l1(clock):
+    cache = make_cache(store=LocalStore())
+
+    async def run():
+        await cache.put(make_user())
+        cache.l1.discard([cache_key("id", 1), cache_key("username", "bob")])
+        return await cache.get("id", 1)
+
+    assert asyncio.run(run()).profile.username == "bob"
+    assert cache.l2_hits == 1
+    assert cache.l1.get(cache_key("username", "bob")) is not None
+
+def test_invalidated_user_is_not_cached_while_settling(clock):
+    store = LocalStore()
+    cache = make_cache(store=store)
+    keys = [cache_key("id", 1), cache_key("email", "bob@example.com"), cache_key("username", "bob")]
+
+    async def run():
+        await cache.put(make_user())
+        await cache.invalidate(keys)
+        assert await cache.get("id", 1) is None
+        # loaded during the settle window: may predate the write, so not cached
+        await cache.put(make_user())
+        assert await cache.get("id", 1) is None
+        assert await store.get(cache_key("id", 1)) is None
+        clock.now += 2
+        await cache.put(make_user())
+        assert await cache.get("id", 1) is not None
+
+    asyncio.run(run())
+    assert cache.invalidations == 1
+
+def test_invalidation_reaches_other_workers(clock):
+    pubsub = LocalPubSub()
+    this_worker, other_worker = make_cache(pubsub), make_cache(pubsub)
+    keys = [cache_key("id", 1)]
+
+    async def run():
+        await other_worker.put(make_user())
+        await this_worker.invalidate(keys)
+        # LocalPubSub delivers on the next loop iteration
+        await asyncio.sleep(0)
+        assert await other_worker.get("id", 1) is None
+        await other_worker.put(make_user())
+        assert await other_worker.get("id", 1) is None
+
+    asyncio.run(run())
+    assert other_worker.invalidations_received == 1
@@ -0,0 +1,92 @@
+import asyncio
+from utils.counters import CounterBuffer
+
+class Writer:
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.release = None
+        self.flushed = []
+
+    async def __call__(self, deltas: dict):
+        if self.release is not None:
+            await self.release.wait()
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("database unavailable")
+        self.flushed.append({key: dict(fields) for key, fields in deltas.items()})
+
+def test_increments_to_one_row_are_summed():
+    writer = Writer()
+    buffer = CounterBuffer(writer, flush_interval=60, max_keys=100)
+    for _ in range(3):
+        buffer.incr("events", 1, "likes")
+    buffer.incr("events", 1, "dislikes", 2)
+    buffer.incr("users", 1, "likes")
+    assert buffer.pending("events", 1) == {"likes": 3, "dislikes": 2}
+    asyncio.run(buffer.flush())
+    assert writer.flushed == [{("events", 1): {"likes": 3, "dislikes": 2}, ("users", 1): {"likes": 1}}]
+    assert buffer.pending("events", 1) == {}
+    assert buffer.stats() == {"pending_rows": 0, "increments": 5, "flushes": 1, "flushed_rows": 2, "failures": 0}
+
+def test_failed_flush_is_merged_back():
+    writer = Writer(failures=1)
+    buffer = CounterBuffer(writer, flush_interval=60, max_keys=100)
+    buffer.incr("events", 1, "likes")
+    asyncio.run(buffer.flush())
+    buffer.incr("events", 1, "likes")
+    assert buffer.pending("events", 1) == {"likes": 2}
+    asyncio.run(buffer.flush())
+    assert writer.flushed == [{("events", 1): {"likes": 2}}]
+    assert buffer.failures == 1
+
+def test_deltas_being_flushed_stay_pending_until_written():
+    writer = Writer()
+    buffer = CounterBuffer(writer, flush_interval=60, max_keys=100)
+
+    async def run():
+        writer.release = asyncio.Event()
+        buffer.incr("events", 1, "likes", 3)
+        flush = asyncio.create_task(buffer.flush())
+        await asyncio.sleep(0)
+        buffer.incr("events", 1, "likes")
+        during = buffer.pending("events", 1)
+        writer.release.set()
+        await flush
+        return during
+
+    assert asyncio.run(run()) == {"likes": 4}
+    assert buffer.pending("events", 1) == {"likes": 1}
+
+def test_max_keys_wakes_the_flush_task():
+    writer = Writer()
+    buffer = CounterBuffer(writer, flush_interval=60, max_keys=2)
+
+    async def run():
+        buffer.start()
+        buffer.incr("events", 1, "likes")
+        buffer.incr("events", 2, "likes")
+        await asyncio.sleep(0.05)
+        flushed = list(writer.flushed)
+        await buffer.stop()
+        return flushed
+
+    assert asyncio.run(run()) == [{("events", 1): {"likes": 1}, ("events", 2): {"likes": 1}}]
+
+def test_stop_during_a_flush_keeps_every_delta():
+    writer = Writer()
+    buffer = CounterBuffer(writer, flush_interval=0.01, max_keys=100)
+
+    async def run():
+        writer.release = asyncio.Event()
+        buffer.start()
+        buffer.incr("events", 1, "likes")
+        await asyncio.sleep(0.03)
+        # the flush task is waiting on the write; more arrives, then shutdown starts
+        buffer.incr("events", 1, "likes")
+        stop = asyncio.create_task(buffer.stop())
+        await asyncio.sleep(0.01)
+        writer.release.set()
+        await stop
+
+    asyncio.run(run())
+    assert sum(deltas[("events", 1)]["likes"] for deltas in writer.flushed) == 2
@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from features.notifications import fanout
+from features.notifications.fanout import NotificationFanout
+
+class Job:
+    """A claimed job whose attributes can not be read once a rollback expired it, as on an AsyncSession."""
+    def __init__(self, job_id: int, attempts: int):
+        self._values = {"id": job_id, "attempts": attempts, "total_recipients": 0, "last_participant_id": 0}
+        self.expired = False
+
+    def __getattr__(self, name):
+        if self.expired:
+            raise RuntimeError(f"{name} read after rollback")
+        return self._values[name]
+
+class Session:
+    def __init__(self, jobs: list[Job]):
+        self.jobs = jobs
+        self.claimed = []
+        self.finished = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def rollback(self):
+        for job in self.claimed:
+            job.expired = True
+
+class Repository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    async def claim_job(self, stale_after):
+        if not self.db.jobs:
+            return None
+        self.db.claimed.append(self.db.jobs.pop(0))
+        return self.db.claimed[-1]
+
+    async def finish_job(self, job_id: int, status: str, error: str | None = None):
+        self.db.finished.append((job_id, status, error))
+
+@pytest.fixture
+def session(monkeypatch):
+    session = Session([])
+    monkeypatch.setattr(fanout, "SessionLocal", lambda: session)
+    monkeypatch.setattr(fanout, "NotificationRepository", Repository)
+    return session
+
+async def broken_fan_out(repo, job):
+    await repo.db.rollback()  # expire the job as a real rollback would, then fail
+    raise RuntimeError("fan-out failed")
+
+def test_failed_job_is_put_back_to_pending(session, monkeypatch):
+    runner = NotificationFanout(chunk_size=10, poll_interval=60, stale_after=60, max_attempts=3)
+    monkeypatch.setattr(runner, "_fan_out", broken_fan_out)
+    session.jobs.append(Job(7, attempts=1))
+    asyncio.run(runner.run_pending())
+    assert session.finished == [(7, "pending", "fan-out failed")]
+    assert runner.jobs_failed == 0
+
+def test_job_out_of_attempts_is_failed(session, monkeypatch):
+    runner = NotificationFanout(chunk_size=10, poll_interval=60, stale_after=60, max_attempts=3)
+    monkeypatch.setattr(runner, "_fan_out", broken_fan_out)
+    session.jobs.extend([Job(7, attempts=3), Job(8, attempts=3)])
+    asyncio.run(runner.run_pending())
+    # a failed job does not stop the queue
+    assert session.finished == [(7, "failed", "fan-out failed"), (8, "failed", "fan-out failed")]
+    assert runner.jobs_failed == 2
@@ -0,0 +1,58 @@
+import asyncio
+import httpx
+import pytest
+from utils.oauth import CircuitBreaker, OAuthProvider, OAuthProviderUnavailableError
+
+def test_breaker_opens_after_threshold_and_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.allow_request()
+    assert breaker.state == "half_open"
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow_request()
+
+def test_failed_trial_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    assert not breaker.allow_request()
+    breaker.reset_timeout = 0
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+class Provider:
+    """Answers with each of `outcomes` in turn: a status code, or an exception to raise."""
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return httpx.Response(outcome, json={})
+
+def half_open_provider(*outcomes) -> tuple[OAuthProvider, CircuitBreaker]:
+    provider = OAuthProvider(transport=httpx.MockTransport(Provider(httpx.ConnectError("down"), *outcomes)))
+    breaker = provider._breakers["line"] = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    with pytest.raises(OAuthProviderUnavailableError):
+        asyncio.run(provider._get("line", "https://line.test/verify"))
+    assert breaker.state == "open"
+    return provider, breaker
+
+@pytest.mark.parametrize("error", [asyncio.CancelledError(), RuntimeError("bug")])
+def test_trial_that_ends_without_an_outcome_is_released(error):
+    provider, breaker = half_open_provider(error, 200)
+
+    async def run():
+        with pytest.raises(type(error)):
+            await provider._get("line", "https://line.test/verify")
+        # the next request is the new trial, and closes the circuit
+        return await provider._get("line", "https://line.test/verify")
+
+    assert asyncio.run(run()).status_code == 200
+    assert breaker.state == "closed"
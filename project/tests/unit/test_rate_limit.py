@@ -0,0 +1,51 @@
+from utils.rate_limit import SlidingWindowLimiter
+
+def test_allows_limit_hits_per_window():
+    limiter = SlidingWindowLimiter(limit=3, window=60)
+    assert [limiter.hit("ip", now=0) for _ in range(4)] == [True, True, True, False]
+    assert limiter.rejected == 1
+    # a rejected hit is not counted
+    assert limiter._counters["ip"][1] == 3
+
+def test_keys_are_counted_separately():
+    limiter = SlidingWindowLimiter(limit=1, window=60)
+    assert limiter.hit("a", now=0)
+    assert limiter.hit("b", now=0)
+    assert not limiter.hit("a", now=1)
+
+def test_previous_window_is_weighted_by_its_overlap():
+    limiter = SlidingWindowLimiter(limit=10, window=60)
+    for _ in range(10):
+        limiter.hit("ip", now=59)
+    # a quarter into the next window, 3/4 of the previous 10 hits still count
+    assert [limiter.hit("ip", now=75) for _ in range(3)] == [True, True, True]
+    assert not limiter.hit("ip", now=75)
+    # two windows later the old hits are gone
+    assert limiter.hit("ip", now=180)
+
+def test_retry_after():
+    limiter = SlidingWindowLimiter(limit=2, window=60)
+    assert limiter.retry_after("ip", now=0) == 0
+    limiter.hit("ip", now=10)
+    assert limiter.retry_after("ip", now=10) == 0
+    limiter.hit("ip", now=10)
+    assert limiter.retry_after("ip", now=10) == 50
+
+def test_reset_forgets_the_key():
+    limiter = SlidingWindowLimiter(limit=1, window=60)
+    limiter.hit("ip", now=0)
+    limiter.reset("ip")
+    assert limiter.hit("ip", now=1)
+
+def test_sweep_drops_idle_keys():
+    limiter = SlidingWindowLimiter(limit=5, window=60, sweep_every=3)
+    limiter.hit("old", now=0)
+    limiter.hit("new", now=200)
+    limiter.hit("new", now=200)
+    assert set(limiter._counters) == {"new"}
+
+def test_limit_of_zero_allows_everything():
+    limiter = SlidingWindowLimiter(limit=0, window=60)
+    assert all(limiter.hit("ip", now=0) for _ in range(100))
+    assert limiter.retry_after("ip", now=0) == 0
+    assert limiter.rejected == 0
@@ -0,0 +1,28 @@
+from datetime import datetime
+from features.user.schemas import UserResponse
+from utils.responses import etag_matches, make_etag
+
+ETAG = make_etag(UserResponse, 1, datetime(2025, 1, 1))
+
+def test_etag_changes_with_its_parts():
+    assert ETAG == make_etag(UserResponse, 1, datetime(2025, 1, 1))
+    assert ETAG != make_etag(UserResponse, 1, datetime(2025, 1, 2))
+    assert ETAG.startswith('"') and ETAG.endswith('"')
+
+def test_etag_matches_exact_tag():
+    assert etag_matches(ETAG, ETAG)
+    assert not etag_matches('"other"', ETAG)
+
+def test_etag_matches_weak_tag():
+    assert etag_matches(f"W/{ETAG}", ETAG)
+
+def test_etag_matches_any_tag_in_a_list():
+    assert etag_matches(f'"other", W/{ETAG} , "third"', ETAG)
+    assert not etag_matches('"other", "third"', ETAG)
+
+def test_etag_matches_wildcard():
+    assert etag_matches(" * ", ETAG)
+
+def test_etag_without_if_none_match():
+    assert not etag_matches(None, ETAG)
+    assert not etag_matches("", ETAG)
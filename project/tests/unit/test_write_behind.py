@@ -0,0 +1,86 @@
+import asyncio
+from utils.write_behind import WriteBehindBuffer
+
+class Writer:
+    def __init__(self, failures: int = 0, delay: float = 0):
+        self.failures = failures
+        self.delay = delay
+        self.batches = []
+
+    async def __call__(self, rows: list):
+        await asyncio.sleep(self.delay)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("database unavailable")
+        self.batches.append(rows)
+
+def test_flush_writes_in_batches():
+    writer = Writer()
+    buffer = WriteBehindBuffer("test", writer, batch_size=2, flush_interval=60, max_pending=100)
+    for row in range(5):
+        buffer.add(row)
+    asyncio.run(buffer.flush())
+    assert writer.batches == [[0, 1], [2, 3], [4]]
+    assert buffer.stats() == {"pending": 0, "written": 5, "batches": 3, "dropped": 0, "retried": 0, "failed": 0}
+
+def test_rows_over_max_pending_are_dropped():
+    buffer = WriteBehindBuffer("test", Writer(), batch_size=10, flush_interval=60, max_pending=2)
+    for row in range(3):
+        buffer.add(row)
+    assert buffer.is_full()
+    assert buffer.stats()["pending"] == 2
+    assert buffer.dropped == 1
+
+def test_failed_batch_is_discarded_without_retries():
+    writer = Writer(failures=1)
+    buffer = WriteBehindBuffer("test", writer, batch_size=2, flush_interval=60, max_pending=100)
+    for row in range(3):
+        buffer.add(row)
+    asyncio.run(buffer.flush())
+    assert writer.batches == [[2]]
+    assert buffer.failed == 2
+
+def test_failed_batch_is_retried_with_the_next_flush():
+    writer = Writer(failures=2)
+    buffer = WriteBehindBuffer("test", writer, batch_size=2, flush_interval=60, max_pending=100, retries=2)
+    for row in range(3):
+        buffer.add(row)
+
+    async def flush_three_times():
+        for _ in range(3):
+            await buffer.flush()
+
+    asyncio.run(flush_three_times())
+    assert writer.batches == [[0, 1], [2]]
+    assert buffer.retried == 4
+    assert buffer.failed == 0
+
+def test_batch_size_rows_wake_the_flush_task():
+    writer = Writer()
+    buffer = WriteBehindBuffer("test", writer, batch_size=2, flush_interval=60, max_pending=100)
+
+    async def run():
+        buffer.start()
+        buffer.add(0)
+        buffer.add(1)
+        await asyncio.sleep(0.05)
+        flushed = list(writer.batches)
+        await buffer.stop()
+        return flushed
+
+    assert asyncio.run(run()) == [[0, 1]]
+
+def test_stop_during_a_flush_keeps_every_row():
+    writer = Writer(delay=0.05)
+    buffer = WriteBehindBuffer("test", writer, batch_size=2, flush_interval=0.01, max_pending=100)
+
+    async def run():
+        buffer.start()
+        for row in range(5):
+            buffer.add(row)
+        # the flush task is now in the middle of writing a batch
+        await asyncio.sleep(0.02)
+        await buffer.stop()
+
+    asyncio.run(run())
+    assert sorted(row for batch in writer.batches for row in batch) == [0, 1, 2, 3, 4]
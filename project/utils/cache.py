@@ -0,0 +1,111 @@
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+class TTLCache:
+    """
+    Bounded LRU of entries that expire `ttl` seconds after they were put.
+    """
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+
+    def get(self, key) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        if self.max_size <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def discard(self, keys):
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisStore:
+    """
+    Byte values with a TTL in Redis or anything speaking its protocol (Valkey, KeyDB, Dragonfly),
+    shared by every worker. The client is imported when the store is created, so redis is only
+    needed where one is configured.
+    """
+    shared = True
+
+    def __init__(self, url: str, timeout: float = 0.5):
+        import redis.asyncio
+
+        self.url = url
+        self._client = redis.asyncio.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._client.get(key)
+
+    async def set_many(self, items: dict[str, bytes], ttl: float):
+        async with self._client.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(key, value, px=int(ttl * 1000))
+            await pipe.execute()
+
+    async def delete(self, keys: list[str]):
+        await self._client.delete(*keys)
+
+    async def close(self):
+        await self._client.aclose()
+
+    def stats(self) -> dict:
+        return {"backend": "redis"}
+
+
+class LocalStore:
+    """
+    Same interface as RedisStore, kept in this process: a stand-in for a single worker and for tests.
+    Not shared, so every worker has to drop invalidated keys from its own copy.
+    """
+    shared = False
+
+    def __init__(self, max_size: int = 100000):
+        self.max_size = max_size
+        self._entries: dict[str, tuple[float, bytes]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    async def set_many(self, items: dict[str, bytes], ttl: float):
+        expires_at = time.monotonic() + ttl
+        for key, value in items.items():
+            self._entries.pop(key, None)
+            self._entries[key] = (expires_at, value)
+        # dicts keep insertion order, so the first keys are the oldest
+        while len(self._entries) > self.max_size:
+            del self._entries[next(iter(self._entries))]
+
+    async def delete(self, keys: list[str]):
+        self.discard(keys)
+
+    def discard(self, keys: list[str]):
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def close(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"backend": "local", "size": len(self._entries)}
@@ -0,0 +1,155 @@
+import os
+from functools import lru_cache
+from typing import Literal, Optional
+from dotenv import dotenv_values
+from pydantic import BaseModel, ConfigDict, field_validator
+
+CPU_COUNT = os.cpu_count() or 1
+
+class Settings(BaseModel):
+    """
+    Every setting the app reads, with its type and default (see .env.sample).
+    Field names are the environment variable names in lower case.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    # FastAPI
+    cors_allow_origins: list[str] = ["http://localhost:8080"]
+    warmup_on_startup: bool = True
+    # max-age of user and event detail responses; 0 sends no-cache, so clients revalidate with If-None-Match every time
+    http_cache_max_age_seconds: int = 0
+
+    # Web server (serve.py)
+    web_host: str = "0.0.0.0"
+    web_port: int = 8000
+    web_concurrency: int = CPU_COUNT
+    web_backlog: int = 2048
+    web_ready_timeout_seconds: float = 60
+    web_graceful_timeout_seconds: int = 30
+
+    # JWT
+    jwt_algorithm: str = "HS256"
+    access_token_secret_key: Optional[str] = None
+    refresh_token_secret_key: Optional[str] = None
+    access_token_expire_minutes: int = 30
+    refresh_token_expire_days: int = 30
+    # JSON file describing the "access" and "refresh" key rings; without it the legacy
+    # ACCESS/REFRESH_TOKEN_SECRET_KEY + JWT_ALGORITHM pair is used as a single key with kid "default"
+    jwt_keys_file: Optional[str] = None
+    jwt_keys_reload_seconds: float = 30
+    verified_token_cache_size: int = 10000
+    auth_claims_only: bool = False
+    token_epoch_refresh_seconds: float = 30
+    revocation_sync_seconds: float = 5
+    revocation_rebuild_seconds: float = 3600
+    revocation_bloom_capacity: int = 100000
+    revocation_bloom_error_rate: float = 0.001
+
+    # Login
+    # 0 turns a limit off (load tests, which log in from one IP)
+    login_rate_limit_per_ip: int = 30
+    login_rate_limit_ip_window_seconds: float = 60
+    login_rate_limit_per_account: int = 5
+    login_rate_limit_account_window_seconds: float = 300
+    login_attempt_batch_size: int = 500
+    login_attempt_flush_seconds: float = 1.0
+    login_attempt_max_pending: int = 50000
+
+    # Password hashing
+    # defaults to the CPU cores shared out among the WEB_CONCURRENCY workers, each of which has its own pool
+    password_hash_workers: Optional[int] = None
+    # defaults to 4 per worker
+    password_hash_max_queue: Optional[int] = None
+    password_hash_queue_timeout: float = 2.0
+
+    # OAuth
+    google_client_id: Optional[str] = None
+    google_redirect_uri: Optional[str] = None
+    google_jwks_url: str = "https://www.googleapis.com/oauth2/v3/certs"
+    google_tokeninfo_url: str = "https://oauth2.googleapis.com/tokeninfo"
+    line_verify_url: str = "https://api.line.me/oauth2/v2.1/verify"
+    oauth_http_timeout: float = 5.0
+    oauth_http_max_connections: int = 20
+    oauth_circuit_failure_threshold: int = 5
+    oauth_circuit_reset_seconds: float = 30
+
+    # Users
+    bulk_import_batch_size: int = 1000
+    # profiles looked up by id, email or username; 0 turns the per-worker LRU off
+    user_cache_size: int = 10000
+    user_cache_ttl_seconds: float = 30
+    # none: no shared store; local: in-process stand-in (single worker, tests); redis: any Redis-compatible server
+    user_cache_store: Literal["none", "local", "redis"] = "none"
+    user_cache_redis_url: str = "redis://localhost:6379/0"
+    user_cache_store_ttl_seconds: float = 60
+
+    # Counters, notifications, messages, trust scores
+    # buffered: increments are summed in memory and flushed every COUNTER_FLUSH_SECONDS;
+    #           up to that many seconds of votes are lost if a worker dies.
+    # sharded:  every increment is committed to one of COUNTER_SHARDS rows in counter_shards,
+    #           rolled up into the owning row every COUNTER_FLUSH_SECONDS; nothing is lost.
+    # direct:   every increment updates the owning row (the old behaviour).
+    counter_mode: Literal["buffered", "sharded", "direct"] = "buffered"
+    counter_flush_seconds: float = 1.0
+    counter_max_pending_rows: int = 10000
+    counter_shards: int = 16
+    notification_fanout_chunk_size: int = 1000
+    notification_fanout_poll_seconds: float = 5
+    notification_job_stale_seconds: float = 60
+    notification_job_max_attempts: int = 3
+    # postgres: LISTEN/NOTIFY on the primary reaches every worker; local: this process only (single worker, tests)
+    pubsub_backend: Literal["postgres", "local"] = "postgres"
+    pubsub_reconnect_seconds: float = 5
+    # in characters; a message also crosses workers in one NOTIFY payload of at most 8000 bytes of UTF-8,
+    # so one whose frame does not fit (mostly 4-byte characters) is rejected as too long
+    message_max_length: int = 2000
+    message_max_connections: int = 50000
+    message_send_queue_size: int = 64
+    message_send_timeout_seconds: float = 10
+    message_batch_size: int = 500
+    message_flush_seconds: float = 0.2
+    message_max_pending: int = 50000
+    message_write_retries: int = 5
+    message_known_users_cache_size: int = 10000
+    trust_flush_seconds: float = 5.0
+    trust_max_pending_users: int = 10000
+
+    # Database
+    db_host: str = "localhost"
+    db_port: int = 5432
+    db_user: str = "postgres"
+    db_password: str = "password"
+    db_name: str = "postgres"
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_cache_size: int = 100
+    db_pgbouncer: bool = False
+    db_read_replicas: list[str] = []
+    db_replica_health_check_seconds: float = 10
+    db_read_your_writes_seconds: int = 5
+    # fraction of requests whose queries are measured (1.0 = all, 0 = off)
+    sql_instrumentation_sample_rate: float = 0.05
+    # the same statement this many times in one request is reported as a likely N+1
+    sql_n_plus_one_threshold: int = 5
+
+    @field_validator("cors_allow_origins", "db_read_replicas", mode="before")
+    @classmethod
+    def split_comma_separated(cls, value):
+        if isinstance(value, str):
+            return [item.strip() for item in value.split(",") if item.strip()]
+        return value
+
+    @classmethod
+    def from_env(cls, environ: dict) -> "Settings":
+        return cls(**{name: environ[name.upper()] for name in cls.model_fields if name.upper() in environ})
+
+@lru_cache
+def get_settings() -> Settings:
+    """Reads .env once; variables set in the environment take precedence over it."""
+    dotenv = {name: value for name, value in dotenv_values().items() if value is not None}
+    return Settings.from_env({**dotenv, **os.environ})
+
+settings = get_settings()
@@ -0,0 +1,65 @@
+import logging
+from collections import defaultdict
+from utils.flush_loop import PeriodicFlusher
+
+logger = logging.getLogger(__name__)
+
+class CounterBuffer(PeriodicFlusher):
+    """
+    Sums counter increments in memory, keyed by (entity, entity_id) then field, and hands the
+    accumulated deltas to `flush_func(deltas)` every `flush_interval` seconds (or as soon as
+    `max_keys` rows have pending deltas). Many increments to one hot row become one UPDATE.
+    If a flush fails, its deltas are merged back and retried with the next flush.
+    """
+    def __init__(self, flush_func, flush_interval: float, max_keys: int):
+        super().__init__(flush_interval)
+        self._flush_func = flush_func
+        self.max_keys = max_keys
+        self._deltas = defaultdict(lambda: defaultdict(int))
+        # deltas handed to a flush that has not committed yet
+        self._in_flight = {}
+        self.increments = 0
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.failures = 0
+
+    def incr(self, entity: str, entity_id: int, field: str, delta: int = 1):
+        self._deltas[(entity, entity_id)][field] += delta
+        self.increments += 1
+        if len(self._deltas) >= self.max_keys:
+            self.wake()
+
+    def pending(self, entity: str, entity_id: int) -> dict:
+        """Deltas not yet committed: buffered ones plus those of a flush still in progress."""
+        pending = {}
+        for deltas in (self._in_flight.get((entity, entity_id)), self._deltas.get((entity, entity_id))):
+            for field, delta in (deltas or {}).items():
+                pending[field] = pending.get(field, 0) + delta
+        return pending
+
+    async def _flush(self):
+        if not self._deltas:
+            return
+        deltas, self._deltas = self._deltas, defaultdict(lambda: defaultdict(int))
+        self._in_flight = deltas
+        try:
+            await self._flush_func(deltas)
+            self.flushes += 1
+            self.flushed_rows += len(deltas)
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Counter flush of {len(deltas)} rows failed, retrying with the next flush: {e}")
+            for key, fields in deltas.items():
+                for field, delta in fields.items():
+                    self._deltas[key][field] += delta
+        finally:
+            self._in_flight = {}
+
+    def stats(self) -> dict:
+        return {
+            "pending_rows": len(self._deltas),
+            "increments": self.increments,
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "failures": self.failures,
+        }
@@ -0,0 +1,52 @@
+import asyncio
+
+class PeriodicFlusher:
+    """
+    Base for in-memory buffers written out by a background task: `_flush()` runs every
+    `flush_interval` seconds, as soon as `wake()` is called, and once more on `stop()`.
+    Flushes never overlap. `stop()` does not cancel the task: a flush in progress has already taken
+    its rows out of the buffer, so it is let finish before the final flush.
+    """
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        self._wakeup = None
+        self._flush_lock = None
+        self._task = None
+        self._stopping = False
+
+    async def _flush(self):
+        raise NotImplementedError
+
+    def wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def flush(self):
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            await self._flush()
+
+    async def _flush_periodically(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self):
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        # whatever is still buffered is written before shutdown
+        await self.flush()
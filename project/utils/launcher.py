@@ -0,0 +1,134 @@
+import importlib.util
+import logging
+import os
+import time
+from uvicorn import Config, Server
+from uvicorn._subprocess import spawn
+from uvicorn.supervisors.multiprocess import Multiprocess, Process
+
+logger = logging.getLogger("uvicorn.error")
+
+# set in each worker process to the event its supervisor waits on
+_ready_event = None
+
+def event_loop_implementation() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+def http_implementation() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+class ReadyServer(Server):
+    """
+    Reports ready once startup is done: the lifespan (with its warm-up) has run and the
+    server is accepting on the shared socket. Until then the kernel hands new connections
+    only to the workers that are already accepting.
+    """
+    async def startup(self, sockets=None):
+        await super().startup(sockets)
+        if self.started and _ready_event is not None:
+            logger.info(f"Worker [{os.getpid()}] ready")
+            _ready_event.set()
+
+class WorkerProcess(Process):
+    def __init__(self, config: Config, target, sockets):
+        self.ready = spawn.Event()
+        super().__init__(config, target, sockets)
+
+    def target(self, sockets=None):
+        global _ready_event
+        _ready_event = self.ready
+        return super().target(sockets)
+
+    def wait_ready(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not self.ready.wait(0.2):
+            if not self.process.is_alive() or time.monotonic() > deadline:
+                return False
+        return True
+
+class RollingMultiprocess(Multiprocess):
+    """
+    Pre-forked workers sharing one listening socket, like uvicorn's own supervisor, but SIGHUP
+    replaces workers one at a time: a new worker is started and warmed up, and only once it is
+    accepting is the old one sent SIGTERM to finish its in-flight requests and exit. A new worker
+    that does not get ready within `ready_timeout` aborts the restart and the old ones keep serving.
+    """
+    def __init__(self, config: Config, target, sockets, ready_timeout: float):
+        super().__init__(config, target, sockets)
+        self.ready_timeout = ready_timeout
+        self.retiring = []
+
+    def spawn_worker(self) -> WorkerProcess:
+        process = WorkerProcess(self.config, self.target, self.sockets)
+        process.start()
+        return process
+
+    def init_processes(self):
+        started = time.monotonic()
+        self.processes = [self.spawn_worker() for _ in range(self.processes_num)]
+        ready = sum(process.wait_ready(self.ready_timeout) for process in self.processes)
+        logger.info(f"{ready}/{self.processes_num} workers ready in {time.monotonic() - started:.1f}s")
+
+    def restart_all(self):
+        for idx, old in enumerate(list(self.processes)):
+            if self.should_exit.is_set():
+                return
+            new = self.spawn_worker()
+            if not new.wait_ready(self.ready_timeout):
+                logger.error(f"Worker [{new.pid}] did not get ready within {self.ready_timeout}s, stopping the restart")
+                new.kill()
+                new.join()
+                return
+            self.processes[idx] = new
+            old.terminate()
+            self.retiring.append(old)
+        logger.info(f"Rolling restart of {len(self.processes)} workers done")
+
+    def reap_retiring(self):
+        for process in list(self.retiring):
+            if process.process.exitcode is not None:
+                process.join()
+                self.retiring.remove(process)
+
+    def keep_subprocess_alive(self):
+        self.reap_retiring()
+        if self.should_exit.is_set():
+            return
+
+        for idx, process in enumerate(self.processes):
+            if process.is_alive():
+                continue
+
+            process.kill()
+            process.join()
+            if self.should_exit.is_set():
+                return
+            logger.info(f"Child process [{process.pid}] died")
+            self.processes[idx] = self.spawn_worker()
+
+    def join_all(self):
+        for process in self.processes + self.retiring:
+            process.join()
+
+    def handle_ttin(self):
+        logger.info("Received SIGTTIN, increasing the number of processes.")
+        self.processes_num += 1
+        self.processes.append(self.spawn_worker())
+
+def serve(app: str, host: str, port: int, workers: int, ready_timeout: float, **config):
+    """Binds the socket once and runs `workers` pre-forked workers of the `app` import string."""
+    config = Config(
+        app,
+        host=host,
+        port=port,
+        workers=workers,
+        loop=event_loop_implementation(),
+        http=http_implementation(),
+        **config,
+    )
+    logger.info(f"Starting {workers} workers on {host}:{port} (loop={config.loop}, http={config.http})")
+    sock = config.bind_socket()
+    try:
+        RollingMultiprocess(config, target=ReadyServer(config).run, sockets=[sock], ready_timeout=ready_timeout).run()
+    finally:
+        sock.close()
@@ -1,17 +1,191 @@
-import requests
+from __future__ import annotations
+import asyncio
+import re
+import time
+from typing import TYPE_CHECKING
+import jwt
+from utils.config import settings
 
-class OAuthProvider:
-    @staticmethod
-    def verify_google_token(token: str) -> dict:
-        response = requests.get(f"https://oauth2.googleapis.com/tokeninfo?id_token={token}")
-        print(f"reponse: {response}")
+if TYPE_CHECKING:
+    # imported on first use: most workers never verify an OAuth token
+    import httpx
+
+GOOGLE_ISSUERS = ["accounts.google.com", "https://accounts.google.com"]
+
+JWKS_DEFAULT_TTL_SECONDS = 3600
+JWKS_MIN_REFRESH_SECONDS = 60
+
+class OAuthProviderUnavailableError(Exception):
+    def __init__(self, message: str = "OAuth provider unavailable"):
+        self.message = message
+        super().__init__(self.message)
+
+class CircuitBreaker:
+    """
+    closed: requests flow normally.
+    open: after `failure_threshold` consecutive failures, requests fail fast for `reset_timeout` seconds.
+    half_open: one trial request is let through; its result closes or re-opens the circuit.
+    """
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow_request(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def release_trial(self):
+        """Ends a half-open trial whose outcome says nothing about the provider, so the next request is let through."""
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+class JWKSCache:
+    """
+    Caches a provider's signing keys for as long as its Cache-Control max-age allows.
+    An unknown `kid` triggers an early refresh (rate limited), which is how key rotation is picked up.
+    If a refresh fails, the previously fetched keys keep being used.
+    """
+    def __init__(self, url: str, fetch):
+        self.url = url
+        self._fetch = fetch
+        self._keys = {}
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get_key(self, kid: str) -> jwt.PyJWK:
+        now = time.monotonic()
+        if kid in self._keys and now < self._expires_at:
+            return self._keys[kid]
+
+        async with self._lock:
+            now = time.monotonic()
+            stale = now >= self._expires_at
+            unknown = kid not in self._keys and now - self._fetched_at >= JWKS_MIN_REFRESH_SECONDS
+            if stale or unknown:
+                try:
+                    await self._refresh()
+                except OAuthProviderUnavailableError:
+                    if not self._keys:
+                        raise
+
+        if kid not in self._keys:
+            raise ValueError("Unknown token signing key")
+        return self._keys[kid]
+
+    async def _refresh(self):
+        response = await self._fetch(self.url)
         if response.status_code != 200:
+            raise OAuthProviderUnavailableError("Failed to fetch signing keys")
+
+        keys = {}
+        for key_data in response.json().get("keys", []):
+            if "kid" in key_data:
+                keys[key_data["kid"]] = jwt.PyJWK(key_data)
+
+        max_age = re.search(r"max-age=(\d+)", response.headers.get("cache-control", ""))
+        ttl = int(max_age.group(1)) if max_age else JWKS_DEFAULT_TTL_SECONDS
+
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+        self._expires_at = self._fetched_at + ttl
+
+class OAuthProvider:
+    """
+    Verifies third-party tokens over one pooled async HTTP client.
+    Pass an httpx transport (e.g. httpx.MockTransport) to run against a local stub provider.
+    """
+    def __init__(self, transport: httpx.AsyncBaseTransport | None = None):
+        self._transport = transport
+        self._client = None
+        self._breakers = {
+            "google": CircuitBreaker(settings.oauth_circuit_failure_threshold, settings.oauth_circuit_reset_seconds),
+            "line": CircuitBreaker(settings.oauth_circuit_failure_threshold, settings.oauth_circuit_reset_seconds),
+        }
+        self.google_jwks = JWKSCache(settings.google_jwks_url, lambda url: self._get("google", url))
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            import httpx
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(settings.oauth_http_timeout),
+                limits=httpx.Limits(max_connections=settings.oauth_http_max_connections, max_keepalive_connections=settings.oauth_http_max_connections),
+                transport=self._transport,
+            )
+        return self._client
+
+    async def _get(self, provider: str, url: str, **kwargs) -> httpx.Response:
+        import httpx
+        breaker = self._breakers[provider]
+        if not breaker.allow_request():
+            raise OAuthProviderUnavailableError(f"{provider} is temporarily unavailable")
+
+        try:
+            response = await self._get_client().get(url, **kwargs)
+        except httpx.HTTPError:
+            breaker.record_failure()
+            raise OAuthProviderUnavailableError(f"{provider} request failed")
+        except BaseException:
+            # cancelled (client went away) or a bug on our side: a trial left in flight would keep the circuit open for good
+            breaker.release_trial()
+            raise
+
+        if response.status_code >= 500:
+            breaker.record_failure()
+            raise OAuthProviderUnavailableError(f"{provider} returned {response.status_code}")
+
+        breaker.record_success()
+        return response
+
+    async def verify_google_token(self, token: str) -> dict:
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.InvalidTokenError:
             raise ValueError("Invalid Google token")
-        return response.json()
-        
-    @staticmethod
-    def verify_line_token(token: str) -> dict:
-        response = requests.get(f"https://api.line.me/oauth2/v2.1/verify?access_token={token}")
+
+        # without a configured audience the token can only be checked remotely
+        if not settings.google_client_id or "kid" not in header:
+            response = await self._get("google", settings.google_tokeninfo_url, params={"id_token": token})
+            if response.status_code != 200:
+                raise ValueError("Invalid Google token")
+            return response.json()
+
+        key = await self.google_jwks.get_key(header["kid"])
+        try:
+            return jwt.decode(token, key.key, algorithms=["RS256"], audience=settings.google_client_id, issuer=GOOGLE_ISSUERS)
+        except jwt.InvalidTokenError:
+            raise ValueError("Invalid Google token")
+
+    async def verify_line_token(self, token: str) -> dict:
+        response = await self._get("line", settings.line_verify_url, params={"access_token": token})
         if response.status_code != 200:
             raise ValueError("Invalid LINE token")
         return response.json()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+oauth_provider = OAuthProvider()
@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_PAYLOAD_BYTES = 7999
+
+class PgPubSub:
+    """
+    Publish/subscribe between workers over Postgres LISTEN/NOTIFY, on one dedicated connection per
+    worker (a LISTENing connection can not go back to the pool).
+    `publish` only queues; a background task sends everything queued since its last round trip in
+    one statement, so a burst of publishes costs one query. Every worker, this one included,
+    gets each payload through the callbacks registered with `subscribe`.
+    Notifications are not persisted: whatever is published while a worker is disconnected is lost
+    for that worker, and the connection is reopened every `reconnect_interval` seconds.
+    """
+    def __init__(self, connect_kwargs: dict, reconnect_interval: float = 5.0, max_pending: int = 100000):
+        self.connect_kwargs = connect_kwargs
+        self.reconnect_interval = reconnect_interval
+        self.max_pending = max_pending
+        self._subscribers: dict[str, list] = {}
+        self._pending: list[tuple[str, str]] = []
+        self._conn = None
+        self._wakeup = None
+        self._task = None
+        self.published = 0
+        self.received = 0
+        self.dropped = 0
+        self.reconnects = 0
+
+    def subscribe(self, channel: str, callback):
+        """`callback(payload: str)` runs on the event loop for every notification on `channel`; it must not block."""
+        self._subscribers.setdefault(channel, []).append(callback)
+
+    def publish(self, channel: str, payload: str) -> bool:
+        if len(payload.encode()) > MAX_PAYLOAD_BYTES or len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return False
+        self._pending.append((channel, payload))
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    def _on_notification(self, conn, pid, channel, payload):
+        self.received += 1
+        for callback in self._subscribers.get(channel, ()):
+            try:
+                callback(payload)
+            except Exception as e:
+                logger.error(f"pubsub: subscriber of {channel} failed: {e}")
+
+    async def _connect(self):
+        conn = await asyncpg.connect(**self.connect_kwargs)
+        for channel in self._subscribers:
+            await conn.add_listener(channel, self._on_notification)
+        self._conn = conn
+
+    async def _send_pending(self):
+        batch, self._pending = self._pending, []
+        channels = [channel for channel, _ in batch]
+        payloads = [payload for _, payload in batch]
+        try:
+            await self._conn.execute("SELECT pg_notify(c, p) FROM unnest($1::text[], $2::text[]) AS n(c, p)", channels, payloads)
+            self.published += len(batch)
+        except Exception:
+            self.dropped += len(batch)
+            raise
+
+    async def _run(self):
+        while True:
+            try:
+                if self._conn is None or self._conn.is_closed():
+                    if self._conn is not None:
+                        self.reconnects += 1
+                    await self._connect()
+                try:
+                    # wake up now and then even when idle, to notice a dropped connection
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.reconnect_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                if self._pending:
+                    await self._send_pending()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"pubsub: connection failed, retrying in {self.reconnect_interval}s: {e}")
+                if self._conn is not None and not self._conn.is_closed():
+                    await self._conn.close()
+                await asyncio.sleep(self.reconnect_interval)
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._conn is not None and not self._conn.is_closed():
+            await self._conn.close()
+        self._conn = None
+
+    def stats(self) -> dict:
+        return {
+            "backend": "postgres",
+            "connected": self._conn is not None and not self._conn.is_closed(),
+            "pending": len(self._pending),
+            "published": self.published,
+            "received": self.received,
+            "dropped": self.dropped,
+            "reconnects": self.reconnects,
+        }
+
+
+class LocalPubSub:
+    """
+    Same interface as PgPubSub, delivering within this process only: a stand-in for a single worker.
+    """
+    def __init__(self):
+        self._subscribers: dict[str, list] = {}
+        self.published = 0
+
+    def subscribe(self, channel: str, callback):
+        self._subscribers.setdefault(channel, []).append(callback)
+
+    def publish(self, channel: str, payload: str) -> bool:
+        self.published += 1
+        loop = asyncio.get_running_loop()
+        for callback in self._subscribers.get(channel, ()):
+            loop.call_soon(callback, payload)
+        return True
+
+    def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": "local", "published": self.published}
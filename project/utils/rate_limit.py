@@ -0,0 +1,74 @@
+import time
+
+class SlidingWindowLimiter:
+    """
+    Allows `limit` hits per key in any `window` seconds, using the sliding window counter
+    approximation: the previous fixed window's count is weighted by how much of it still overlaps
+    the sliding window. Two integers per key, so memory stays flat under a flood of distinct keys
+    until the next sweep drops keys idle for more than two windows. A `limit` of 0 or less allows everything.
+    """
+    def __init__(self, limit: int, window: float, sweep_every: int = 10000):
+        self.limit = limit
+        self.window = window
+        self.sweep_every = sweep_every
+        self._counters: dict[str, list] = {}  # key -> [window_start, current_count, previous_count]
+        self._since_sweep = 0
+        self.rejected = 0
+
+    def _counter(self, key: str, now: float) -> list:
+        window_start = now - now % self.window
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = self._counters[key] = [window_start, 0, 0]
+        elif counter[0] != window_start:
+            # the old current window becomes the previous one, unless more than a window was skipped
+            previous = counter[1] if window_start - counter[0] == self.window else 0
+            counter[0], counter[1], counter[2] = window_start, 0, previous
+        return counter
+
+    def _estimate(self, counter: list, now: float) -> float:
+        overlap = 1 - (now - counter[0]) / self.window
+        return counter[2] * overlap + counter[1]
+
+    def retry_after(self, key: str, now: float | None = None) -> float:
+        """
+        0 when `key` is under its limit, otherwise roughly how many seconds until it is.
+        """
+        now = time.monotonic() if now is None else now
+        counter = self._counters.get(key)
+        if counter is None or self.limit <= 0:
+            return 0.0
+        counter = self._counter(key, now)
+        if self._estimate(counter, now) < self.limit:
+            return 0.0
+        return counter[0] + self.window - now
+
+    def hit(self, key: str, now: float | None = None) -> bool:
+        """
+        Counts one hit for `key`; returns False, without counting it, when the key is over its limit.
+        """
+        if self.limit <= 0:
+            return True
+        now = time.monotonic() if now is None else now
+        self._since_sweep += 1
+        if self._since_sweep >= self.sweep_every:
+            self.sweep(now)
+
+        counter = self._counter(key, now)
+        if self._estimate(counter, now) >= self.limit:
+            self.rejected += 1
+            return False
+        counter[1] += 1
+        return True
+
+    def reset(self, key: str):
+        self._counters.pop(key, None)
+
+    def sweep(self, now: float | None = None):
+        now = time.monotonic() if now is None else now
+        self._since_sweep = 0
+        cutoff = now - 2 * self.window
+        self._counters = {key: counter for key, counter in self._counters.items() if counter[0] > cutoff}
+
+    def stats(self) -> dict:
+        return {"limit": self.limit, "window_seconds": self.window, "tracked_keys": len(self._counters), "rejected": self.rejected}
@@ -0,0 +1,49 @@
+import hashlib
+from functools import lru_cache
+from typing import Any
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+from utils.config import settings
+
+@lru_cache
+def list_adapter(model: type[BaseModel]) -> TypeAdapter:
+    """Validates and serializes a whole list of `model` in one pydantic-core call."""
+    return TypeAdapter(list[model])
+
+class ModelResponse(Response):
+    """
+    JSON response for content that is already a validated model or list of models, written by
+    pydantic-core in one pass. Returning a Response skips FastAPI's response_model handling
+    (validate again, convert to dicts, json.dumps); keep response_model on the route for the docs.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode()
+        if not content:
+            return b"[]"
+        return list_adapter(type(content[0])).dump_json(content)
+
+def make_etag(model: type[BaseModel], *parts) -> str:
+    """
+    Strong ETag for a `model` representation whose content is fixed by `parts` (id, updated_at, ...).
+    The model's fields are hashed in, so a deploy that changes the representation changes the tag.
+    """
+    key = "|".join([model.__name__, *model.model_fields, *map(str, parts)])
+    return f'"{hashlib.sha1(key.encode()).hexdigest()[:20]}"'
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # If-None-Match uses the weak comparison: W/"x" matches "x"
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+
+def cache_headers(etag: str) -> dict[str, str]:
+    max_age = settings.http_cache_max_age_seconds
+    return {"ETag": etag, "Cache-Control": f"max-age={max_age}, must-revalidate" if max_age > 0 else "no-cache"}
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
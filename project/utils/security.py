@@ -1,57 +1,180 @@
 from passlib.context import CryptContext
-from datetime import datetime, timedelta, timezone
-from dotenv import load_dotenv
-import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from time import perf_counter
+import asyncio
 import jwt
 from typing import Optional
-
-load_dotenv()
-
-ALGORITHM = os.getenv("JWT_ALGORITHM")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
-ACCESS_TOKEN_SECRET_KEY = os.getenv("ACCESS_TOKEN_SECRET_KEY")
-REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 30))
-REFRESH_TOKEN_SECRET_KEY = os.getenv("REFRESH_TOKEN_SECRET_KEY")
+from utils.tokens import access_tokens, refresh_tokens
+from utils.config import CPU_COUNT, settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+class PasswordHasherBusyError(Exception):
+    def __init__(self, message: str = "Password hasher is busy"):
+        self.message = message
+        super().__init__(self.message)
+
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+def hash_passwords(passwords: list[str]) -> list[str]:
+    return [pwd_context.hash(password) for password in passwords]
+
+class PasswordHashPool:
+    """
+    Runs bcrypt on a dedicated process pool so hashing never blocks the event loop.
+    At most `workers` jobs run at once and at most `max_queue` wait for a slot;
+    anything beyond that (or waiting longer than `queue_timeout`) is rejected
+    with PasswordHasherBusyError so callers can answer 503 instead of piling up.
+    """
+    def __init__(self, workers: int, max_queue: int, queue_timeout: float):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._executor = None
+        self._slots = None
+        self._waiting = 0
+        self._running = 0
+        self._acquired = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._last_wait = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        return self._slots
+
+    async def _acquire(self):
+        if self._get_slots().locked() and self._waiting >= self.max_queue:
+            self._rejected += 1
+            raise PasswordHasherBusyError("Password hash queue is full")
+
+        self._waiting += 1
+        start = perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._rejected += 1
+            raise PasswordHasherBusyError("Timed out waiting for a password hash worker")
+        finally:
+            self._waiting -= 1
+
+        wait = perf_counter() - start
+        self._acquired += 1
+        self._last_wait = wait
+        self._total_wait += wait
+        self._max_wait = max(self._max_wait, wait)
+
+    async def run(self, func, *args):
+        await self._acquire()
+        return await self._execute(func, *args)
+
+    async def map(self, func, chunks: list) -> list:
+        """
+        Runs func(chunk) for every chunk, one chunk per worker slot.
+        Bulk work waits for free slots in turn with interactive callers instead of being rejected.
+        """
+        results = [None] * len(chunks)
+        pending = iter(enumerate(chunks))
+
+        async def drain():
+            for index, chunk in pending:
+                await self._get_slots().acquire()
+                results[index] = await self._execute(func, chunk)
+
+        await asyncio.gather(*(drain() for _ in range(min(self.workers, len(chunks)))))
+        return results
+
+    async def _execute(self, func, *args):
+        self._running += 1
+        executor = self._get_executor()
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(executor, func, *args)
+            self._completed += 1
+            return result
+        except BrokenProcessPool:
+            self._failed += 1
+            # a worker died; stop the rest of the broken pool and start a fresh one for the next caller
+            if self._executor is executor:
+                self._executor = None
+                executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._running -= 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout,
+            "in_flight": self._running,
+            "queue_depth": self._waiting,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "avg_wait_ms": round(self._total_wait / self._acquired * 1000, 3) if self._acquired else 0.0,
+            "max_wait_ms": round(self._max_wait * 1000, 3),
+            "last_wait_ms": round(self._last_wait * 1000, 3),
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            # wait for the workers to exit, or they outlive this process (one set per restarted web worker)
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+PASSWORD_HASH_WORKERS = max(1, settings.password_hash_workers or CPU_COUNT // max(1, settings.web_concurrency))
+password_hash_pool = PasswordHashPool(
+    PASSWORD_HASH_WORKERS, settings.password_hash_max_queue or PASSWORD_HASH_WORKERS * 4, settings.password_hash_queue_timeout
+)
+
+async def hash_password_async(password: str) -> str:
+    return await password_hash_pool.run(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hash_pool.run(verify_password, plain_password, hashed_password)
+
+async def hash_passwords_async(passwords: list[str], chunk_size: int = 16) -> list[str]:
+    chunks = [passwords[i:i + chunk_size] for i in range(0, len(passwords), chunk_size)]
+    hashed_chunks = await password_hash_pool.map(hash_passwords, chunks)
+    return [hashed for chunk in hashed_chunks for hashed in chunk]
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
-    else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({'exp': expire.timestamp()}) 
-    encode_jwt = jwt.encode(to_encode, ACCESS_TOKEN_SECRET_KEY, algorithm=ALGORITHM)
-    return encode_jwt
+    return access_tokens.create(data, expires_delta)
 
 def decode_access_token(token: str) -> dict:
     try:
-        return jwt.decode(token, ACCESS_TOKEN_SECRET_KEY, algorithms=[ALGORITHM])
+        return access_tokens.decode(token)
     except jwt.ExpiredSignatureError:
         raise ValueError("Access token has expired")
     except jwt.InvalidTokenError:
         raise ValueError("Invalid access token")
     
 def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None):
-    to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
-    else:
-        expire = datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({'exp': expire.timestamp()}) 
-    encode_jwt = jwt.encode(to_encode, REFRESH_TOKEN_SECRET_KEY, algorithm=ALGORITHM)
-    return encode_jwt
+    return refresh_tokens.create(data, expires_delta)
 
 def decode_refresh_token(token: str) -> dict:
     try:
-        return jwt.decode(token, REFRESH_TOKEN_SECRET_KEY, algorithms=[ALGORITHM])
+        return refresh_tokens.decode(token)
     except jwt.ExpiredSignatureError:
         raise ValueError("Refresh token has expired")
     except jwt.InvalidTokenError:
@@ -0,0 +1,214 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import jwt
+from jwt.algorithms import HMACAlgorithm
+from jwt.api_jws import get_algorithm_by_name
+from utils.config import settings
+
+DEFAULT_KID = "default"
+
+logger = logging.getLogger(__name__)
+
+class SigningKey:
+    """
+    One entry of a key ring. HMAC keys use `secret` for both signing and verification;
+    asymmetric keys (RS*, PS*, ES*, EdDSA) sign with the private key and verify with the public key.
+    A key with only a public key is verify-only.
+    """
+    def __init__(self, kid: str, algorithm: str, secret: str = None, private_key: str = None, public_key: str = None):
+        self.kid = kid
+        self.algorithm = algorithm
+        self._algorithm = get_algorithm_by_name(algorithm)
+        self.asymmetric = not isinstance(self._algorithm, HMACAlgorithm)
+
+        if not self.asymmetric:
+            self.signing_key = secret
+            self.verification_key = secret
+        else:
+            self.signing_key = self._algorithm.prepare_key(private_key) if private_key else None
+            if public_key:
+                self.verification_key = self._algorithm.prepare_key(public_key)
+            else:
+                self.verification_key = self.signing_key.public_key()
+
+    @classmethod
+    def from_config(cls, config: dict) -> "SigningKey":
+        def read(name):
+            if config.get(name):
+                return config[name]
+            if config.get(f"{name}_file"):
+                with open(config[f"{name}_file"]) as f:
+                    return f.read()
+            return None
+
+        return cls(
+            kid=config["kid"],
+            algorithm=config["algorithm"],
+            secret=read("secret"),
+            private_key=read("private_key"),
+            public_key=read("public_key"),
+        )
+
+    def public_jwk(self) -> dict:
+        jwk = self._algorithm.to_jwk(self.verification_key, as_dict=True)
+        jwk.update({"kid": self.kid, "alg": self.algorithm, "use": "sig"})
+        return jwk
+
+class KeyRing:
+    def __init__(self, keys: list[SigningKey], active_kid: str):
+        self.keys = {key.kid: key for key in keys}
+        if active_kid not in self.keys:
+            raise ValueError(f"Active key {active_kid} is not in the key ring")
+        if self.keys[active_kid].asymmetric and self.keys[active_kid].signing_key is None:
+            raise ValueError(f"Active key {active_kid} has no private key")
+        self.active = self.keys[active_kid]
+
+    @classmethod
+    def from_config(cls, config: dict) -> "KeyRing":
+        return cls([SigningKey.from_config(key) for key in config["keys"]], config["active"])
+
+    def get(self, kid: Optional[str]) -> SigningKey:
+        # tokens issued before key rings existed carry no kid
+        key = self.keys.get(kid or DEFAULT_KID)
+        if key is None:
+            raise jwt.InvalidTokenError("Unknown key id")
+        return key
+
+    def public_jwks(self) -> dict:
+        return {"keys": [key.public_jwk() for key in self.keys.values() if key.asymmetric]}
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU from a token's SHA-256 digest to its verified claims.
+    Entries are dropped once the token's `exp` has passed.
+    """
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        digest = self._digest(token)
+        claims = self._entries.get(digest)
+        if claims is None:
+            self.misses += 1
+            return None
+        if claims.get("exp", 0) <= time.time():
+            del self._entries[digest]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(digest)
+        self.hits += 1
+        return claims
+
+    def put(self, token: str, claims: dict):
+        if self.max_size <= 0 or "exp" not in claims:
+            return
+        self._entries[self._digest(token)] = claims
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+class TokenService:
+    def __init__(self, key_ring: KeyRing, default_ttl: timedelta, cache_size: int = settings.verified_token_cache_size):
+        self.key_ring = key_ring
+        self.default_ttl = default_ttl
+        self.cache = VerifiedTokenCache(cache_size)
+
+    def rotate(self, key_ring: KeyRing):
+        self.key_ring = key_ring
+        # a removed key must stop validating tokens immediately
+        self.cache.clear()
+
+    def create(self, data: dict, expires_delta: Optional[timedelta] = None) -> str:
+        to_encode = data.copy()
+        expire = datetime.now(timezone.utc) + (expires_delta or self.default_ttl)
+        to_encode.update({"exp": expire.timestamp()})
+        key = self.key_ring.active
+        return jwt.encode(to_encode, key.signing_key, algorithm=key.algorithm, headers={"kid": key.kid})
+
+    def decode(self, token: str) -> dict:
+        """
+        Returns the verified claims; raises jwt.ExpiredSignatureError / jwt.InvalidTokenError.
+        Repeat calls with the same token are served from the cache without verifying the signature.
+        """
+        claims = self.cache.get(token)
+        if claims is not None:
+            return dict(claims)
+
+        key = self.key_ring.get(jwt.get_unverified_header(token).get("kid"))
+        claims = jwt.decode(token, key.verification_key, algorithms=[key.algorithm])
+        self.cache.put(token, claims)
+        return dict(claims)
+
+def legacy_key_ring(secret: str) -> KeyRing:
+    return KeyRing([SigningKey(DEFAULT_KID, settings.jwt_algorithm, secret=secret)], DEFAULT_KID)
+
+def load_key_rings() -> tuple[KeyRing, KeyRing]:
+    if not settings.jwt_keys_file:
+        return legacy_key_ring(settings.access_token_secret_key), legacy_key_ring(settings.refresh_token_secret_key)
+    with open(settings.jwt_keys_file) as f:
+        config = json.load(f)
+    return KeyRing.from_config(config["access"]), KeyRing.from_config(config["refresh"])
+
+class KeyRingWatcher:
+    """
+    Reloads JWT_KEYS_FILE when it changes, so keys rotate without a restart:
+    add the new key, let every worker pick it up, make it active, and drop the old key
+    once the tokens it signed have expired.
+    """
+    def __init__(self, access: TokenService, refresh: TokenService, interval: float = settings.jwt_keys_reload_seconds):
+        self.access = access
+        self.refresh = refresh
+        self.interval = interval
+        self._mtime = os.path.getmtime(settings.jwt_keys_file) if settings.jwt_keys_file else None
+        self._task = None
+
+    def reload_if_changed(self):
+        mtime = os.path.getmtime(settings.jwt_keys_file)
+        if mtime == self._mtime:
+            return
+        access_ring, refresh_ring = load_key_rings()
+        self.access.rotate(access_ring)
+        self.refresh.rotate(refresh_ring)
+        self._mtime = mtime
+        logger.info(f"Reloaded JWT key rings, active access key {access_ring.active.kid}")
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                logger.error(f"Failed to reload JWT key rings, keeping the current keys: {e}")
+
+    def start(self):
+        if settings.jwt_keys_file:
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+_access_ring, _refresh_ring = load_key_rings()
+access_tokens = TokenService(_access_ring, timedelta(minutes=settings.access_token_expire_minutes))
+refresh_tokens = TokenService(_refresh_ring, timedelta(days=settings.refresh_token_expire_days))
+key_ring_watcher = KeyRingWatcher(access_tokens, refresh_tokens)
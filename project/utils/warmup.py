@@ -0,0 +1,31 @@
+import asyncio
+import logging
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+async def prefill_pool(engine: AsyncEngine, connections: int):
+    """Opens `connections` pooled connections at once, so the first requests do not pay for connecting."""
+    async def touch():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(touch() for _ in range(connections)))
+
+async def exercise_routes(app, paths: list[str]):
+    """
+    Sends GET requests to `paths` through the app in-process: builds the middleware stack and
+    the response serializers and prepares the routes' statements. Failures are logged, not raised.
+    """
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://warmup") as client:
+        for path in paths:
+            try:
+                response = await client.get(path)
+                if response.status_code >= 400:
+                    logger.warning(f"Warm-up request GET {path} answered {response.status_code}")
+            except Exception as e:
+                logger.warning(f"Warm-up request GET {path} failed: {e}")
@@ -0,0 +1,68 @@
+import logging
+from utils.flush_loop import PeriodicFlusher
+
+logger = logging.getLogger(__name__)
+
+class WriteBehindBuffer(PeriodicFlusher):
+    """
+    Collects rows in memory and hands them to `flush_func(rows)` in batches, from a background task,
+    whenever `batch_size` rows are waiting or `flush_interval` seconds have passed.
+    `add` never waits on the database; once `max_pending` rows are waiting, new rows are dropped
+    and counted instead of growing memory without bound. A failed batch is put back in front and
+    retried with the next flush, up to `retries` times while it fits in `max_pending`; after that
+    it is logged and discarded.
+    """
+    def __init__(self, name: str, flush_func, batch_size: int, flush_interval: float, max_pending: int, retries: int = 0):
+        super().__init__(flush_interval)
+        self.name = name
+        self._flush_func = flush_func
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.retries = retries
+        self._rows = []
+        self._attempts = 0
+        self.written = 0
+        self.dropped = 0
+        self.retried = 0
+        self.failed = 0
+        self.batches = 0
+
+    def is_full(self) -> bool:
+        return len(self._rows) >= self.max_pending
+
+    def add(self, row):
+        if len(self._rows) >= self.max_pending:
+            self.dropped += 1
+            return
+        self._rows.append(row)
+        if len(self._rows) >= self.batch_size:
+            self.wake()
+
+    async def _flush(self):
+        while self._rows:
+            batch, self._rows = self._rows[:self.batch_size], self._rows[self.batch_size:]
+            try:
+                await self._flush_func(batch)
+                self.written += len(batch)
+                self.batches += 1
+                self._attempts = 0
+            except Exception as e:
+                if self._attempts < self.retries and len(self._rows) + len(batch) <= self.max_pending:
+                    self._attempts += 1
+                    self._rows[:0] = batch
+                    self.retried += len(batch)
+                    logger.warning(f"{self.name}: failed to write {len(batch)} rows, retry {self._attempts} of {self.retries}: {e}")
+                    return
+                self._attempts = 0
+                self.failed += len(batch)
+                logger.error(f"{self.name}: failed to write {len(batch)} rows: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._rows),
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
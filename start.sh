@@ -58,10 +58,11 @@ fi
 # Start the web server
 if [ -d "$PROJECT_DIR" ]; then
     echo "Starting the web server"
-    if [ -f "$PROJECT_DIR/main.py" ]; then
-        python3 $PROJECT_DIR/main.py
+    if [ -f "$PROJECT_DIR/serve.py" ]; then
+        # pre-forked workers; `kill -HUP <pid>` restarts them one at a time without dropping requests
+        cd "$PROJECT_DIR" && python3 serve.py
     else
-        echo "Error: main.py not found in $PROJECT_DIR"
+        echo "Error: serve.py not found in $PROJECT_DIR"
         return 1
     fi
 else